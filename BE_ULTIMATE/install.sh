@@ -52,6 +52,18 @@ if [ -f "main.py" ]; then
     cp -r . ~/BE_ULTIMATE/
 fi
 
+# Módulos compartilhados com o Assistente-be (fonte única em tools/): a instalação leva uma cópia
+SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
+SHARED_DIR="$SCRIPT_DIR/../tools"
+for shared in tracing.py profiling.py; do
+    if [ ! -f "$SHARED_DIR/$shared" ]; then
+        echo "❌ $SHARED_DIR/$shared não encontrado"
+        echo "   Rode o install.sh de dentro de BE_ULTIMATE/ no repositório completo do Assistente-be"
+        exit 1
+    fi
+    cp "$SHARED_DIR/$shared" ~/BE_ULTIMATE/modules/
+done
+
 # Tornar executável
 chmod +x ~/BE_ULTIMATE/main.py 2>/dev/null || true
 chmod +x ~/BE_ULTIMATE/scripts/*.sh 2>/dev/null || true
@@ -6,12 +6,19 @@ Sistema completo com todas as funcionalidades integradas
 
 import sys
 import os
+import argparse
 import time
 import json
 from datetime import datetime
 
-# Adicionar módulos ao path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'modules'))
+# Adicionar módulos ao path; tools/ do Assistente-be vai no fim e fornece tracing.py e
+# profiling.py (fonte única; o install.sh copia os dois para modules/)
+BE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BE_DIR, 'modules'))
+sys.path.append(os.path.join(os.path.dirname(BE_DIR), 'tools'))
+
+TRACE_FILE = os.path.join(BE_DIR, 'logs', 'traces.jsonl')  # modo --trace
+PROFILE_DIR = os.path.join(BE_DIR, 'logs', 'profiles')    # modo --profile
 
 # Importar módulos
 try:
@@ -24,13 +31,31 @@ except ImportError as e:
     print(f"Erro ao importar módulos: {e}")
     print("Executando em modo limitado...")
 
+try:
+    from profiling import RoundProfiler
+except ImportError:  # tools/profiling.py ausente (instalação avulsa): --profile indisponível
+    RoundProfiler = None
+
+try:
+    import tracing
+    from tracing import traced
+except ImportError:  # tools/tracing.py ausente (instalação avulsa): --trace indisponível
+    tracing = None
+
+    def traced(name=None, **attrs):
+        return lambda fn: fn
+
 class BEUltimate:
     """
     BE Ultimate - Sistema Integrado
     Combina todos os módulos em um único sistema inteligente
     """
     
-    def __init__(self):
+    # rotinas perfiladas no modo --profile
+    PROFILED_ROUTINES = ('run_daily_routine', 'run_trading_session', 'run_iq_option_session',
+                         'generate_lottery_games', 'get_coaching')
+    
+    def __init__(self, profiler=None):
         self.version = "2.0.0"
         self.start_time = datetime.now()
         
@@ -51,6 +76,12 @@ class BEUltimate:
             'operations_today': 0,
             'active': True
         }
+        
+        # Modo perfil: cada rotina grava cProfile + tracemalloc em logs/profiles/
+        self.profiler = profiler
+        if profiler is not None:
+            for name in self.PROFILED_ROUTINES:
+                setattr(self, name, profiler.wrap(getattr(self, name), name))
     
     def get_banner(self):
         return f"""
@@ -113,6 +144,7 @@ class BEUltimate:
         
         print(f"\n[BE] ✅ {len(self.modules)} módulos ativos\n")
     
+    @traced('be.run_daily_routine')
     def run_daily_routine(self):
         """Executa rotina diária."""
         print("\n" + "="*60)
@@ -157,6 +189,7 @@ class BEUltimate:
         print("[BE] ✅ Rotina diária concluída")
         print("="*60)
     
+    @traced('be.run_trading_session')
     def run_trading_session(self):
         """Executa sessão de trading."""
         if 'trading' not in self.modules:
@@ -184,6 +217,7 @@ class BEUltimate:
                             reward
                         )
     
+    @traced('be.run_iq_option_session')
     def run_iq_option_session(self, num_trades=5):
         """Executa sessão de IQ Option."""
         if 'iq_option' not in self.modules:
@@ -211,6 +245,7 @@ class BEUltimate:
                 
                 time.sleep(1)  # Aguardar entre trades
     
+    @traced('be.generate_lottery_games')
     def generate_lottery_games(self, num_games=3):
         """Gera jogos de loteria."""
         if 'lottery' not in self.modules:
@@ -223,6 +258,7 @@ class BEUltimate:
         
         return games
     
+    @traced('be.get_coaching')
     def get_coaching(self):
         """Obtém coaching personalizado."""
         if 'coaching' not in self.modules:
@@ -308,13 +344,37 @@ class BEUltimate:
 
 def main():
     """Função principal."""
-    be = BEUltimate()
+    parser = argparse.ArgumentParser(description="BE Ultimate - Bot de Estratégias Inteligentes")
+    parser.add_argument('--profile', action='store_true',
+                        help='Perfilar cada rotina (cProfile + tracemalloc) em logs/profiles/')
+    parser.add_argument('--trace', action='store_true',
+                        help='Exportar spans das rotinas em logs/traces.jsonl')
+    args = parser.parse_args()
+    
+    if args.trace and tracing is None:
+        print("[BE] ⚠️  Tracing indisponível: copie tools/tracing.py para modules/ (install.sh)")
+    elif args.trace:
+        tracing.configure(TRACE_FILE)
+        print(f"[BE] 🧵 Tracing ativo - spans em {TRACE_FILE}")
+    
+    profiler = None
+    if args.profile and RoundProfiler is None:
+        print("[BE] ⚠️  Perfil indisponível: copie tools/profiling.py para modules/ (install.sh)")
+    elif args.profile:
+        profiler = RoundProfiler(PROFILE_DIR, log=lambda msg: print(f"[Profile] {msg}"))
+        print(f"[Profile] 🔬 Modo perfil ativo - relatórios em {PROFILE_DIR}")
+    
+    be = BEUltimate(profiler=profiler)
     
     # Executar rotina diária automaticamente
     be.run_daily_routine()
     
     # Menu interativo
-    be.interactive_menu()
+    try:
+        be.interactive_menu()
+    finally:
+        if tracing is not None:
+            tracing.shutdown()
 
 
 if __name__ == "__main__":
@@ -7,6 +7,11 @@ import os
 import time
 from datetime import datetime
 import numpy as np
+try:
+    from tracing import traced
+except ImportError:  # tools/tracing.py ausente (instalação avulsa): rotinas sem spans
+    def traced(name=None, **attrs):
+        return lambda fn: fn
 
 class AutoEvolutionAI:
     """
@@ -44,6 +49,7 @@ class AutoEvolutionAI:
             'evolution_log': []
         }
     
+    @traced('auto_evolution.save_state', io='disk')
     def save_state(self):
         """Salva estado do sistema."""
         with open(self.config_path, 'w') as f:
@@ -89,6 +95,7 @@ class AutoEvolutionAI:
             }
         }
     
+    @traced('auto_evolution.learn_from_result')
     def learn_from_result(self, model_name, action, result, reward):
         """Aprende com resultado de uma ação."""
         if model_name not in self.models:
@@ -122,6 +129,7 @@ class AutoEvolutionAI:
         self.state['models_performance'][model_name] = model['performance']
         self.save_state()
     
+    @traced('auto_evolution.optimize_strategy')
     def optimize_strategy(self, domain='betting'):
         """Otimiza estratégia usando algoritmo genético."""
         print(f"[Auto-Evolution] 🧬 Otimizando estratégia para {domain}...")
@@ -269,6 +277,7 @@ class AutoEvolutionAI:
         
         return ensemble_pred
     
+    @traced('auto_evolution.meta_learn')
     def meta_learn(self):
         """Meta-aprendizado: aprender sobre o próprio aprendizado."""
         print("[Auto-Evolution] 🎓 Executando meta-aprendizado...")
@@ -320,6 +329,7 @@ class AutoEvolutionAI:
         
         return insights
     
+    @traced('auto_evolution.evolve')
     def evolve(self):
         """Executa ciclo completo de evolução."""
         print("\n" + "="*60)
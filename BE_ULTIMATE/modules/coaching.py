@@ -5,6 +5,11 @@
 import json
 import random
 from datetime import datetime
+try:
+    from tracing import traced
+except ImportError:  # tools/tracing.py ausente (instalação avulsa): rotinas sem spans
+    def traced(name=None, **attrs):
+        return lambda fn: fn
 
 class CoachingAI:
     """
@@ -160,6 +165,7 @@ class CoachingAI:
             'habit': random.choice(billionaire['daily_habits'])
         }
     
+    @traced('coaching.create_action_plan')
     def create_action_plan(self, goal, timeframe='30 dias'):
         """Cria plano de ação baseado em estratégias de bilionários."""
         # Selecionar bilionário relevante
@@ -347,6 +353,7 @@ class CoachingAI:
         
         return books.get(area, books['geral'])
     
+    @traced('coaching.print_daily_coaching')
     def print_daily_coaching(self):
         """Imprime coaching diário."""
         inspiration = self.get_daily_inspiration()
@@ -10,6 +10,11 @@ import numpy as np
 from datetime import datetime
 from PIL import Image, ImageGrab
 import subprocess
+try:
+    from tracing import traced
+except ImportError:  # tools/tracing.py ausente (instalação avulsa): rotinas sem spans
+    def traced(name=None, **attrs):
+        return lambda fn: fn
 
 # Tentar importar OpenCV
 try:
@@ -67,6 +72,7 @@ class IQOptionBot:
             }
         }
     
+    @traced('iq_option.capture_screen', io='screen')
     def capture_screen(self, region=None):
         """Captura tela ou região específica."""
         try:
@@ -82,6 +88,7 @@ class IQOptionBot:
             print(f"[IQ Option] Erro ao capturar tela: {e}")
             return None
     
+    @traced('iq_option.capture_screen_termux', io='screen')
     def capture_screen_termux(self):
         """Captura tela no Termux usando termux-api."""
         try:
@@ -148,6 +155,7 @@ class IQOptionBot:
         
         return img, prices
     
+    @traced('iq_option.detect_pattern')
     def detect_pattern(self, candles):
         """Detecta padrões de candlesticks."""
         if len(candles) < 2:
@@ -239,6 +247,7 @@ class IQOptionBot:
         
         return rsi
     
+    @traced('iq_option.generate_signal')
     def generate_signal(self, candles=None):
         """Gera sinal de trading baseado em análise."""
         if candles is None:
@@ -294,6 +303,7 @@ class IQOptionBot:
         """Calcula valor da aposta."""
         return round(self.capital * self.stake_percent, 2)
     
+    @traced('iq_option.execute_trade')
     def execute_trade(self, signal):
         """Executa trade (simulado)."""
         if signal['signal'] == 'HOLD':
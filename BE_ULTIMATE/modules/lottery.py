@@ -10,6 +10,11 @@ import numpy as np
 from datetime import datetime
 from collections import Counter
 import itertools
+try:
+    from tracing import traced
+except ImportError:  # tools/tracing.py ausente (instalação avulsa): rotinas sem spans
+    def traced(name=None, **attrs):
+        return lambda fn: fn
 
 class LotteryAI:
     """
@@ -71,6 +76,7 @@ class LotteryAI:
         
         return configs.get(game_type, configs['mega_sena'])
     
+    @traced('lottery.load_historical_data')
     def load_historical_data(self):
         """Carrega dados históricos da loteria."""
         # Tentar buscar da API da Caixa
@@ -85,6 +91,7 @@ class LotteryAI:
         # Fallback: gerar dados simulados
         self.historical_data = self.generate_simulated_data(100)
     
+    @traced('lottery.fetch_from_api', io='network')
     def fetch_from_api(self):
         """Busca resultados da API da Caixa."""
         # API não oficial da Loteria
@@ -143,6 +150,7 @@ class LotteryAI:
         
         return results
     
+    @traced('lottery.analyze_frequency')
     def analyze_frequency(self):
         """Analisa frequência de cada número."""
         all_numbers = []
@@ -162,6 +170,7 @@ class LotteryAI:
             'total_draws': len(self.historical_data)
         }
     
+    @traced('lottery.analyze_patterns')
     def analyze_patterns(self):
         """Analisa padrões nos sorteios."""
         patterns = {
@@ -205,6 +214,7 @@ class LotteryAI:
             'sum_std': np.std(patterns['sum_range'])
         }
     
+    @traced('lottery.analyze_delays')
     def analyze_delays(self):
         """Analisa atrasos (números que não saem há muito tempo)."""
         max_number = self.config['max_number']
@@ -319,6 +329,7 @@ class LotteryAI:
         
         return sorted(selected)
     
+    @traced('lottery.generate_game')
     def generate_game(self, strategy='hybrid', num_games=1):
         """Gera jogo(s) com estratégia escolhida."""
         strategies = {
@@ -9,6 +9,11 @@ import time
 import requests
 from datetime import datetime, timedelta
 import numpy as np
+try:
+    from tracing import traced
+except ImportError:  # tools/tracing.py ausente (instalação avulsa): rotinas sem spans
+    def traced(name=None, **attrs):
+        return lambda fn: fn
 
 # Tentar importar MT5 (pode não funcionar no Android)
 try:
@@ -66,6 +71,7 @@ class TradingEngine:
             print(f"[Trading] Erro ao conectar MT5: {e}")
             return False
     
+    @traced('trading.get_market_data', io='network')
     def get_market_data(self, symbol='USDBRL', timeframe='H1', bars=100):
         """Busca dados de mercado."""
         if self.mt5_connected:
@@ -124,6 +130,7 @@ class TradingEngine:
             'last_price': prices[-1]
         }
     
+    @traced('trading.fetch_financial_news', io='network')
     def fetch_financial_news(self, query='forex'):
         """Busca notícias financeiras que impactam mercados."""
         api_key = self.config.get('news_api_key')
@@ -178,6 +185,7 @@ class TradingEngine:
             }
         ]
     
+    @traced('trading.analyze_sentiment')
     def analyze_sentiment(self, news):
         """Analisa sentimento das notícias."""
         # Palavras-chave positivas e negativas
@@ -203,6 +211,7 @@ class TradingEngine:
         
         return sentiment_score  # -1 a 1
     
+    @traced('trading.calculate_indicators')
     def calculate_indicators(self, data):
         """Calcula indicadores técnicos."""
         prices = data['data'] if isinstance(data['data'], np.ndarray) else np.array([d['close'] for d in data['data']])
@@ -273,6 +282,7 @@ class TradingEngine:
         
         return ema
     
+    @traced('trading.generate_signal')
     def generate_signal(self, symbol='USDBRL'):
         """Gera sinal de trading baseado em análise técnica e fundamental."""
         # Buscar dados
@@ -342,6 +352,7 @@ class TradingEngine:
         
         return min(position_size, self.capital * 0.1)  # Máximo 10% do capital
     
+    @traced('trading.execute_trade')
     def execute_trade(self, signal):
         """Executa trade (simulado ou real)."""
         if signal['signal'] == 'HOLD':
@@ -367,6 +378,7 @@ class TradingEngine:
         
         return trade
     
+    @traced('trading.run_strategy')
     def run_strategy(self, symbols=['USDBRL', 'EURUSD', 'BTCUSD']):
         """Executa estratégia de trading em múltiplos símbolos."""
         print("[Trading] 🔍 Analisando mercados...")
@@ -4,8 +4,37 @@ DRY_RUN = True  # True = modo de teste (não registra apostas reais)
 BANKROLL_INITIAL = 1000.0  # R$
 MIN_STAKE_PERCENT = 0.01  # 1% do bankroll
 MAX_STAKE_PERCENT = 0.02  # 2% do bankroll
+ACCUMULATOR_MAX_CANDIDATES = 64  # seleções de maior valor consideradas na busca de múltiplas
+KELLY_FRACTION = 0.25  # fração do Kelly simultâneo usada nas stakes da rodada
 API_FOOTBALL_KEY = ''  # Coloque sua chave da API-Football aqui (opcional)
+API_FOOTBALL_LEAGUES = []  # IDs de ligas buscadas em paralelo (vazio = todas as partidas ao vivo)
+API_FOOTBALL_RESULTS_DAYS = 2  # dias de partidas encerradas (hoje e anteriores) buscados para treinar os ratings
+API_FOOTBALL_UPCOMING_DAYS = 2  # dias de partidas não iniciadas (hoje e seguintes) no calendário adaptativo
+RATINGS_SEEN_DAYS = 30  # dias de resultados lembrados pelos ratings (não reingere); mais antigos são ignorados
+API_FOOTBALL_RATE_PER_MIN = 10  # cota de requisições/minuto do plano (free = 10)
+API_FOOTBALL_CONCURRENCY = 8  # requisições simultâneas no modo assíncrono
+ADAPTIVE_WINDOW_MINUTES = 120  # modo adaptativo: rodadas densas nesta janela antes de cada início
+ADAPTIVE_MIN_INTERVAL_MINUTES = 5  # intervalo entre rodadas dentro da janela
+ADAPTIVE_IDLE_MINUTES = 180  # intervalo máximo sem início de partida próximo
+DEFAULT_KICKOFF_HOUR = 16  # hora UTC assumida quando os dados só trazem a data da partida
+PREFETCH_ENABLED = True  # busca os dados da próxima rodada em segundo plano
+PREFETCH_LEAD_SECONDS = 30  # antecedência da busca em relação à rodada
+PREFETCH_MAX_AGE_SECONDS = 120  # dados buscados há mais tempo que isso são descartados
+PREFETCH_WAIT_SECONDS = 10  # quanto a rodada espera por uma busca antecipada em andamento
+METRICS_PORT = 9108  # endpoint /metrics no formato Prometheus (0 = desligado)
+METRICS_HOST = '127.0.0.1'  # interface do endpoint de métricas (só local por padrão)
+PROFILE_DIR = 'logs/profiles'  # modo --profile: dumps do cProfile e relatórios de alocação
+PROFILE_KEEP = 20  # execuções perfiladas mantidas (as mais antigas são apagadas)
+PROFILE_TOP_N = 25  # funções e linhas de alocação listadas em cada relatório
+TRACE_FILE = 'logs/traces.jsonl'  # modo --trace: spans em JSON lines (tools/tracing.py converte p/ Chrome)
+ROUND_WORKERS = 0  # processos para rodadas particionadas por liga (0 ou 1 = processo único)
 USER_MOCK = 'usuario_sim'
 PASS_MOCK = 'senha_simulada'
 SAVE_STATE_FILE = 'state.json'
 RESULTS_DIR = 'results'
+LEDGER_BUFFER_ROWS = 1000  # linhas do histórico acumuladas antes de gravar em lote
+LEDGER_FLUSH_SECONDS = 5.0  # intervalo máximo entre gravações do histórico
+LEDGER_DURABILITY = 'flush'  # 'none', 'flush' ou 'fsync' a cada lote gravado
+LEDGER_BACKEND = 'csv'  # 'csv' (results/history.csv), 'segments' (results/history/, importa o history.csv) ou 'sqlite' (results/ledger.db)
+LEDGER_SEGMENT_ROLL = 'daily'  # novo segmento a cada dia ('daily') ou só por tamanho ('size')
+LEDGER_SEGMENT_BYTES = 8 * 1024 * 1024  # tamanho máximo de um segmento antes de comprimir
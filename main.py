@@ -4,9 +4,9 @@ Assistente-be - Sistema de Trading e Apostas Inteligente
 Loop principal que agenda análises e simula apostas
 """
 import argparse
-import time
-import schedule
 import os
+import threading
+from contextlib import nullcontext
 import sys
 from pathlib import Path
 
@@ -21,10 +21,22 @@ from logger import logger, log_startup, log_shutdown, log_health_check
 # Importar módulos do sistema
 try:
     from utils import login_simulado, notify, save_state, load_state
-    from analyzer import load_fixtures_local, fetch_fixtures_from_api, enrich_with_probs
-    from bet_engine import make_accumulators
+    from scheduler import AsyncScheduler
+    from pipeline import RoundPipeline
     from manager import BankrollManager
-    from config import DRY_RUN, SAVE_STATE_FILE, RESULTS_DIR
+    from kickoffs import KickoffCalendar
+    from replay import replay, load_replay_dataset
+    from sharding import ShardedRoundPipeline
+    from prefetch import Prefetcher
+    from profiling import RoundProfiler
+    import tracing
+    from tracing import span
+    from http_client import get_client
+    from metrics import (observe_round, serve_metrics, register_bankroll, register_http_client,
+                         register_prefetcher, register_scheduler)
+    from config import DRY_RUN, SAVE_STATE_FILE, RESULTS_DIR, ROUND_WORKERS
+    from config import PREFETCH_ENABLED, METRICS_PORT, METRICS_HOST, TRACE_FILE
+    from config import PROFILE_DIR, PROFILE_KEEP, PROFILE_TOP_N
 except ImportError as e:
     logger.error(f"Erro ao importar módulos: {e}")
     logger.info("Verifique se a estrutura de diretórios está correta")
@@ -33,86 +45,153 @@ except ImportError as e:
 # Versão do sistema
 VERSION = "3.0.0"
 
+# Cadência dos jobs auxiliares (segundos)
+HEALTH_CHECK_SECONDS = 300
+
 # Criar diretórios necessários
 os.makedirs(RESULTS_DIR, exist_ok=True)
 os.makedirs("logs", exist_ok=True)
 
 
-def run_round(bank: BankrollManager):
+def run_round(bank: BankrollManager, dry_run: bool = DRY_RUN, pipeline: RoundPipeline = None,
+              fixtures=None, verbose: bool = True, profiler: RoundProfiler = None):
     """
     Executa uma rodada de análise e apostas
     
     Args:
         bank: Gerenciador de bankroll
+        dry_run: Modo de teste
+        pipeline: Pipeline já configurado (ex.: replay); padrão é um RoundPipeline novo
+        fixtures: Partidas da rodada; sem elas o pipeline busca na API/CSV
+        verbose: Registra o resumo da rodada no log
+        profiler: Grava cProfile + tracemalloc da rodada (modo --profile)
+    
+    Returns:
+        RoundResult com as saídas e o tempo de cada estágio (None em caso de erro)
     """
     try:
-        logger.info("🎲 Iniciando rodada de análise...")
-        
-        # 1) Tentar buscar fixtures ao vivo via API; senão usar CSV local
-        df = fetch_fixtures_from_api()
-        if df is None:
-            logger.warning("API indisponível, usando dados locais")
-            df = load_fixtures_local()
-        
-        # 2) Enriquecer com probabilidades
-        dfp = enrich_with_probs(df)
-        logger.info(f"📊 {len(dfp)} partidas analisadas")
+        if verbose:
+            logger.info("🎲 Iniciando rodada de análise...")
         
-        # 3) Gerar acumuladores
-        accs = make_accumulators(dfp)
-        logger.info(f"🎯 {len(accs)} acumuladores gerados")
+        # fetch -> enrich -> select -> build -> stake -> record, cada estágio uma única vez
+        if pipeline is None:
+            pipeline = RoundPipeline(bank, dry_run=dry_run, notify=notify)
+        with span('rodada') as root, profiler.profile('rodada') if profiler is not None else nullcontext():
+            result = pipeline.run(fixtures)
+            root.set('source', result.source)
+            root.set('fixtures', len(result.fixtures))
+            root.set('bets', result.recorded)
+        observe_round(result)
+        if not verbose:
+            return result
         
-        # 4) Para cada acumulador, simular stake e resultado futuro
-        for i, acc in enumerate(accs, 1):
-            stake = bank.stake_for()
-            details = {
-                'selections': acc['selections'],
-                'total_odd': acc['total_odd']
-            }
-            
-            if DRY_RUN:
-                logger.info(f"[DRY_RUN] Aposta {i}: R$ {stake:.2f} @ {acc['total_odd']:.2f}")
-                notify(f"[DRY_RUN] Apostaria R$ {stake} em múltipla odd {acc['total_odd']:.2f}")
-                bank.record('multiple', details, stake, acc['total_odd'], 'void')
-            else:
-                logger.warning(f"[SIMULAÇÃO] Aposta {i}: R$ {stake:.2f} @ {acc['total_odd']:.2f}")
-                notify(f"[SIM] Apostado R$ {stake} em múltipla odd {acc['total_odd']:.2f}")
-                bank.record('multiple', details, stake, acc['total_odd'], 'void')
+        stats = result.cache_stats
+        if result.new_results:
+            logger.info(f"📈 Ratings atualizados com {result.new_results} resultados novos")
+        cached = f" ({stats.get('hits', 0)} do cache, {stats.get('recomputed', 0)} recalculadas)" if stats else ""
+        logger.info(f"📊 {len(result.enriched)} partidas analisadas{cached}")
+        logger.info(f"🎯 {len(result.accumulators)} acumuladores gerados")
+        if result.simulation:
+            sim = result.simulation.round
+            logger.info(f"🎰 Simulação ({result.simulation.n_sims} cenários): EV R$ {sim['ev']:.2f} | "
+                        f"desvio R$ {sim['std']:.2f} | P(prejuízo) {sim['p_loss']:.1%}")
+        timings = ' | '.join(f"{k} {v * 1000:.1f}ms" for k, v in result.timings.items())
+        logger.info(f"⏱️  Estágios: {timings} | total {result.total_time * 1000:.1f}ms")
         
         logger.success("✅ Rodada concluída com sucesso")
+        return result
         
     except Exception as e:
         logger.exception(f"❌ Erro durante rodada: {e}")
+        observe_round(None)
+        return None
 
 
-def job(bank: BankrollManager):
+def job(bank: BankrollManager, dry_run: bool = DRY_RUN, pipeline: RoundPipeline = None,
+        next_round_in: float = None, profiler: RoundProfiler = None):
     """
     Job agendado que executa login e rodada
     
     Args:
         bank: Gerenciador de bankroll
+        dry_run: Modo de teste
+        pipeline: Pipeline reaproveitado entre rodadas (ex.: sharded por liga)
+        next_round_in: Segundos até a próxima rodada, para agendar a busca antecipada
+        profiler: Perfilador das rodadas (modo --profile)
+    
+    Returns:
+        RoundResult da rodada (None em caso de erro)
     """
     try:
-        log_health_check()
         login_simulado('usuario_sim', 'senha_sim')
-        run_round(bank)
+        result = run_round(bank, dry_run, pipeline=pipeline, profiler=profiler)
+        if next_round_in is not None:
+            schedule_prefetch(pipeline, next_round_in - (result.total_time if result else 0.0))
         
         # Salvar estado
         state = bank.snapshot()
         save_state(state)
-        logger.info(f"💾 Estado salvo - Saldo: R$ {state['balance']:.2f}")
+        stats = state['stats']
+        logger.info(f"💾 Estado salvo - Saldo: R$ {state['balance']:.2f} | ROI {stats['roi']:+.1%} | "
+                    f"drawdown máx. {stats['max_drawdown']:.1%}")
+        
+        return result
         
     except Exception as e:
         logger.exception(f"❌ Erro no job agendado: {e}")
+        return None
+
+
+def schedule_prefetch(pipeline: RoundPipeline, delay: float):
+    """Agenda a busca dos dados da próxima rodada (se o pipeline tiver prefetch)"""
+    if pipeline is not None and pipeline.prefetcher is not None:
+        pipeline.prefetcher.schedule(delay)
+
+
+def adaptive_job(bank: BankrollManager, calendar: KickoffCalendar, dry_run: bool = DRY_RUN,
+                 pipeline: RoundPipeline = None, profiler: RoundProfiler = None):
+    """
+    Rodada do modo adaptativo: alimenta o calendário com os inícios das partidas analisadas
+    e, com a API, com as partidas ainda não iniciadas (o feed ao vivo só traz jogos em andamento)
+    
+    Args:
+        bank: Gerenciador de bankroll
+        calendar: Fila de inícios consultada para agendar a próxima rodada
+        dry_run: Modo de teste
+        pipeline: Pipeline reaproveitado entre rodadas
+        profiler: Perfilador das rodadas (modo --profile)
+    """
+    result = job(bank, dry_run, pipeline, profiler=profiler)
+    added = 0
+    if result is not None and result.fixtures is not None:
+        added += calendar.update_from_frame(result.fixtures)
+    if pipeline is not None:
+        try:
+            added += calendar.update_from_frame(pipeline.fetch_upcoming())
+        except Exception as e:
+            logger.warning(f"⚠️  Próximas partidas indisponíveis: {e}")
+    if added:
+        logger.info(f"📅 {added} inícios de partida novos no calendário ({len(calendar)} pendentes)")
+    delay = calendar.next_delay()
+    schedule_prefetch(pipeline, delay)
+    logger.info(f"⏰ Próxima rodada em {delay / 60:.1f} min")
 
 
-def main_loop(dry_run: bool = False, interval_minutes: int = 30):
+def main_loop(dry_run: bool = False, interval_minutes: int = 30, stop_event: threading.Event = None,
+              adaptive: bool = False, workers: int = ROUND_WORKERS, metrics_port: int = METRICS_PORT,
+              profile: bool = False, trace: bool = False):
     """
     Loop principal do sistema
     
     Args:
         dry_run: Modo de teste (não registra apostas reais)
         interval_minutes: Intervalo entre rodadas em minutos
+        stop_event: Evento que encerra o loop (usado pela UI, que roda o loop numa thread)
+        adaptive: Agenda as rodadas pelos inícios das partidas em vez do intervalo fixo
+        workers: Processos para as rodadas particionadas por liga (0 ou 1 = processo único)
+        metrics_port: Porta do endpoint /metrics no formato Prometheus (0 = desligado)
+        profile: Perfila cada rodada (cProfile + tracemalloc) em config.PROFILE_DIR
+        trace: Exporta spans das rodadas em config.TRACE_FILE
     """
     # Startup
     modules = ["analyzer", "bet_engine", "manager", "utils", "voice"]
@@ -123,22 +202,57 @@ def main_loop(dry_run: bool = False, interval_minutes: int = 30):
     state = load_state()
     
     if state and 'balance' in state:
-        bank.balance = state['balance']
+        bank.restore(state)
         logger.info(f"💰 Estado anterior carregado - Saldo: R$ {bank.balance:.2f}")
     else:
         logger.info(f"💰 Novo bankroll iniciado - Saldo: R$ {bank.balance:.2f}")
     
-    # Configurar agendamento
-    schedule.every(interval_minutes).minutes.do(job, bank)
-    logger.info(f"⏰ Agendamento configurado: a cada {interval_minutes} minutos")
+    if workers and workers > 1:
+        pipeline = ShardedRoundPipeline(bank, workers=workers, dry_run=dry_run, notify=notify)
+        logger.info(f"🧩 Rodadas particionadas por liga em {workers} processos")
+    else:
+        pipeline = RoundPipeline(bank, dry_run=dry_run, notify=notify)
+    if PREFETCH_ENABLED:
+        # busca da rodada seguinte em segundo plano, entregue fresca por fila limitada
+        pipeline.prefetcher = Prefetcher(pipeline.fetch_now)
+    
+    profiler = None
+    if profile:
+        profiler = RoundProfiler(PROFILE_DIR, keep=PROFILE_KEEP, top_n=PROFILE_TOP_N)
+        logger.info(f"🔬 Modo perfil: relatórios por rodada em {profiler.out_dir}/ (últimas {profiler.keep})")
+    
+    if trace:
+        tracing.configure(TRACE_FILE)
+        logger.info(f"🧵 Tracing ativo: spans em {TRACE_FILE}")
+    
+    # Configurar agendamento: cada job dorme exatamente até a próxima execução
+    scheduler = AsyncScheduler(stop_event=stop_event)
+    if adaptive:
+        calendar = KickoffCalendar()
+        scheduler.adaptive(calendar.next_delay, adaptive_job, bank, calendar, dry_run, pipeline, profiler,
+                           name='rodada')
+        logger.info("⏰ Agendamento adaptativo: rodadas densas antes dos inícios das partidas")
+    else:
+        scheduler.every(interval_minutes * 60, job, bank, dry_run, pipeline, interval_minutes * 60, profiler,
+                        name='rodada')
+        logger.info(f"⏰ Agendamento configurado: a cada {interval_minutes} minutos")
+    scheduler.every(HEALTH_CHECK_SECONDS, log_health_check, name='health', run_now=True)
+    
+    # Métricas: as séries da rodada são alimentadas por run_round; o resto é lido na coleta
+    metrics = None
+    if metrics_port:
+        register_bankroll(bank)
+        register_http_client(get_client)
+        register_scheduler(scheduler)
+        if pipeline.prefetcher is not None:
+            register_prefetcher(pipeline.prefetcher)
+        metrics = serve_metrics(metrics_port, METRICS_HOST)
     logger.info(f"🔧 Modo: {'DRY_RUN (teste)' if dry_run else 'SIMULAÇÃO'}")
     
     # Loop principal
     try:
         logger.info("🔄 Loop principal iniciado - Pressione Ctrl+C para parar")
-        while True:
-            schedule.run_pending()
-            time.sleep(5)
+        scheduler.run_forever()
     
     except KeyboardInterrupt:
         logger.warning("⚠️  Interrupção detectada (Ctrl+C)")
@@ -148,10 +262,50 @@ def main_loop(dry_run: bool = False, interval_minutes: int = 30):
     
     finally:
         # Salvar estado final
+        if metrics is not None:
+            metrics.close()
+        if pipeline.prefetcher is not None:
+            pipeline.prefetcher.close()
+            logger.info(f"📥 Prefetch: {pipeline.prefetcher.stats}")
+        if isinstance(pipeline, ShardedRoundPipeline):
+            pipeline.close()
+        # o histórico já é gravado no fim de cada rodada; aqui só o que sobrou no buffer
+        bank.close()
         save_state(bank.snapshot())
+        tracing.shutdown()
         log_shutdown()
 
 
+def replay_main(path: str, dry_run: bool = DRY_RUN, max_rounds: int = None, profile: bool = False,
+                trace: bool = False):
+    """
+    Backtest: roda o pipeline de produção sobre um histórico com relógio virtual
+    
+    Args:
+        path: CSV com partidas e placares (date, home_team, away_team, odds, home_goals, away_goals)
+        dry_run: Modo de teste
+        max_rounds: Limite de rodadas (dias) reproduzidas
+        profile: Perfila o replay inteiro como uma execução (um relatório por dia seria ruído)
+        trace: Exporta spans de cada rodada em config.TRACE_FILE
+    """
+    df = load_replay_dataset(path)
+    logger.info(f"⏪ Replay de {len(df)} partidas de {path}")
+    if trace:
+        tracing.configure(TRACE_FILE)
+    profiler = RoundProfiler(PROFILE_DIR, keep=PROFILE_KEEP, top_n=PROFILE_TOP_N) if profile else None
+    try:
+        with profiler.profile('replay') if profiler is not None else nullcontext():
+            report = replay(df, lambda bank, **kw: run_round(bank, dry_run, verbose=False, **kw),
+                            results_dir=RESULTS_DIR, max_rounds=max_rounds, dry_run=dry_run)
+    finally:
+        tracing.shutdown()
+    logger.info(f"⏪ {report.rounds} rodadas ({report.fixtures} partidas, {report.bets} apostas) em "
+                f"{report.elapsed:.2f}s - {report.rounds_per_sec:,.0f} rodadas/s")
+    logger.info(f"💰 Banca final: R$ {report.final_balance:.2f} (inicial R$ {report.initial:.2f}) | "
+                f"ROI {report.roi:+.1%} | acerto {report.win_rate:.1%} | drawdown máx. {report.max_drawdown:.1%}")
+    return report
+
+
 def main():
     """Função principal com argumentos de linha de comando"""
     parser = argparse.ArgumentParser(
@@ -162,6 +316,10 @@ Exemplos:
   python main.py --dry-run                    # Modo de teste
   python main.py --interval 60                # Intervalo de 60 minutos
   python main.py --dry-run --interval 15      # Teste com intervalo de 15 min
+  python main.py --adaptive                   # Rodadas densas perto dos inícios das partidas
+  python main.py --replay historico.csv       # Backtest rápido sobre partidas já jogadas
+  python main.py --dry-run --profile          # Perfil de tempo/memória de cada rodada em logs/profiles/
+  python main.py --dry-run --trace            # Spans das rodadas em logs/traces.jsonl
         """
     )
     
@@ -178,6 +336,51 @@ Exemplos:
         help='Intervalo em minutos entre rodadas (padrão: 30)'
     )
     
+    parser.add_argument(
+        '--adaptive',
+        action='store_true',
+        help='Agendar rodadas pelos inícios das partidas (ignora --interval)'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=ROUND_WORKERS,
+        help='Processos para rodadas particionadas por liga (padrão: config.ROUND_WORKERS)'
+    )
+    
+    parser.add_argument(
+        '--metrics-port',
+        type=int,
+        default=METRICS_PORT,
+        help='Porta do endpoint /metrics em formato Prometheus, 0 desliga (padrão: config.METRICS_PORT)'
+    )
+    
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Perfilar cada rodada (cProfile + tracemalloc) em config.PROFILE_DIR'
+    )
+    
+    parser.add_argument(
+        '--trace',
+        action='store_true',
+        help='Exportar spans das rodadas em config.TRACE_FILE (python tools/tracing.py converte p/ Chrome)'
+    )
+    
+    parser.add_argument(
+        '--replay',
+        metavar='CSV',
+        help='Reproduzir um histórico de partidas com resultados (backtest, sem agendamento)'
+    )
+    
+    parser.add_argument(
+        '--replay-rounds',
+        type=int,
+        default=None,
+        help='Limite de rodadas (dias) no replay'
+    )
+    
     parser.add_argument(
         '--version',
         action='version',
@@ -186,8 +389,15 @@ Exemplos:
     
     args = parser.parse_args()
     
+    if args.replay:
+        replay_main(args.replay, dry_run=args.dry_run or DRY_RUN, max_rounds=args.replay_rounds,
+                    profile=args.profile, trace=args.trace)
+        return
+    
     # Executar loop principal
-    main_loop(dry_run=args.dry_run or DRY_RUN, interval_minutes=args.interval)
+    main_loop(dry_run=args.dry_run or DRY_RUN, interval_minutes=args.interval, adaptive=args.adaptive,
+              workers=args.workers, metrics_port=args.metrics_port, profile=args.profile,
+              trace=args.trace)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,47 @@
+"""
+Configuração compartilhada dos testes
+Os módulos do projeto usam imports planos (trader/, tools/ e a raiz no sys.path), como main.py.
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+BASE_DIR = Path(__file__).parent.parent
+# os arquivos do loguru (tools/logger.py) vão para um diretório temporário, não para logs/ do repo
+os.environ.setdefault("ASSISTENTE_LOGS_DIR", tempfile.mkdtemp(prefix="assistente-logs-"))
+sys.path.insert(0, str(BASE_DIR))
+sys.path.insert(0, str(BASE_DIR / "trader"))
+sys.path.insert(0, str(BASE_DIR / "tools"))
+
+
+@pytest.fixture(autouse=True)
+def _workdir(tmp_path, monkeypatch):
+    """Cada teste roda num diretório temporário (results/ e state.json não vazam)"""
+    monkeypatch.chdir(tmp_path)
+
+
+@pytest.fixture
+def make_fixtures():
+    """Fábrica de DataFrames sintéticos de fixtures com o schema do CSV local"""
+    def factory(n, n_teams=40, seed=0):
+        rng = np.random.default_rng(seed)
+        teams = np.array([f"Team {i}" for i in range(n_teams)])
+        home = rng.integers(0, n_teams, size=n)
+        away = (home + rng.integers(1, n_teams, size=n)) % n_teams
+        return pd.DataFrame({
+            'date': pd.Timestamp('2025-01-01') + pd.to_timedelta(rng.integers(0, 30, size=n), unit='D'),
+            'home_team': teams[home],
+            'away_team': teams[away],
+            'home_odds': np.round(rng.uniform(1.2, 4.5, size=n), 2),
+            'draw_odds': np.round(rng.uniform(2.8, 4.2, size=n), 2),
+            'away_odds': np.round(rng.uniform(1.5, 7.0, size=n), 2),
+            'over25_odds': np.round(rng.uniform(1.5, 2.6, size=n), 2),
+            'under25_odds': np.round(rng.uniform(1.4, 2.5, size=n), 2),
+            'btts_odds': np.round(rng.uniform(1.5, 2.3, size=n), 2),
+        })
+    return factory
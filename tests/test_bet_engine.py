@@ -0,0 +1,59 @@
+"""Busca de múltiplas: branch-and-bound comparado com força bruta"""
+import itertools
+import math
+import random
+
+import pytest
+
+from bet_engine import optimize_accumulators
+
+
+def random_candidates(n, seed):
+    rng = random.Random(seed)
+    return [{'idx': rng.randrange(max(2, n // 2)), 'market': rng.choice(['1', 'X', '2', 'O2.5']),
+             'odd': round(rng.uniform(1.2, 4.0), 2), 'conf': round(rng.uniform(0.3, 0.9), 3)}
+            for _ in range(n)]
+
+
+def brute_force(cands, top_n, min_legs, max_legs, lo, hi):
+    """EVs das top-N múltiplas válidas (uma seleção por partida, odd total na janela)"""
+    evs = []
+    for r in range(min_legs, max_legs + 1):
+        for comb in itertools.combinations(cands, r):
+            if len({c['idx'] for c in comb}) < r:
+                continue
+            total = math.prod(c['odd'] for c in comb)
+            if lo <= total <= hi:
+                evs.append(math.prod(c['odd'] * c['conf'] for c in comb) - 1.0)
+    return sorted(evs, reverse=True)[:top_n]
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_matches_brute_force(seed):
+    cands = random_candidates(random.Random(seed).randint(3, 14), seed)
+    expected = brute_force(cands, 3, 3, 4, 5.0, 12.0)
+    accs = optimize_accumulators(cands, top_n=3, min_legs=3, max_legs=4, max_candidates=None)
+    assert [a['ev'] for a in accs] == pytest.approx(expected)
+    for acc in accs:
+        assert 5.0 - 1e-9 <= acc['total_odd'] <= 12.0 + 1e-9
+        assert len({s['idx'] for s in acc['selections']}) == len(acc['selections'])
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_candidate_cap_is_exact_below_limit(seed):
+    cands = random_candidates(30, seed)
+    exact = optimize_accumulators(cands, max_candidates=None)
+    capped = optimize_accumulators(cands, max_candidates=64)
+    assert [a['ev'] for a in capped] == pytest.approx([a['ev'] for a in exact])
+
+
+def test_candidate_cap_keeps_valid_accumulators():
+    cands = random_candidates(400, 7)
+    accs = optimize_accumulators(cands, top_n=3, max_candidates=32)
+    assert len(accs) == 3
+    for acc in accs:
+        assert 5.0 - 1e-9 <= acc['total_odd'] <= 12.0 + 1e-9
+
+
+def test_too_few_candidates():
+    assert optimize_accumulators(random_candidates(2, 0), min_legs=3) == []
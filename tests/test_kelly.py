@@ -0,0 +1,31 @@
+"""Kelly simultâneo: casos com solução fechada"""
+import numpy as np
+import pytest
+
+from kelly import kelly_fractions, joint_outcomes
+
+
+def single(p):
+    return np.array([[True], [False]]), np.array([p, 1.0 - p])
+
+
+def test_single_bet_closed_form():
+    # f* = p - (1 - p) / (odd - 1) = 0.6 - 0.4 / 1.0
+    patterns, weights = single(0.6)
+    assert kelly_fractions([2.0], patterns, weights)[0] == pytest.approx(0.2, abs=1e-6)
+
+
+def test_negative_edge_stakes_nothing():
+    patterns, weights = single(0.4)
+    assert kelly_fractions([2.0], patterns, weights)[0] == pytest.approx(0.0, abs=1e-9)
+
+
+def test_independent_bets_share_the_bankroll():
+    accs = [{'selections': [{'idx': i, 'market': '1', 'conf': 0.6}], 'total_odd': 2.0, 'prob': 0.6}
+            for i in range(2)]
+    patterns, weights = joint_outcomes(accs)
+    assert weights.sum() == pytest.approx(1.0)
+    f = kelly_fractions([2.0, 2.0], patterns, weights)
+    # apostando juntas, cada uma fica abaixo do Kelly isolado (0.2) e de forma simétrica
+    assert f[0] == pytest.approx(f[1], abs=1e-6)
+    assert 0.0 < f[0] < 0.2
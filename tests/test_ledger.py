@@ -0,0 +1,150 @@
+"""Ledgers do histórico: gravação em lotes e leitura de volta"""
+import subprocess
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from ledger import CsvLedger, HistoryArchive, SegmentedLedger, SqliteLedger, bet_pnl, _open_ledgers
+
+
+def bet(i, result='win', fixture=None):
+    sels = [{'fixture_id': fixture if fixture is not None else 100 + i, 'market': '1', 'odd': 2.0, 'conf': 0.6}]
+    return (f"2025-01-{1 + i % 28:02d} 12:00:00", 'multiple', {'selections': sels, 'total_odd': 2.0},
+            10.0, 2.0, result, 1000.0 + i)
+
+
+def test_sqlite_round_trip(tmp_path):
+    path = str(tmp_path / 'ledger.db')
+    ledger = SqliteLedger(path, buffer_rows=3, flush_seconds=float('inf'))
+    rows = [bet(i, 'win' if i % 2 else 'lose') for i in range(5)] + [bet(5, 'void', fixture=42)]
+    for row in rows:
+        ledger.append(*row)
+    assert ledger.pending == 0  # 6 linhas = dois lotes de 3
+    ledger.close()
+
+    reopened = SqliteLedger(path)
+    try:
+        tail = reopened.tail(10)
+        assert list(tail['timestamp']) == [r[0] for r in rows]
+        assert list(tail['result']) == [r[5] for r in rows]
+        assert list(tail['balance']) == [r[6] for r in rows]
+        pnl = reopened.pnl_by_type()
+        assert pnl['pnl'].iloc[0] == pytest.approx(sum(bet_pnl(r[3], r[4], r[5]) for r in rows))
+        open_bets = reopened.open_bets()
+        assert list(open_bets['result']) == ['void']
+        assert list(reopened.bets_for_fixture(42)['market']) == ['1']
+        assert reopened.balance_at('2025-01-03 23:59:59') == 1002.0
+    finally:
+        reopened.close()
+
+
+def test_sqlite_import_csv(tmp_path):
+    csv_path = str(tmp_path / 'history.csv')
+    csv_ledger = CsvLedger(csv_path)
+    for i in range(4):
+        csv_ledger.append(*bet(i))
+    csv_ledger.close()
+
+    ledger = SqliteLedger(str(tmp_path / 'ledger.db'))
+    try:
+        assert ledger.import_csv(csv_path) == 4
+        tail = ledger.tail(4)
+        assert list(tail['timestamp']) == [bet(i)[0] for i in range(4)]
+        assert len(ledger.query('SELECT * FROM selections')) == 4
+    finally:
+        ledger.close()
+
+
+def segmented_rows(days, per_day):
+    return [(f"2025-03-{d:02d} {h:02d}:00:00", 'multiple', {'n': d * 100 + h}, 5.0, 3.0, 'lose', 900.0 - h)
+            for d in range(1, days + 1) for h in range(per_day)]
+
+
+def test_segmented_daily_roll(tmp_path):
+    path = str(tmp_path / 'history')
+    ledger = SegmentedLedger(path, buffer_rows=4, flush_seconds=float('inf'))
+    rows = segmented_rows(3, 5)
+    for row in rows:
+        ledger.append(*row)
+    ledger.close()
+
+    archive = HistoryArchive(path)
+    assert len(archive) == len(rows)
+    assert [seg['rows'] for seg in archive.segments] == [5, 5, 5]
+    # só o segmento quente (o do último dia) fica sem compressão
+    assert [seg['compressed'] for seg in archive.segments] == [True, True, False]
+    assert archive.segments[0]['name'].endswith('.csv.gz')
+    assert list(archive.read_all()['timestamp']) == [r[0] for r in rows]
+
+
+def test_segmented_size_roll(tmp_path):
+    ledger = SegmentedLedger(str(tmp_path / 'history'), buffer_rows=1, roll='size', max_bytes=200)
+    for row in segmented_rows(1, 20):
+        ledger.append(*row)
+    ledger.close()
+    assert len(ledger.segments) > 1
+    assert all(seg['compressed'] for seg in ledger.segments[:-1])
+    assert len(ledger) == 20
+
+
+def test_segmented_tail_and_since(tmp_path):
+    ledger = SegmentedLedger(str(tmp_path / 'history'), buffer_rows=1000, flush_seconds=float('inf'))
+    rows = segmented_rows(4, 6)
+    for row in rows:
+        ledger.append(*row)
+    try:
+        # tail/since gravam o buffer pendente antes de ler
+        assert list(ledger.tail(8)['timestamp']) == [r[0] for r in rows[-8:]]
+        assert list(ledger.tail(100)['timestamp']) == [r[0] for r in rows]
+        since = ledger.since('2025-03-02 03:00:00', until='2025-03-03 01:00:00')
+        assert list(since['timestamp']) == [r[0] for r in rows if '2025-03-02 03' <= r[0] <= '2025-03-03 01:00:00']
+        assert ledger.since('2025-04-01').empty
+    finally:
+        ledger.close()
+
+
+def test_segmented_adopts_legacy_csv(tmp_path):
+    legacy = str(tmp_path / 'history.csv')
+    csv_ledger = CsvLedger(legacy)
+    for i in range(3):
+        csv_ledger.append(*bet(i))
+    csv_ledger.close()
+
+    ledger = SegmentedLedger(str(tmp_path / 'history'), legacy_csv=legacy)
+    ledger.close()
+    assert not (tmp_path / 'history.csv').exists()
+    assert list(ledger.tail(3)['timestamp']) == [bet(i)[0] for i in range(3)]
+
+
+@pytest.mark.parametrize('cls', [CsvLedger, SegmentedLedger, SqliteLedger])
+@pytest.mark.parametrize('kwargs', [{'durability': 'disk'}, {'buffer_rows': 0}, {'flush_seconds': -1}])
+def test_invalid_buffer_settings(tmp_path, cls, kwargs):
+    with pytest.raises(ValueError):
+        cls(str(tmp_path / 'ledger'), **kwargs)
+    assert not (tmp_path / 'ledger').exists()
+
+
+def test_unclosed_ledger_is_written_at_exit(tmp_path):
+    script = ("import sys, gc; sys.path.insert(0, sys.argv[1])\n"
+              "from ledger import CsvLedger\n"
+              "l = CsvLedger(sys.argv[2], flush_seconds=1e9)\n"
+              "for i in range(5):\n"
+              "    l.append(f'2025-01-0{i + 1}', 'multiple', {}, 1.0, 2.0, 'win', 100.0)\n"
+              "del l\n"
+              "gc.collect()\n")
+    path = tmp_path / 'history.csv'
+    subprocess.run([sys.executable, '-c', script, str(Path(__file__).parent.parent / 'trader'), str(path)],
+                   check=True)
+    assert len(pd.read_csv(path)) == 5
+
+
+def test_closed_ledger_leaves_registry(tmp_path):
+    ledger = CsvLedger(str(tmp_path / 'history.csv'))
+    assert ledger in _open_ledgers
+    ledger.close()
+    assert ledger not in _open_ledgers
+    ledger.append(*bet(0))  # gravar depois de fechar volta a registrar
+    assert ledger in _open_ledgers
+    ledger.close()
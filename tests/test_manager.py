@@ -0,0 +1,116 @@
+"""BankrollManager sob concorrência: reservas e liquidações de várias threads/processos"""
+import multiprocessing
+import os
+import random
+import sys
+import threading
+
+import pandas as pd
+import pytest
+
+from ledger import CsvLedger
+from manager import BankrollManager, serve_bankroll
+
+N_THREADS = 8
+BETS_PER_THREAD = 200
+
+
+@pytest.fixture
+def contention():
+    """Troca de thread a cada microssegundo: mais chances de intercalar as seções críticas"""
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def _pnl(stake, odd, result):
+    return round(stake * (odd - 1.0), 2) if result == 'win' else -stake if result == 'lose' else 0.0
+
+
+def _worker(bank, seed, pnls, barrier=None):
+    """Reserva e liquida BETS_PER_THREAD apostas; guarda o P&L de cada liquidação."""
+    rng = random.Random(seed)
+    if barrier is not None:
+        barrier.wait()
+    for _ in range(BETS_PER_THREAD):
+        stake = rng.choice((1.0, 2.5, 5.0))
+        rid = bank.reserve(stake)
+        if rid is None:
+            continue
+        odd = rng.choice((1.5, 2.0, 3.25))
+        result = rng.choice(('win', 'lose', 'void'))
+        assert bank.settle(rid, 'multiple', {'seed': seed}, odd, result) == stake
+        pnls.append(_pnl(stake, odd, result))
+
+
+def test_concurrent_reserve_settle(tmp_path, contention):
+    bank = BankrollManager(10_000.0, ledger=CsvLedger(str(tmp_path / 'history.csv')))
+    pnls = [[] for _ in range(N_THREADS)]
+    barrier = threading.Barrier(N_THREADS)
+    threads = [threading.Thread(target=_worker, args=(bank, i, pnls[i], barrier)) for i in range(N_THREADS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    bank.close()
+
+    settled = [p for ps in pnls for p in ps]
+    assert len(settled) == N_THREADS * BETS_PER_THREAD  # saldo de sobra: nenhuma reserva recusada
+    assert bank.balance == pytest.approx(10_000.0 + sum(settled), abs=1e-6)
+    assert bank.reserved == 0
+    snap = bank.snapshot()
+    assert snap['reserved'] == 0 and snap['stats']['bets'] == len(settled)
+    ledger = pd.read_csv(tmp_path / 'history.csv')
+    assert len(ledger) == len(settled)
+    assert ledger['balance'].iloc[-1] == pytest.approx(bank.balance)
+
+
+def test_reserve_never_overcommits(tmp_path, contention):
+    bank = BankrollManager(100.0, ledger=CsvLedger(str(tmp_path / 'history.csv')))
+    rids = []
+    threads = [threading.Thread(target=lambda: rids.extend(bank.reserve(7.0) for _ in range(10)))
+               for _ in range(N_THREADS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    granted = [r for r in rids if r is not None]
+    assert len(granted) == 14 and bank.reserved == pytest.approx(98.0)
+    assert bank.available == pytest.approx(2.0)
+    for rid in granted:
+        bank.release(rid)
+    assert bank.reserved == 0 and bank.balance == 100.0
+    bank.close()
+
+
+def _process_worker(bank, seed, queue):
+    pnls = []
+    _worker(bank, seed, pnls)
+    queue.put(pnls)
+
+
+def test_bankroll_server_proxy(tmp_path):
+    os.makedirs('results', exist_ok=True)  # ledger padrão do servidor fica em results/ (cwd do teste)
+    server, bank = serve_bankroll(10_000.0)
+    try:
+        rid = bank.reserve(10.0)
+        assert bank.settle(rid, 'multiple', {}, 2.0, 'win') == 10.0
+        assert bank.snapshot()['balance'] == pytest.approx(10_010.0)
+
+        ctx = multiprocessing.get_context()
+        queue = ctx.Queue()
+        procs = [ctx.Process(target=_process_worker, args=(bank, i, queue)) for i in range(2)]
+        for p in procs:
+            p.start()
+        settled = [pnl for _ in procs for pnl in queue.get(timeout=60)]
+        for p in procs:
+            p.join(timeout=60)
+            assert p.exitcode == 0
+        snap = bank.snapshot()
+        assert snap['balance'] == pytest.approx(10_010.0 + sum(settled), abs=1e-6)
+        assert snap['reserved'] == 0
+        assert snap['stats']['bets'] == len(settled) + 1
+        bank.close()
+    finally:
+        server.shutdown()
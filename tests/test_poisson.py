@@ -0,0 +1,67 @@
+"""Modelo Poisson de placares: pmf, matrizes normalizadas, mercados e grade quantizada"""
+from math import exp, factorial
+
+import numpy as np
+import pytest
+
+from poisson import (MARKETS, MAX_GOALS, MAX_MEAN, GRID_STEP, ProbabilityGrid, compute_markets,
+                     poisson_markets, poisson_pmf_matrix, score_matrices)
+
+MEANS = np.array([0.2, 0.9, 1.35, 2.4, 3.7])
+
+
+def test_pmf_matches_closed_form():
+    pmf = poisson_pmf_matrix(MEANS)
+    assert pmf.shape == (len(MEANS), MAX_GOALS + 1)
+    expected = [[exp(-m) * m ** k / factorial(k) for k in range(MAX_GOALS + 1)] for m in MEANS]
+    np.testing.assert_allclose(pmf, expected, rtol=1e-12, atol=1e-15)
+    # truncamento em MAX_GOALS: a cauda acima é desprezível até MAX_MEAN
+    np.testing.assert_allclose(pmf.sum(axis=1), 1.0, atol=1e-3)
+    assert 1.0 - poisson_pmf_matrix([MAX_MEAN]).sum() < 0.0025
+
+
+@pytest.mark.parametrize('rho', [0.0, -0.1])
+def test_score_matrices_are_normalised(rho):
+    m = score_matrices(MEANS, MEANS[::-1], rho)
+    assert m.shape == (len(MEANS), MAX_GOALS + 1, MAX_GOALS + 1)
+    assert (m >= 0).all()
+    np.testing.assert_allclose(m.sum(axis=(1, 2)), 1.0, atol=1e-12)
+    if not rho:
+        # sem Dixon-Coles a matriz é o produto externo das duas pmfs (renormalizado)
+        outer = poisson_pmf_matrix(MEANS)[:, :, None] * poisson_pmf_matrix(MEANS[::-1])[:, None, :]
+        np.testing.assert_allclose(m, outer / outer.sum(axis=(1, 2), keepdims=True), rtol=1e-12)
+
+
+def test_markets_are_consistent():
+    p = dict(zip(MARKETS, compute_markets(MEANS, MEANS[::-1]).T))
+    np.testing.assert_allclose(p['p_home'] + p['p_draw'] + p['p_away'], 1.0, atol=1e-12)
+    np.testing.assert_allclose(p['p_over25'] + p['p_under25'], 1.0, atol=1e-12)
+    # mandante mais forte ganha mais
+    assert p['p_home'][-1] > p['p_away'][-1]
+    assert p['p_home'][0] < p['p_away'][0]
+    # ambas marcam sem Dixon-Coles: (1 - P(casa = 0)) * (1 - P(fora = 0))
+    np.testing.assert_allclose(p['p_btts'], (1 - np.exp(-MEANS)) * (1 - np.exp(-MEANS[::-1])), atol=1e-6)
+
+
+def test_grid_lookup_within_tolerance():
+    rng = np.random.default_rng(0)
+    hm, am = rng.uniform(0.05, MAX_MEAN, 2000), rng.uniform(0.05, MAX_MEAN, 2000)
+    grid = ProbabilityGrid()
+    cold = grid.lookup(hm, am)
+    exact = compute_markets(hm, am)
+    # médias arredondadas para GRID_STEP: meio passo em cada média move as probabilidades < GRID_STEP / 2
+    assert np.abs(cold - exact).max() < GRID_STEP / 2
+    np.testing.assert_allclose(cold[:, :3].sum(axis=1), 1.0, atol=1e-12)
+    # a segunda busca vem toda da grade (um acerto por par distinto), com os mesmos valores
+    misses = grid.misses
+    np.testing.assert_array_equal(grid.lookup(hm, am), cold)
+    assert grid.misses == misses and grid.hits == misses == len(grid)
+
+
+def test_poisson_markets_with_and_without_cache():
+    hm, am = np.array([1.234, 0.5]), np.array([0.987, 2.0])
+    np.testing.assert_allclose(poisson_markets(hm, am), poisson_markets(hm, am, cache=False),
+                               atol=GRID_STEP / 2)
+    # pontos sobre a grade coincidem com o cálculo direto
+    on_grid = np.array([1.25, 0.5])
+    np.testing.assert_allclose(poisson_markets(on_grid, on_grid), compute_markets(on_grid, on_grid), atol=1e-12)
@@ -0,0 +1,65 @@
+"""TeamRatings: persistência (versão e partidas vistas) e janela de resultados lembrados"""
+import json
+
+import numpy as np
+import pandas as pd
+
+from ratings import TeamRatings
+
+
+def results(days, start='2025-03-01', seed=0):
+    """Uma rodada de 4 partidas por dia, com placares"""
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp(start) + pd.to_timedelta(np.repeat(np.arange(days), 4), unit='D')
+    teams = np.array([f"Team {i}" for i in range(8)])
+    return pd.DataFrame({
+        'date': dates,
+        'home_team': np.tile(teams[:4], days),
+        'away_team': np.tile(teams[4:], days),
+        'home_goals': rng.poisson(1.5, 4 * days),
+        'away_goals': rng.poisson(1.1, 4 * days),
+    })
+
+
+def test_save_load_roundtrip(tmp_path):
+    ratings = TeamRatings()
+    df = results(10)
+    assert ratings.update_from_frame(df) == 40
+    path = str(tmp_path / 'ratings.npz')
+    ratings.save(path)
+
+    loaded = TeamRatings.load(path)
+    assert loaded.version == ratings.version == 40
+    np.testing.assert_array_equal(loaded.attack, ratings.attack)
+    assert loaded.names == ratings.names
+    # o mesmo arquivo relido não reingere nada
+    assert loaded.update_from_frame(df) == 0
+    assert loaded.version == 40
+
+
+def test_seen_window_is_pruned():
+    ratings = TeamRatings(seen_days=5)
+    df = results(30)
+    assert ratings.update_from_frame(df) == 120
+    assert sorted(ratings._seen) == [d.strftime('%Y-%m-%d') for d in pd.date_range('2025-03-25', '2025-03-30')]
+    # resultados mais antigos que a janela não voltam a entrar, mesmo esquecidos
+    assert ratings.update_from_frame(df) == 0
+    # e resultados novos continuam entrando, deslizando a janela
+    assert ratings.update_from_frame(results(2, start='2025-03-31', seed=1)) == 8
+    assert min(ratings._seen) == '2025-03-27'
+
+
+def test_load_old_format(tmp_path):
+    ratings = TeamRatings()
+    df = results(3)
+    ratings.update_from_frame(df)
+    path = str(tmp_path / 'ratings.npz')
+    # arquivo salvo antes da versão e do mapa por dia: 'seen' era uma lista de 'data|casa|fora'
+    keys = [f"{d}|{h}|{a}" for d, pairs in ratings._seen.items() for p in pairs for h, a in [p.split('|')]]
+    np.savez(path, attack=ratings.attack, defence=ratings.defence, games=ratings.games,
+             globals=np.array([ratings.base, ratings.home_adv]),
+             meta=np.array(json.dumps({'names': ratings.names, 'seen': keys})))
+    loaded = TeamRatings.load(path)
+    assert loaded.version == 0
+    assert loaded._seen == ratings._seen
+    assert loaded.update_from_frame(df) == 0
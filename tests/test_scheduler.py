@@ -0,0 +1,59 @@
+"""Agendador asyncio: execução dos jobs e parada pelo stop_event"""
+import threading
+import time
+
+from scheduler import AsyncScheduler
+
+
+def run_in_thread(scheduler):
+    thread = threading.Thread(target=scheduler.run_forever, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_stops_promptly_on_stop_event():
+    stop = threading.Event()
+    scheduler = AsyncScheduler(stop_event=stop)
+    ran = threading.Event()
+    scheduler.every(3600, ran.set, name='hora', run_now=True)
+    thread = run_in_thread(scheduler)
+    assert ran.wait(2.0)
+    t0 = time.monotonic()
+    stop.set()
+    thread.join(2.0)
+    assert not thread.is_alive()
+    assert time.monotonic() - t0 < 0.2  # acorda na hora, sem esperar o intervalo de 1h nem polling
+
+
+def test_stop_event_already_set():
+    stop = threading.Event()
+    stop.set()
+    scheduler = AsyncScheduler(stop_event=stop)
+    job = scheduler.every(0.01, lambda: None, run_now=True)
+    scheduler.run_forever()
+    assert job.runs == 0
+
+
+def test_runs_jobs_at_their_cadence():
+    stop = threading.Event()
+    scheduler = AsyncScheduler(stop_event=stop)
+    fast = scheduler.every(0.02, lambda: None, name='rápido')
+    slow = scheduler.every(10, lambda: None, name='lento')
+    thread = run_in_thread(scheduler)
+    time.sleep(0.3)
+    stop.set()
+    thread.join(2.0)
+    assert not thread.is_alive()
+    assert fast.runs >= 3
+    assert slow.runs == 0
+
+
+def test_failing_job_keeps_running():
+    stop = threading.Event()
+    scheduler = AsyncScheduler(stop_event=stop)
+    job = scheduler.every(0.02, lambda: 1 / 0, name='falha', run_now=True)
+    thread = run_in_thread(scheduler)
+    time.sleep(0.2)
+    stop.set()
+    thread.join(2.0)
+    assert job.errors == job.runs >= 2
@@ -0,0 +1,492 @@
+#!/usr/bin/env python3
+"""
+Benchmarks simples dos componentes críticos do Assistente-be
+Uso: python tools/bench.py [enrich] [--sizes 1000 100000 1000000]
+"""
+import argparse
+import hashlib
+import json
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+sys.path.insert(0, str(BASE_DIR / "trader"))
+sys.path.insert(0, str(BASE_DIR / "tools"))
+
+from analyzer import enrich_with_probs
+from poisson import compute_markets, ProbabilityGrid, get_grid
+from http_client import HttpClient
+from bet_engine import scan_value_bets, optimize_accumulators
+from fixtures_cache import load_fixtures_columnar
+from simulator import simulate_accumulators
+from ledger import CsvLedger, SqliteLedger, SegmentedLedger, bet_pnl
+from manager import BankrollManager, serve_bankroll
+from replay import replay
+from sharding import ShardedRoundPipeline
+from pipeline import RoundPipeline
+from ratings import TeamRatings
+from metrics import observe_round, REGISTRY
+
+
+def make_fixtures(n: int, n_teams: int = 400, seed: int = 42) -> pd.DataFrame:
+    """Gera um DataFrame sintético de fixtures com o mesmo schema do CSV local"""
+    rng = np.random.default_rng(seed)
+    teams = np.array([f"Team {i}" for i in range(n_teams)])
+    home = rng.integers(0, n_teams, size=n)
+    away = (home + rng.integers(1, n_teams, size=n)) % n_teams
+    return pd.DataFrame({
+        'date': pd.Timestamp('2025-01-01') + pd.to_timedelta(rng.integers(0, 300, size=n), unit='D'),
+        'home_team': teams[home],
+        'away_team': teams[away],
+        'home_odds': np.round(rng.uniform(1.2, 4.5, size=n), 2),
+        'draw_odds': np.round(rng.uniform(2.8, 4.2, size=n), 2),
+        'away_odds': np.round(rng.uniform(1.5, 7.0, size=n), 2),
+        'over25_odds': np.round(rng.uniform(1.5, 2.6, size=n), 2),
+        'under25_odds': np.round(rng.uniform(1.4, 2.5, size=n), 2),
+        'btts_odds': np.round(rng.uniform(1.5, 2.3, size=n), 2),
+    })
+
+
+def make_ratings(n_teams: int = 400, n_games: int = 20_000, seed: int = 1) -> TeamRatings:
+    """Ratings treinados num histórico sintético: ataque/defesa variados por time, como em produção
+    (com ratings vazios todas as partidas teriam as mesmas médias e a grade acertaria sempre)"""
+    rng = np.random.default_rng(seed)
+    hist = make_fixtures(n_games, n_teams=n_teams, seed=seed)
+    hist['home_goals'] = rng.poisson(1.5, len(hist))
+    hist['away_goals'] = rng.poisson(1.1, len(hist))
+    ratings = TeamRatings()
+    ratings.update_from_frame(hist)
+    return ratings
+
+
+def _timeit(fn, repeat: int = 3) -> float:
+    """Retorna o melhor tempo (s) entre `repeat` execuções"""
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def bench_enrich(sizes):
+    """Throughput de enrich_with_probs (fixtures/s) para cada tamanho, com ratings treinados.
+    'pares distintos' = pares de médias quantizados que a grade fria precisou calcular"""
+    ratings = make_ratings()
+    grid = get_grid()
+    print(f"{'fixtures':>10} | {'tempo fria (s)':>14} | {'tempo (s)':>10} | {'fixtures/s':>14} | pares distintos")
+    for n in sizes:
+        df = make_fixtures(n)
+        grid.clear()
+        cold = _timeit(lambda: enrich_with_probs(df, ratings=ratings), repeat=1)
+        distinct = grid.misses
+        elapsed = _timeit(lambda: enrich_with_probs(df, ratings=ratings))
+        print(f"{n:>10} | {cold:>14.4f} | {elapsed:>10.4f} | {n / elapsed:>14,.0f} | {distinct:,} ({distinct / n:.0%})")
+
+
+def bench_poisson(sizes):
+    """Kernel Poisson sem cache vs. grade quantizada (fria e quente)"""
+    print(f"{'pares':>10} | {'sem cache':>10} | {'grade fria':>10} | {'grade quente':>12}")
+    rng = np.random.default_rng(7)
+    for n in sizes:
+        hm = rng.uniform(0.8, 1.8, size=n)
+        am = rng.uniform(0.6, 1.4, size=n)
+        raw = _timeit(lambda: compute_markets(hm, am), repeat=1)
+        grid = ProbabilityGrid()
+        cold = _timeit(lambda: grid.lookup(hm, am), repeat=1)
+        warm = _timeit(lambda: grid.lookup(hm, am))
+        print(f"{n:>10} | {raw:>10.4f} | {cold:>10.4f} | {warm:>12.4f}")
+
+
+class _FixturesHandler(BaseHTTPRequestHandler):
+    """Servidor local que imita a API-Football: JSON grande com ETag e suporte a 304"""
+    body = b''
+    etag = ''
+
+    def do_GET(self):
+        if self.headers.get('If-None-Match') == self.etag:
+            self.send_response(304)
+            self.send_header('ETag', self.etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.send_header('ETag', self.etag)
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+def bench_http(sizes):
+    """Cliente HTTP com cache vs. requests.get simples contra um servidor local"""
+    import requests
+    n_fixtures = min(sizes)
+    fixtures = [{'fixture': {'date': '2025-01-01T15:00:00+00:00'},
+                 'teams': {'home': {'name': f'Home {i}'}, 'away': {'name': f'Away {i}'}}}
+                for i in range(n_fixtures)]
+    _FixturesHandler.body = json.dumps({'response': fixtures}).encode('utf-8')
+    _FixturesHandler.etag = '"' + hashlib.sha1(_FixturesHandler.body).hexdigest() + '"'
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _FixturesHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_port}/fixtures?live=all'
+    n = 100
+    try:
+        t0 = time.perf_counter()
+        for _ in range(n):
+            requests.get(url, timeout=5).json()
+        plain = (time.perf_counter() - t0) / n
+        with tempfile.TemporaryDirectory() as tmp:
+            client = HttpClient(cache_dir=tmp, ttl=0)  # ttl=0: toda chamada revalida (pior caso)
+            for _ in range(n):
+                client.get_json(url)
+            revalidate = client.stats()
+            client = HttpClient(cache_dir=tmp, ttl=60)
+            for _ in range(n):
+                client.get_json(url)
+            fresh = client.stats()
+    finally:
+        server.shutdown()
+    print(f"{n_fixtures} fixtures por resposta ({len(_FixturesHandler.body) / 1024:.0f} KiB), {n} requisições")
+    print(f"requests.get sem sessão: {plain * 1000:.3f} ms/req")
+    print(f"revalidação (ttl=0):    hit_rate={revalidate['hit_rate']:.2%} latência={revalidate['latency_ms']}")
+    print(f"dentro do TTL:          hit_rate={fresh['hit_rate']:.2%} latência={fresh['latency_ms']}")
+
+
+def bench_fixtures(sizes):
+    """read_csv vs. cache colunar com mmap (build inicial e cargas seguintes)"""
+    print(f"{'fixtures':>10} | {'read_csv (s)':>12} | {'build (s)':>9} | {'mmap (s)':>9} | "
+          f"{'MiB csv':>8} | {'MiB mmap':>8}")
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = str(Path(tmp) / 'fixtures.csv')
+            make_fixtures(n).to_csv(csv_path, index=False)
+            df_csv = None
+
+            def _read():
+                nonlocal df_csv
+                df_csv = pd.read_csv(csv_path, parse_dates=['date'])
+            csv_t = _timeit(_read, repeat=1)
+            build_t = _timeit(lambda: load_fixtures_columnar(csv_path), repeat=1)
+            warm_t = _timeit(lambda: load_fixtures_columnar(csv_path))
+            df_mm = load_fixtures_columnar(csv_path)
+            # memória residente aproximada: colunas mmap não contam (páginas do page cache)
+            csv_mb = df_csv.memory_usage(deep=True).sum() / 2**20
+            mm_mb = sum(df_mm[c].cat.categories.memory_usage(deep=True) / 2**20
+                        for c in df_mm if isinstance(df_mm[c].dtype, pd.CategoricalDtype))
+            print(f"{n:>10} | {csv_t:>12.4f} | {build_t:>9.4f} | {warm_t:>9.4f} | {csv_mb:>8.1f} | {mm_mb:>8.2f}")
+
+
+def bench_scan(sizes):
+    """Varredura vetorizada de value bets em todos os mercados"""
+    print(f"{'fixtures':>10} | {'mercados':>8} | {'tempo (ms)':>10} | {'picks':>8}")
+    rng = np.random.default_rng(3)
+    for n in sizes:
+        df = make_fixtures(n)
+        # probabilidades sintéticas próximas das implícitas para gerar um volume realista de picks
+        for p_col, o_col in (('p_home', 'home_odds'), ('p_draw', 'draw_odds'), ('p_away', 'away_odds'),
+                             ('p_over25', 'over25_odds'), ('p_under25', 'under25_odds'), ('p_btts', 'btts_odds')):
+            df[p_col] = np.clip(1 / df[o_col] + rng.normal(0, 0.08, size=n), 0.01, 0.99)
+        picks = scan_value_bets(df, conf_threshold=0.5)
+        elapsed = _timeit(lambda: scan_value_bets(df, conf_threshold=0.5))
+        print(f"{n:>10} | {6:>8} | {elapsed * 1000:>10.2f} | {len(picks):>8}")
+
+
+def bench_accum(sizes):
+    """Branch-and-bound de múltiplas (top-3, 3-4 seleções, odd total 5-12): top-K vs. busca exata"""
+    print(f"{'candidatos':>10} | {'top-K (ms)':>10} | {'exata (ms)':>10} | melhores EV (top-K / exata)")
+    rng = np.random.default_rng(5)
+    for n in (50, 100, 300, 500, 1000, 4000):
+        odds = rng.uniform(1.2, 3.5, size=n)
+        conf = np.minimum(0.99, 1 / odds + rng.uniform(0.0, 0.2, size=n))
+        cands = [{'idx': i // 2, 'market': '1', 'odd': float(o), 'conf': float(p)}
+                 for i, (o, p) in enumerate(zip(odds, conf))]
+        accs = optimize_accumulators(cands)
+        elapsed = _timeit(lambda: optimize_accumulators(cands))
+        evs = [round(a['ev'], 3) for a in accs]
+        if n <= 500:  # a busca exata passa de segundos acima disso
+            exact = optimize_accumulators(cands, max_candidates=None)
+            t_exact = _timeit(lambda: optimize_accumulators(cands, max_candidates=None), repeat=1)
+            print(f"{n:>10} | {elapsed * 1000:>10.2f} | {t_exact * 1000:>10.2f} | "
+                  f"{evs} / {[round(a['ev'], 3) for a in exact]}")
+        else:
+            print(f"{n:>10} | {elapsed * 1000:>10.2f} | {'-':>10} | {evs}")
+
+
+def bench_simulate(sizes):
+    """Cenários Monte Carlo liquidados por segundo (3 múltiplas de 4 seleções)"""
+    rng = np.random.default_rng(11)
+    accs = []
+    for a in range(3):
+        sels = [{'idx': a * 4 + k, 'market': '1', 'odd': float(o), 'conf': float(min(0.95, 1.1 / o))}
+                for k, o in enumerate(rng.uniform(1.4, 2.0, size=4))]
+        accs.append({'selections': sels, 'total_odd': float(np.prod([s['odd'] for s in sels]))})
+    print(f"{'cenários':>10} | {'rho':>4} | {'tempo (s)':>9} | {'cenários/s':>12} | EV rodada")
+    for n in sizes:
+        for rho in (0.0, 0.3):
+            rep = simulate_accumulators(accs, n_sims=n, rho=rho, seed=1)
+            print(f"{n:>10} | {rho:>4} | {rep.elapsed:>9.4f} | {rep.sims_per_sec:>12,.0f} | {rep.round['ev']:+.4f}")
+
+
+def bench_ledger(sizes):
+    """Gravação do histórico: abrir/escrever/fechar por aposta vs. CsvLedger em lotes"""
+    import csv
+    details = {'selections': [{'idx': i, 'market': '1', 'odd': 1.85, 'conf': 0.62} for i in range(4)],
+               'total_odd': 11.7}
+    print(f"{'apostas':>10} | {'modo':>18} | {'tempo (s)':>9} | {'apostas/s':>12}")
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = str(Path(tmp) / 'legacy.csv')
+            if n <= 100_000:
+                t0 = time.perf_counter()
+                for _ in range(n):
+                    with open(path, 'a', newline='', encoding='utf-8') as f:
+                        csv.writer(f).writerow(['2025-01-01 00:00:00', 'multiple',
+                                                json.dumps(details, ensure_ascii=False), 10.0, 11.7, 'void', 1000.0])
+                elapsed = time.perf_counter() - t0
+                print(f"{n:>10} | {'abre/fecha':>18} | {elapsed:>9.3f} | {n / elapsed:>12,.0f}")
+            for durability in ('none', 'flush', 'fsync'):
+                ledger = CsvLedger(str(Path(tmp) / f'{durability}.csv'), durability=durability)
+                t0 = time.perf_counter()
+                for _ in range(n):
+                    ledger.append('2025-01-01 00:00:00', 'multiple', details, 10.0, 11.7, 'void', 1000.0)
+                ledger.close()
+                elapsed = time.perf_counter() - t0
+                print(f"{n:>10} | {'lotes/' + durability:>18} | {elapsed:>9.3f} | {n / elapsed:>12,.0f}")
+
+
+def bench_ledger_sql(sizes):
+    """Consultas ao histórico: varrer o history.csv inteiro vs. SqliteLedger indexado"""
+    rng = np.random.default_rng(0)
+    markets = np.array(['1', 'X', '2', 'O2.5', 'U2.5', 'BTTS'])
+    print(f"{'apostas':>10} | {'consulta':>16} | {'csv (s)':>9} | {'sqlite (s)':>10}")
+    for n in [n for n in sizes if n <= 200_000]:  # a geração do histórico domina acima disso
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = str(Path(tmp) / 'history.csv')
+            ledger = CsvLedger(csv_path, durability='none')
+            results = rng.choice(['win', 'lose', 'void'], size=n, p=[0.2, 0.7, 0.1])
+            for i in range(n):
+                sels = [{'idx': int(rng.integers(0, n)), 'market': str(m), 'odd': 1.8, 'conf': 0.6}
+                        for m in rng.choice(markets, size=3)]
+                ts = str(pd.Timestamp('2025-01-01') + pd.Timedelta(minutes=i))
+                ledger.append(ts, 'multiple', {'selections': sels, 'total_odd': 5.8}, 10.0, 5.8, results[i], 1000.0)
+            ledger.close()
+            t0 = time.perf_counter()
+            db = SqliteLedger(str(Path(tmp) / 'ledger.db'), durability='none')
+            db.import_csv(csv_path)
+            print(f"{n:>10} | {'importação':>16} | {'':>9} | {time.perf_counter() - t0:>10.3f}")
+            since = str(pd.Timestamp('2025-01-01') + pd.Timedelta(minutes=n - 100))
+
+            def csv_equity():
+                df = pd.read_csv(csv_path)
+                return df.loc[df['timestamp'] >= since, ['timestamp', 'balance']]
+
+            def csv_open():
+                df = pd.read_csv(csv_path)
+                return df[~df['result'].isin(['win', 'lose'])]
+
+            for name, f_csv, f_sql in (('equity (últimas)', csv_equity, lambda: db.equity_curve(since=since)),
+                                       ('apostas abertas', csv_open, db.open_bets)):
+                print(f"{n:>10} | {name:>16} | {_timeit(f_csv):>9.4f} | {_timeit(f_sql):>10.4f}")
+            print(f"{n:>10} | {'P&L por mercado':>16} | {'-':>9} | {_timeit(db.pnl_by_market):>10.4f}")
+            db.close()
+
+
+def bench_history(sizes):
+    """Leituras do histórico: history.csv único vs. segmentos diários comprimidos com índice"""
+    details = {'selections': [{'idx': i, 'market': '1', 'odd': 1.85, 'conf': 0.62} for i in range(4)],
+               'total_odd': 11.7}
+    print(f"{'apostas':>10} | {'consulta':>14} | {'csv (s)':>9} | {'segmentos (s)':>13} | segmentos")
+    for n in [n for n in sizes if n <= 1_000_000]:
+        with tempfile.TemporaryDirectory() as tmp:
+            flat = CsvLedger(str(Path(tmp) / 'history.csv'), durability='none')
+            seg = SegmentedLedger(str(Path(tmp) / 'history'), durability='none')
+            start = pd.Timestamp('2025-01-01')
+            for i in range(n):
+                ts = str(start + pd.Timedelta(seconds=30 * i))   # ~2880 apostas por dia
+                flat.append(ts, 'multiple', details, 10.0, 11.7, 'void', 1000.0)
+                seg.append(ts, 'multiple', details, 10.0, 11.7, 'void', 1000.0)
+            flat.close()
+            seg.close()
+            since = str(start + pd.Timedelta(seconds=30 * (n - 500)))
+            for name, f_flat, f_seg in (('últimas 100', lambda: flat.tail(100), lambda: seg.tail(100)),
+                                        ('desde T (500)', lambda: flat.since(since), lambda: seg.since(since))):
+                print(f"{n:>10} | {name:>14} | {_timeit(f_flat):>9.4f} | {_timeit(f_seg):>13.4f} | "
+                      f"{len(seg.segments)}")
+
+
+def _bankroll_worker(bank, n_ops, seed):
+    """Reserva e liquida `n_ops` apostas; retorna o P&L que o worker espera ter causado."""
+    rng = np.random.default_rng(seed)
+    expected = 0.0
+    for _ in range(n_ops):
+        stake = float(rng.integers(1, 20))
+        rid = bank.reserve(stake)
+        if rid is None:
+            continue
+        odd = float(np.round(rng.uniform(1.5, 3.0), 2))
+        result = 'win' if rng.random() < 0.45 else 'lose'
+        bank.settle(rid, 'single', {}, odd, result)
+        expected += bet_pnl(stake, odd, result)
+    return expected
+
+
+def bench_bankroll(sizes):
+    """Estresse do BankrollManager: N workers (threads e processos) na mesma banca, sem perder updates"""
+    from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+    import os
+    n_ops = 2000
+    print(f"{'workers':>8} | {'modo':>9} | {'apostas':>8} | {'tempo (s)':>9} | {'apostas/s':>10} | consistente")
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        os.makedirs('results')
+        try:
+            for workers in [n for n in sizes if n <= 64] or [1, 4, 16]:  # --sizes = nº de workers
+                for mode in ('threads', 'processos'):
+                    server = None
+                    if mode == 'threads':
+                        bank, pool = BankrollManager(1_000_000), ThreadPoolExecutor(workers)
+                    else:
+                        server, bank = serve_bankroll(1_000_000)
+                        pool = ProcessPoolExecutor(workers)
+                    ops = n_ops if mode == 'threads' else n_ops // 10
+                    t0 = time.perf_counter()
+                    with pool:
+                        expected = sum(pool.map(_bankroll_worker, [bank] * workers, [ops] * workers,
+                                                range(workers)))
+                    elapsed = time.perf_counter() - t0
+                    snap = bank.snapshot()
+                    bets = snap['stats']['bets']
+                    ok = (abs(snap['balance'] - 1_000_000 - expected) < 1e-6 and snap['reserved'] == 0
+                          and bets == workers * ops)
+                    bank.close()
+                    if server is not None:
+                        server.shutdown()
+                    print(f"{workers:>8} | {mode:>9} | {bets:>8} | {elapsed:>9.3f} | {bets / elapsed:>10,.0f} | "
+                          f"{'sim' if ok else 'NÃO'}")
+        finally:
+            os.chdir(cwd)
+
+
+def bench_replay(sizes):
+    """Replay/backtest: rodadas/s do pipeline completo com relógio virtual (10 partidas por dia)"""
+    print(f"{'rodadas':>8} | {'partidas':>8} | {'apostas':>7} | {'tempo (s)':>9} | {'rodadas/s':>9} | banca final | DD máx.")
+    for n in [n for n in sizes if n <= 20_000]:
+        df = make_fixtures(10 * n, n_teams=60)
+        rng = np.random.default_rng(3)
+        df['date'] = pd.Timestamp('2020-01-01') + pd.to_timedelta(np.repeat(np.arange(n), 10), unit='D')
+        df['home_goals'] = rng.poisson(1.5, len(df))
+        df['away_goals'] = rng.poisson(1.1, len(df))
+        with tempfile.TemporaryDirectory() as tmp:
+            rep = replay(df, lambda bank, pipeline, fixtures: pipeline.run(fixtures), results_dir=tmp)
+        print(f"{rep.rounds:>8} | {rep.fixtures:>8} | {rep.bets:>7} | {rep.elapsed:>9.3f} | "
+              f"{rep.rounds_per_sec:>9,.0f} | {rep.final_balance:>11,.2f} | {rep.max_drawdown:.1%}")
+
+
+def bench_sharded(sizes):
+    """Rodada particionada por liga: processo único vs. ShardedRoundPipeline com 1..N processos"""
+    import os
+    n_cpu = os.cpu_count() or 1
+    print(f"(máquina com {n_cpu} núcleos)")
+    print(f"{'fixtures':>9} | {'modo':>14} | {'tempo (s)':>9} | {'fixtures/s':>11} | speedup")
+    for n in [n for n in sizes if n <= 10_000]:  # o build em processo único cresce rápido com n
+        rng = np.random.default_rng(0)
+        df = make_fixtures(n, n_teams=400)
+        df['league_id'] = rng.integers(0, 64, size=n)
+        # ratings treinados para haver value bets (e múltiplas) em todos os shards
+        ratings = make_ratings()
+        with tempfile.TemporaryDirectory() as tmp:
+            cwd = os.getcwd()
+            os.chdir(tmp)
+            os.makedirs('results')
+            try:
+                bank = BankrollManager()
+                base = RoundPipeline(bank, ratings=ratings, n_sims=0, use_cache=False)
+                base.record = lambda accs, stakes: 0
+                t_base = _timeit(lambda: base.run(df), repeat=1)
+                print(f"{n:>9} | {'processo único':>14} | {t_base:>9.3f} | {n / t_base:>11,.0f} | 1.00x")
+                for workers in sorted({1, 2, 4, 8, 16, n_cpu}):
+                    pipe = ShardedRoundPipeline(bank, workers=workers, ratings=ratings, n_sims=0)
+                    pipe.record = lambda accs, stakes: 0
+                    pipe.run(df.head(1000))  # sobe os processos fora da medição
+                    t = _timeit(lambda: pipe.run(df), repeat=1)
+                    pipe.close()
+                    print(f"{n:>9} | {f'{workers} processos':>14} | {t:>9.3f} | {n / t:>11,.0f} | {t_base / t:.2f}x")
+                bank.close()
+            finally:
+                os.chdir(cwd)
+
+
+def bench_metrics(sizes):
+    """Custo das métricas por rodada (observe_round) e da coleta (render) vs. tempo da rodada"""
+    import os
+    print(f"{'fixtures':>9} | {'rodada (ms)':>11} | {'observe (µs)':>12} | {'render (µs)':>11} | overhead")
+    for n in [n for n in sizes if n <= 100_000]:
+        df = make_fixtures(n)
+        with tempfile.TemporaryDirectory() as tmp:
+            cwd = os.getcwd()
+            os.chdir(tmp)
+            os.makedirs('results')
+            try:
+                bank = BankrollManager()
+                pipe = RoundPipeline(bank, ratings=TeamRatings(), n_sims=0, use_cache=False)
+                pipe.record = lambda accs, stakes: 0
+                result = pipe.run(df)
+                t_round = _timeit(lambda: pipe.run(df), repeat=1)
+                bank.close()
+            finally:
+                os.chdir(cwd)
+        reps = 10_000
+        t0 = time.perf_counter()
+        for _ in range(reps):
+            observe_round(result)
+        t_obs = (time.perf_counter() - t0) / reps
+        t_render = _timeit(REGISTRY.render, repeat=100)
+        print(f"{n:>9} | {t_round * 1000:>11.2f} | {t_obs * 1e6:>12.1f} | {t_render * 1e6:>11.1f} | "
+              f"{t_obs / t_round:.4%}")
+
+
+BENCHES = {
+    'enrich': bench_enrich,
+    'poisson': bench_poisson,
+    'http': bench_http,
+    'fixtures': bench_fixtures,
+    'scan': bench_scan,
+    'accum': bench_accum,
+    'simulate': bench_simulate,
+    'ledger': bench_ledger,
+    'ledger_sql': bench_ledger_sql,
+    'history': bench_history,
+    'bankroll': bench_bankroll,
+    'replay': bench_replay,
+    'sharded': bench_sharded,
+    'metrics': bench_metrics,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks do Assistente-be")
+    parser.add_argument('benches', nargs='*', metavar='bench', help=f"opções: {', '.join(BENCHES)}")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+    unknown = [b for b in args.benches if b not in BENCHES]
+    if unknown:
+        parser.error(f"benchmark desconhecido: {', '.join(unknown)}")
+    for name in args.benches or list(BENCHES):
+        print(f"\n== {name} ==")
+        BENCHES[name](args.sizes)
+
+
+if __name__ == '__main__':
+    main()
@@ -7,9 +7,9 @@ import os
 from pathlib import Path
 from loguru import logger
 
-# Configuração de diretórios
-LOGS_DIR = Path(__file__).parent.parent / "logs"
-LOGS_DIR.mkdir(exist_ok=True)
+# Configuração de diretórios (ASSISTENTE_LOGS_DIR troca o destino, ex.: nos testes)
+LOGS_DIR = Path(os.environ.get("ASSISTENTE_LOGS_DIR") or Path(__file__).parent.parent / "logs")
+LOGS_DIR.mkdir(parents=True, exist_ok=True)
 
 # Remover handler padrão
 logger.remove()
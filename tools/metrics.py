@@ -0,0 +1,330 @@
+"""
+Métricas em processo no formato de exposição do Prometheus
+Contadores, gauges e histogramas com rótulos, mais séries calculadas na hora da coleta
+(saldo, contadores da API), servidos por um endpoint HTTP local em /metrics.
+Registrar uma rodada custa alguns microssegundos; o texto só é montado quando alguém coleta.
+"""
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+try:
+    from logger import logger
+except ImportError:
+    import logging
+    logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# latência (segundos): de 1 ms a 30 s
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if value == float('-inf'):
+        return '-Inf'
+    if value != value:
+        return 'NaN'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        try:
+            if len(labels) == len(self.labelnames):
+                return tuple([labels[n] if type(labels[n]) is str else str(labels[n]) for n in self.labelnames])
+        except KeyError:
+            pass
+        raise ValueError(f"{self.name}: rótulos esperados {self.labelnames}, recebidos {tuple(labels)}")
+
+    def header(self) -> str:
+        return f"# HELP {self.name} {self.help}\n# TYPE {self.name} {self.kind}\n"
+
+
+class _Sampled(_Metric):
+    """Base de contador/gauge: valores por rótulos ou `fn` calculada na coleta"""
+
+    def __init__(self, name, help, labelnames=(), fn: Optional[Callable] = None):
+        super().__init__(name, help, labelnames)
+        self._values = {} if self.labelnames else {(): 0.0}
+        self.fn = fn  # sem rótulos: fn() -> número; com rótulos: fn() -> {valor ou (valores,): número}
+
+    def value(self, **labels) -> float:
+        return self._collect().get(self._key(labels), 0.0)
+
+    def _collect(self) -> dict:
+        if self.fn is None:
+            with self._lock:
+                return dict(self._values)
+        out = self.fn()
+        if out is None:
+            return {}
+        if not self.labelnames:
+            return {(): float(out)}
+        return {tuple(str(v) for v in (k if isinstance(k, tuple) else (k,))): float(v) for k, v in out.items()}
+
+    def render(self) -> str:
+        try:
+            items = sorted(self._collect().items())
+        except Exception as e:
+            logger.warning(f"Métrica {self.name} indisponível: {e}")
+            items = []
+        return self.header() + ''.join(f"{self.name}{_labels(self.labelnames, k)} {_format_value(v)}\n"
+                                       for k, v in items)
+
+
+class Counter(_Sampled):
+    """Contador monotônico (nome terminado em _total); com `fn` lê um total mantido em outro lugar"""
+    kind = 'counter'
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        if amount < 0:
+            raise ValueError(f"{self.name}: contador só aumenta")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Sampled):
+    """Valor instantâneo; com `fn` é calculado na coleta (sem custo entre coletas)"""
+    kind = 'gauge'
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+
+class Histogram(_Metric):
+    """Histograma cumulativo com buckets fixos (_bucket, _sum e _count)"""
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # rótulos -> [contagens por bucket (+Inf no fim), soma]
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    def count(self, **labels) -> int:
+        series = self._series.get(self._key(labels))
+        return sum(series[0]) if series else 0
+
+    def render(self) -> str:
+        with self._lock:
+            items = sorted((k, (list(c), s)) for k, (c, s) in self._series.items())
+        lines = [self.header()]
+        for key, (counts, total) in items:
+            acc = 0
+            for bound, c in zip(self.buckets + (float('inf'),), counts):
+                acc += c
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {acc}\n")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_format_value(total)}\n")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {acc}\n")
+        return ''.join(lines)
+
+
+class MetricsRegistry:
+    """Conjunto de métricas exportadas juntas"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"métrica {metric.name} já registrada com outro tipo/rótulos")
+                if isinstance(metric, _Sampled) and metric.fn is not None:
+                    existing.fn = metric.fn
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Iterable[str] = (), fn: Callable = None) -> Counter:
+        return self._register(Counter(name, help, labelnames, fn))
+
+    def gauge(self, name: str, help: str, labelnames: Iterable[str] = (), fn: Callable = None) -> Gauge:
+        return self._register(Gauge(name, help, labelnames, fn))
+
+    def histogram(self, name: str, help: str, labelnames: Iterable[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Texto no formato de exposição do Prometheus (version 0.0.4)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return ''.join(m.render() for m in metrics)
+
+
+REGISTRY = MetricsRegistry()
+
+# ---- métricas das rodadas ------------------------------------------------------------------
+
+ROUNDS = REGISTRY.counter('assistente_rounds_total', 'Rodadas executadas')
+ROUND_ERRORS = REGISTRY.counter('assistente_round_errors_total', 'Rodadas interrompidas por erro')
+ROUND_SECONDS = REGISTRY.histogram('assistente_round_seconds', 'Duração total da rodada')
+STAGE_SECONDS = REGISTRY.histogram('assistente_round_stage_seconds', 'Duração de cada estágio da rodada',
+                                   ['stage'])
+FIXTURES = REGISTRY.counter('assistente_fixtures_total', 'Partidas analisadas, por origem', ['source'])
+ENRICH_CACHE = REGISTRY.counter('assistente_enrich_cache_total',
+                                'Partidas do enriquecimento servidas do cache ou recalculadas', ['result'])
+ACCUMULATORS = REGISTRY.counter('assistente_accumulators_total', 'Acumuladores gerados')
+BETS = REGISTRY.counter('assistente_bets_recorded_total', 'Apostas registradas')
+
+
+def observe_round(result) -> None:
+    """
+    Registra uma rodada concluída (pipeline.RoundResult)
+
+    Args:
+        result: Saída de RoundPipeline.run(); None conta como rodada com erro
+    """
+    if result is None:
+        ROUND_ERRORS.inc()
+        return
+    ROUNDS.inc()
+    for stage, seconds in result.timings.items():
+        STAGE_SECONDS.observe(seconds, stage=stage)
+    ROUND_SECONDS.observe(result.total_time)
+    if result.fixtures is not None:
+        FIXTURES.inc(len(result.fixtures), source=result.source or 'unknown')
+    stats = result.cache_stats
+    if stats:
+        ENRICH_CACHE.inc(stats.get('hits', 0), result='hit')
+        ENRICH_CACHE.inc(stats.get('recomputed', 0), result='recomputed')
+    ACCUMULATORS.inc(len(result.accumulators))
+    BETS.inc(result.recorded)
+
+
+def register_bankroll(bank, registry: MetricsRegistry = REGISTRY) -> None:
+    """Saldo, valor reservado e estatísticas da banca, lidos na hora da coleta"""
+    registry.gauge('assistente_bankroll_balance', 'Saldo da banca (R$)', fn=lambda: bank.balance)
+    registry.gauge('assistente_bankroll_reserved', 'Valor reservado em apostas abertas (R$)',
+                   fn=lambda: bank.reserved)
+    registry.gauge('assistente_bankroll_max_drawdown', 'Drawdown máximo (fração)',
+                   fn=lambda: bank.stats.max_drawdown)
+
+
+def register_http_client(get_client: Callable, registry: MetricsRegistry = REGISTRY) -> None:
+    """Chamadas às APIs externas por resultado do cache HTTP (fresh, revalidated, miss, error)"""
+    registry.counter('assistente_api_requests_total', 'Requisições às APIs, por resultado do cache HTTP',
+                     ['outcome'], fn=lambda: dict(get_client().counts))
+
+
+def register_prefetcher(prefetcher, registry: MetricsRegistry = REGISTRY) -> None:
+    """Uso da busca antecipada (fetched, used, stale, missed, errors)"""
+    registry.counter('assistente_prefetch_total', 'Eventos da busca antecipada', ['event'],
+                     fn=lambda: dict(prefetcher.stats))
+
+
+def register_scheduler(scheduler, registry: MetricsRegistry = REGISTRY) -> None:
+    """Execuções, erros e duração da última execução de cada job agendado"""
+    registry.counter('assistente_job_runs_total', 'Execuções de cada job', ['job'],
+                     fn=lambda: {j.name: j.runs for j in scheduler.jobs})
+    registry.counter('assistente_job_errors_total', 'Erros de cada job', ['job'],
+                     fn=lambda: {j.name: j.errors for j in scheduler.jobs})
+    registry.gauge('assistente_job_last_duration_seconds', 'Duração da última execução de cada job', ['job'],
+                   fn=lambda: {j.name: j.last_duration for j in scheduler.jobs})
+
+
+# ---- endpoint HTTP ------------------------------------------------------------------------
+
+class _Handler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # coletas periódicas não poluem o log
+
+
+class MetricsServer:
+    """Servidor HTTP local (thread daemon) que expõe o registry em /metrics"""
+
+    def __init__(self, port: int, host: str = '127.0.0.1', registry: MetricsRegistry = REGISTRY):
+        handler = type('MetricsHandler', (_Handler,), {'registry': registry})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='metrics', daemon=True)
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self.httpd.server_address[:2]
+
+    def start(self) -> 'MetricsServer':
+        self.thread.start()
+        host, port = self.address
+        logger.info(f"📈 Métricas em http://{host}:{port}/metrics")
+        return self
+
+    def close(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def serve_metrics(port: int, host: str = '127.0.0.1', registry: MetricsRegistry = REGISTRY) -> Optional[MetricsServer]:
+    """
+    Inicia o endpoint de métricas
+
+    Args:
+        port: Porta TCP; 0 desliga o endpoint, como config.METRICS_PORT (porta livre
+            qualquer: MetricsServer(0).start())
+        host: Interface; o padrão só aceita conexões locais
+
+    Returns:
+        MetricsServer em execução, ou None se desligado ou se a porta não pôde ser aberta
+    """
+    if not port:
+        return None
+    try:
+        return MetricsServer(port, host, registry).start()
+    except OSError as e:
+        logger.warning(f"Endpoint de métricas indisponível na porta {port}: {e}")
+        return None
@@ -0,0 +1,142 @@
+"""
+Modo de perfil: cProfile + tracemalloc por rodada
+Cada execução perfilada grava em `out_dir` um dump do cProfile (.prof, abre no snakeviz /
+pstats) e um relatório de texto com as funções mais caras e as linhas que mais alocaram
+memória. Só as `keep` execuções mais recentes são mantidas.
+Sem dependência do config.py: o Assistente-be e o BE Ultimate passam o próprio diretório.
+"""
+import cProfile
+import io
+import os
+import pstats
+import re
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+from typing import Callable, Optional
+
+try:
+    from logger import logger
+except ImportError:
+    import logging
+    logger = logging.getLogger(__name__)
+
+PROFILE_KEEP = 20   # execuções mantidas por padrão (as mais antigas são apagadas)
+PROFILE_TOP_N = 25  # funções e linhas de alocação listadas em cada relatório
+TRACE_FRAMES = 10   # profundidade das pilhas guardadas pelo tracemalloc
+
+# frames do próprio perfilador/importação não entram no relatório de alocações
+_ALLOC_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+
+def _slug(name: str) -> str:
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', name).strip('_') or 'run'
+
+
+class RoundProfiler:
+    """
+    Perfila execuções individuais (rodadas, rotinas) com retenção rotativa
+
+    Uso:
+        profiler = RoundProfiler('logs/profiles')
+        with profiler.profile('rodada'):
+            pipeline.run()
+        run = profiler.wrap(run, 'rodada')
+    """
+
+    def __init__(self, out_dir: str, keep: int = PROFILE_KEEP, top_n: int = PROFILE_TOP_N,
+                 sort: str = 'cumulative', log: Optional[Callable[[str], None]] = None):
+        """
+        Args:
+            out_dir: Diretório dos relatórios (criado se não existir)
+            keep: Execuções mantidas em disco
+            top_n: Linhas listadas em cada seção do relatório
+            sort: Ordenação do pstats
+            log: Destino das mensagens (padrão: logger do projeto)
+        """
+        self.out_dir = out_dir
+        self.log = log or logger.info
+        self.keep = keep
+        self.top_n = top_n
+        self.sort = sort
+        self.runs = 0
+        self.last_report = None  # caminho do último relatório gravado
+        os.makedirs(out_dir, exist_ok=True)
+
+    @contextmanager
+    def profile(self, name: str = 'rodada'):
+        """Perfila o bloco e grava os relatórios ao sair (também quando o bloco falha)"""
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start(TRACE_FRAMES)
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        prof = cProfile.Profile()
+        t0 = time.perf_counter()
+        prof.enable()
+        try:
+            yield prof
+        finally:
+            prof.disable()
+            elapsed = time.perf_counter() - t0
+            after = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            if started_tracing:
+                tracemalloc.stop()
+            try:
+                self._write(name, prof, before, after, elapsed, current, peak)
+            except OSError as e:
+                self.log(f"⚠️  Perfil de '{name}' não gravado: {e}")
+
+    def wrap(self, fn: Callable, name: Optional[str] = None) -> Callable:
+        """Versão de `fn` perfilada a cada chamada"""
+        label = name or getattr(fn, '__name__', 'run')
+
+        @wraps(fn)
+        def profiled(*args, **kwargs):
+            with self.profile(label):
+                return fn(*args, **kwargs)
+        return profiled
+
+    # ---- relatórios ----------------------------------------------------------------------
+
+    def _write(self, name, prof, before, after, elapsed, current, peak):
+        self.runs += 1
+        stem = os.path.join(self.out_dir, f"{datetime.now():%Y%m%d-%H%M%S}-{self.runs:04d}-{_slug(name)}")
+        prof.dump_stats(stem + '.prof')
+
+        buf = io.StringIO()
+        stats = pstats.Stats(prof, stream=buf)
+        stats.sort_stats(self.sort).print_stats(self.top_n)
+        diff = after.filter_traces(_ALLOC_FILTERS).compare_to(before.filter_traces(_ALLOC_FILTERS), 'lineno')
+        with open(stem + '.txt', 'w', encoding='utf-8') as f:
+            f.write(f"{name}: {elapsed * 1000:.1f} ms | memória atual {current / 1024:.1f} KiB | "
+                    f"pico {peak / 1024:.1f} KiB\n\n")
+            f.write(f"== top {self.top_n} funções ({self.sort}) ==\n")
+            f.write(buf.getvalue().strip() + '\n\n')
+            f.write(f"== top {self.top_n} alocações (variação durante a execução) ==\n")
+            for stat in diff[:self.top_n]:
+                f.write(f"{stat}\n")
+        self.last_report = stem + '.txt'
+        self.log(f"🔬 Perfil de '{name}': {elapsed * 1000:.1f} ms, pico {peak / 1024 / 1024:.1f} MiB "
+                 f"-> {self.last_report}")
+        self._prune()
+
+    def _prune(self):
+        """Mantém só as `keep` execuções mais recentes (pares .prof/.txt)"""
+        stems = sorted({os.path.splitext(n)[0] for n in os.listdir(self.out_dir)
+                        if n.endswith(('.prof', '.txt'))})
+        for stem in stems[:max(0, len(stems) - self.keep)]:
+            for ext in ('.prof', '.txt'):
+                try:
+                    os.remove(os.path.join(self.out_dir, stem + ext))
+                except FileNotFoundError:
+                    pass
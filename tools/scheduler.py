@@ -0,0 +1,148 @@
+"""
+Agendador asyncio orientado a eventos
+Dorme exatamente até o próximo job vencido (sem polling), suporta vários jobs com cadências
+diferentes (fixas ou adaptativas) e para assim que o stop_event é sinalizado.
+"""
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+try:
+    from logger import logger
+except ImportError:
+    import logging
+    logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Job:
+    """Job periódico; `fn` é bloqueante e roda numa thread para não travar o loop"""
+    name: str
+    interval: float                  # segundos entre execuções
+    fn: Callable
+    args: tuple = ()
+    next_run: float = 0.0            # relógio monotônico
+    next_delay: Optional[Callable[[], float]] = None  # cadência adaptativa (substitui interval)
+    runs: int = 0
+    last_duration: float = 0.0
+    errors: int = 0
+
+
+class AsyncScheduler:
+    """
+    Agenda jobs periódicos num event loop asyncio.
+
+    O loop espera pelo próximo job vencido ou pela parada, o que vier primeiro; a parada
+    (stop() ou stop_event de threading vindo da UI) acorda o loop imediatamente. Um job em
+    execução termina antes do loop sair, para não deixar uma rodada pela metade.
+    """
+
+    def __init__(self, stop_event: Optional[threading.Event] = None, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.jobs = []
+        self._heap = []
+        self._seq = itertools.count()
+        self._external_stop = stop_event
+        self._stop = None            # asyncio.Event, criado dentro do loop
+        self._loop = None
+        self._stop_requested = False
+
+    def every(self, seconds: float, fn: Callable, *args, name: str = None, run_now: bool = False) -> Job:
+        """
+        Registra `fn(*args)` para rodar a cada `seconds` segundos
+
+        Args:
+            seconds: Cadência do job
+            fn: Função bloqueante
+            run_now: Executa já na partida em vez de esperar o primeiro intervalo
+        """
+        job = Job(name or getattr(fn, '__name__', 'job'), float(seconds), fn, args)
+        job.next_run = self.clock() + (0.0 if run_now else job.interval)
+        self.jobs.append(job)
+        heapq.heappush(self._heap, (job.next_run, next(self._seq), job))
+        return job
+
+    def adaptive(self, next_delay: Callable[[], float], fn: Callable, *args, name: str = None,
+                 run_now: bool = True) -> Job:
+        """
+        Registra `fn(*args)` com cadência variável: após cada execução `next_delay()` diz
+        quantos segundos esperar até a próxima
+
+        Args:
+            next_delay: Função consultada depois de cada execução
+            fn: Função bloqueante
+            run_now: Executa já na partida (padrão) ou só após o primeiro next_delay()
+        """
+        job = Job(name or getattr(fn, '__name__', 'job'), 0.0, fn, args, next_delay=next_delay)
+        job.next_run = self.clock() + (0.0 if run_now else float(next_delay()))
+        self.jobs.append(job)
+        heapq.heappush(self._heap, (job.next_run, next(self._seq), job))
+        return job
+
+    def stop(self) -> None:
+        """Pede a parada; seguro para chamar de qualquer thread"""
+        self._stop_requested = True
+        if self._loop is not None and self._stop is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._stop.set)
+            except RuntimeError:
+                pass  # loop já encerrado
+
+    def _watch_external_stop(self) -> None:
+        """Ponte threading.Event -> asyncio: uma thread daemon espera o evento e acorda o loop"""
+        event = self._external_stop
+        if event is None:
+            return
+        threading.Thread(target=lambda: (event.wait(), self.stop()), daemon=True,
+                         name='scheduler-stop').start()
+
+    async def _run_job(self, job: Job) -> None:
+        t0 = time.perf_counter()
+        try:
+            await asyncio.to_thread(job.fn, *job.args)
+        except Exception as e:
+            job.errors += 1
+            logger.exception(f"❌ Erro no job '{job.name}': {e}")
+        job.runs += 1
+        job.last_duration = time.perf_counter() - t0
+
+    def _reschedule(self, job: Job) -> None:
+        now = self.clock()
+        if job.next_delay is not None:
+            job.next_run = now + max(0.0, float(job.next_delay()))
+            heapq.heappush(self._heap, (job.next_run, next(self._seq), job))
+            return
+        job.next_run += job.interval
+        if job.next_run <= now:
+            # atrasou mais de um intervalo: pula as execuções perdidas em vez de acumular
+            missed = int((now - job.next_run) // job.interval) + 1
+            job.next_run += missed * job.interval
+        heapq.heappush(self._heap, (job.next_run, next(self._seq), job))
+
+    async def run(self) -> None:
+        """Executa os jobs até a parada"""
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        if self._stop_requested or (self._external_stop is not None and self._external_stop.is_set()):
+            return
+        self._watch_external_stop()
+        while self._heap and not self._stop.is_set():
+            next_run, _, job = self._heap[0]
+            delay = next_run - self.clock()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._stop.wait(), timeout=delay)
+                    break  # parada pedida
+                except asyncio.TimeoutError:
+                    continue  # reavalia o topo do heap (pode ter mudado)
+            heapq.heappop(self._heap)
+            await self._run_job(job)
+            self._reschedule(job)
+
+    def run_forever(self) -> None:
+        """Versão síncrona de run() (bloqueia até a parada)"""
+        asyncio.run(self.run())
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Tracing leve: spans com pai/filho e atributos, exportados em JSON lines
+Cada span encerrado vira uma linha compacta em TRACE_FILE; `to_chrome_trace` converte o
+arquivo para o formato de eventos do Chrome (chrome://tracing, Perfetto, speedscope) para ver
+a linha do tempo / flame graph. Desligado (padrão), um span custa uma checagem de None.
+
+Uso:
+    configure('logs/traces.jsonl')
+    with span('rodada', liga=39):
+        ...
+    @traced('analyzer.enrich')
+    def enrich(...): ...
+
+Conversão:
+    python tools/tracing.py logs/traces.jsonl -o logs/traces.json
+"""
+import argparse
+import contextvars
+import functools
+import inspect
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+FLUSH_SPANS = 256  # spans acumulados antes de gravar (raízes encerradas gravam na hora)
+
+_current = contextvars.ContextVar('span', default=None)
+_exporter = None
+
+
+class Span:
+    """Intervalo medido; `set()` adiciona atributos enquanto o span está aberto"""
+    __slots__ = ('name', 'trace_id', 'span_id', 'parent_id', 'start_us', 'dur_us', 'attrs', 'error', '_t0')
+
+    def __init__(self, name: str, parent: Optional['Span'], attrs: dict):
+        self.name = name
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.trace_id = parent.trace_id if parent is not None else self.span_id
+        self.parent_id = parent.span_id if parent is not None else None
+        self.attrs = attrs
+        self.error = None
+        self.start_us = time.time_ns() // 1000
+        self.dur_us = 0
+        self._t0 = time.perf_counter_ns()
+
+    def set(self, key: str, value) -> None:
+        self.attrs[key] = value
+
+    def to_record(self) -> dict:
+        rec = {'n': self.name, 't': self.trace_id, 's': self.span_id, 'ts': self.start_us, 'd': self.dur_us,
+               'pid': os.getpid(), 'th': threading.current_thread().name}
+        if self.parent_id is not None:
+            rec['p'] = self.parent_id
+        if self.attrs:
+            rec['a'] = self.attrs
+        if self.error is not None:
+            rec['err'] = self.error
+        return rec
+
+
+class _NoopSpan:
+    """Span devolvido com o tracing desligado"""
+    __slots__ = ()
+
+    def set(self, key, value):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class JsonlExporter:
+    """Grava spans encerrados em JSON lines (append), em lotes e com trava entre threads"""
+
+    def __init__(self, path: str, flush_spans: int = FLUSH_SPANS):
+        self.path = path
+        self.flush_spans = flush_spans
+        self._buffer = []
+        self._lock = threading.Lock()
+        self.exported = 0
+        self.pid = os.getpid()  # processos filhos (fork) não herdam o exportador
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_record(), separators=(',', ':'), ensure_ascii=False, default=str)
+        with self._lock:
+            self._buffer.append(line)
+            if span.parent_id is None or len(self._buffer) >= self.flush_spans:
+                self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if not self._buffer:
+            return
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write('\n'.join(self._buffer) + '\n')
+        self.exported += len(self._buffer)
+        self._buffer.clear()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+
+def configure(path: str) -> JsonlExporter:
+    """
+    Liga o tracing no processo
+
+    Args:
+        path: Arquivo JSON lines (acrescenta ao final se já existir)
+
+    Returns:
+        Exportador ativo
+    """
+    global _exporter
+    shutdown()
+    _exporter = JsonlExporter(path)
+    return _exporter
+
+
+def shutdown() -> None:
+    """Grava os spans pendentes e desliga o tracing"""
+    global _exporter
+    if _exporter is not None:
+        _exporter.flush()
+    _exporter = None
+
+
+def enabled() -> bool:
+    return _exporter is not None
+
+
+def current_span():
+    """Span aberto no contexto atual (ou o span nulo)"""
+    return _current.get() or NOOP_SPAN
+
+
+def set_attributes(**attrs) -> None:
+    """Adiciona atributos ao span aberto no contexto atual"""
+    s = _current.get()
+    if s is not None:
+        s.attrs.update(attrs)
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """
+    Abre um span filho do span atual (ou raiz de um novo trace)
+
+    Args:
+        name: Nome do span (ex.: 'analyzer.enrich_with_probs')
+        **attrs: Atributos iniciais
+    """
+    exporter = _exporter
+    if exporter is None or exporter.pid != os.getpid():
+        yield NOOP_SPAN
+        return
+    s = Span(name, _current.get(), attrs)
+    token = _current.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        s.dur_us = (time.perf_counter_ns() - s._t0) // 1000
+        _current.reset(token)
+        exporter.export(s)
+
+
+def traced(name: Optional[str] = None, **attrs) -> Callable:
+    """Decorador: cada chamada da função vira um span (funções async também)"""
+    def decorator(fn):
+        label = name or f"{fn.__module__}.{fn.__qualname__}"
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                if _exporter is None:
+                    return await fn(*args, **kwargs)
+                with span(label, **attrs):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _exporter is None:
+                return fn(*args, **kwargs)
+            with span(label, **attrs):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ---- visualização -----------------------------------------------------------------------
+
+def load_spans(path: str) -> list:
+    """Lê o arquivo JSON lines (linhas truncadas são ignoradas)"""
+    spans = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                spans.append(json.loads(line))
+            except ValueError:
+                continue
+    return spans
+
+
+def to_chrome_trace(src: str, dst: str) -> int:
+    """
+    Converte JSON lines para o formato de eventos do Chrome (eventos 'X' completos)
+
+    Args:
+        src: Arquivo exportado pelo JsonlExporter
+        dst: Arquivo .json para chrome://tracing, ui.perfetto.dev ou speedscope
+
+    Returns:
+        Número de spans convertidos
+    """
+    spans = load_spans(src)
+    tids = {}  # (pid, thread) -> tid numérico, nomeado por eventos de metadados
+    events = []
+    for s in sorted(spans, key=lambda s: (s['ts'], -s['d'])):
+        pid, thread = s.get('pid', 0), s.get('th', 'main')
+        tid = tids.get((pid, thread))
+        if tid is None:
+            tid = tids[(pid, thread)] = len(tids) + 1
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': thread}})
+        args = {**s.get('a', {}), 'span': s['s'], 'parent': s.get('p'), 'trace': s['t']}
+        if 'err' in s:
+            args['error'] = s['err']
+        events.append({'name': s['n'], 'ph': 'X', 'ts': s['ts'], 'dur': s['d'], 'pid': pid, 'tid': tid,
+                       'args': args})
+    with open(dst, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+    return len(spans)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Converte traces JSON lines para o formato do Chrome")
+    parser.add_argument('src', help='arquivo JSON lines (ex.: logs/traces.jsonl)')
+    parser.add_argument('-o', '--output', help='destino (padrão: mesmo nome com .json)')
+    args = parser.parse_args()
+    dst = args.output or os.path.splitext(args.src)[0] + '.json'
+    n = to_chrome_trace(args.src, dst)
+    print(f"{n} spans -> {dst} (abra em chrome://tracing ou ui.perfetto.dev)")
+
+
+if __name__ == '__main__':
+    main()
@@ -5,6 +5,7 @@ import json
 import os
 import subprocess
 import sys
+import tempfile
 from pathlib import Path
 from datetime import datetime
 
@@ -20,6 +21,7 @@ BASE_DIR = Path(__file__).parent.parent
 sys.path.insert(0, str(BASE_DIR))
 
 from config import DRY_RUN, SAVE_STATE_FILE, RESULTS_DIR
+from tracing import traced
 
 # Criar diretórios necessários
 os.makedirs(RESULTS_DIR, exist_ok=True)
@@ -40,12 +42,16 @@ def login_simulado(user: str, passwd: str) -> bool:
     return True
 
 
+@traced('utils.save_state', io='disk')
 def save_state(state: dict) -> None:
     """Salva estado do sistema em arquivo JSON"""
     try:
         state_path = BASE_DIR / SAVE_STATE_FILE
-        with open(state_path, 'w', encoding='utf-8') as f:
+        # grava num temporário e troca de uma vez: a UI nunca lê um JSON pela metade
+        fd, tmp_path = tempfile.mkstemp(dir=state_path.parent, prefix=state_path.name, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
             json.dump(state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, state_path)
         logger.debug(f"💾 Estado salvo em {state_path}")
     except Exception as e:
         logger.error(f"❌ Erro ao salvar estado: {e}")
@@ -68,6 +74,7 @@ def load_state() -> dict:
         return {}
 
 
+@traced('utils.notify')
 def notify(msg: str) -> None:
     """Notifica via termux-notification quando não estiver em DRY_RUN"""
     ts = datetime.now().isoformat(sep=' ', timespec='seconds')
@@ -1,13 +1,17 @@
 """Pacote de trading e apostas do Assistente-be"""
 from .analyzer import load_fixtures_local, fetch_fixtures_from_api, enrich_with_probs
-from .bet_engine import make_accumulators, select_value_selections
+from .bet_engine import make_accumulators, build_accumulators, select_value_selections
 from .manager import BankrollManager
+from .pipeline import RoundPipeline, RoundResult
 
 __all__ = [
     "load_fixtures_local",
     "fetch_fixtures_from_api",
     "enrich_with_probs",
     "make_accumulators",
+    "build_accumulators",
     "select_value_selections",
     "BankrollManager",
+    "RoundPipeline",
+    "RoundResult",
 ]
@@ -1,60 +1,322 @@
 # analyzer.py - busca dados de partidas e calcula probabilidades simples
 # Usa API-Football quando disponível; caso contrário, usa CSV local de fixtures.
-import requests, pandas as pd, numpy as np
-import sys; sys.path.insert(0, ".."); from config import API_FOOTBALL_KEY
-import os
+import asyncio, os
+from datetime import datetime, timedelta, timezone
+import pandas as pd, numpy as np
+import sys; sys.path.insert(0, ".."); from config import API_FOOTBALL_KEY, API_FOOTBALL_CONCURRENCY
+from config import API_FOOTBALL_RESULTS_DAYS, API_FOOTBALL_UPCOMING_DAYS
+from poisson import poisson_markets, MARKETS, DIXON_COLES_RHO, MAX_GOALS, GRID_STEP
+from ratings import get_ratings
+from http_client import get_client
+from fixtures_cache import load_fixtures_columnar
+from tracing import traced, set_attributes
 
 DATA_CSV = os.path.join('..', 'assets', 'data', 'fixtures_sample.csv')
 
-def fetch_fixtures_from_api(league_id=None):
-    """Exemplo de fetch usando API-Football (precisa de chave)."""
-    if not API_FOOTBALL_KEY:
-        return None
-    headers = {'x-apisports-key': API_FOOTBALL_KEY}
-    url = 'https://v3.football.api-sports.io/fixtures?live=all'
-    if league_id:
-        url += f'&league={league_id}'
-    r = requests.get(url, headers=headers, timeout=15)
-    if r.status_code != 200:
-        return None
-    data = r.json().get('response', [])
+API_BASE = 'https://v3.football.api-sports.io'
+_FIXTURES_MEMO = {}  # url -> DataFrame já montado (reutilizado quando a API responde 304)
+FINISHED_STATUSES = ('FT', 'AET', 'PEN')  # placar final conhecido
+RESULTS_TTL_TODAY = 15 * 60      # partidas encerradas hoje ainda crescem ao longo do dia
+RESULTS_TTL_PAST = 24 * 60 * 60  # dias anteriores não mudam mais
+UPCOMING_STATUSES = ('NS',)      # ainda não iniciadas
+UPCOMING_TTL = 30 * 60           # horários de início mudam pouco (adiamentos)
+
+def parse_fixtures(data):
+    """Converte a lista 'response' da API-Football no DataFrame de fixtures.
+    Partidas encerradas (FINISHED_STATUSES) trazem home_goals/away_goals para os ratings."""
     rows = []
     for f in data:
         # Simplificar campos úteis
         try:
+            status = (f['fixture'].get('status') or {}).get('short')
+            goals = (f.get('goals') or {}) if status in FINISHED_STATUSES else {}
             rows.append({
+                'fixture_id': f['fixture'].get('id'),
+                'league_id': (f.get('league') or {}).get('id'),
                 'date': f['fixture']['date'][:10],
+                'kickoff': f['fixture'].get('timestamp'),  # epoch UTC do início da partida
                 'home_team': f['teams']['home']['name'],
                 'away_team': f['teams']['away']['name'],
                 'home_odds': None,
                 'draw_odds': None,
-                'away_odds': None
+                'away_odds': None,
+                'status': status,
+                'home_goals': goals.get('home'),
+                'away_goals': goals.get('away'),
             })
         except Exception:
             continue
     return pd.DataFrame(rows)
 
+# (nome da aposta na API, valor) -> coluna de odd
+ODDS_COLUMNS = {
+    ('Match Winner', 'Home'): 'home_odds', ('Match Winner', 'Draw'): 'draw_odds',
+    ('Match Winner', 'Away'): 'away_odds',
+    ('Goals Over/Under', 'Over 2.5'): 'over25_odds', ('Goals Over/Under', 'Under 2.5'): 'under25_odds',
+    ('Both Teams Score', 'Yes'): 'btts_odds',
+}
+_BET_ALIASES = {'Fulltime Result': 'Match Winner', 'Over/Under Line': 'Goals Over/Under'}
+
+def parse_odds(data):
+    """Extrai odds 1X2, over/under 2.5 e ambas marcam da resposta de /odds ou /odds/live."""
+    rows = []
+    for item in data:
+        try:
+            bets = item.get('odds') or item['bookmakers'][0]['bets']
+            row = {'fixture_id': item['fixture']['id']}
+            for bet in bets:
+                name = _BET_ALIASES.get(bet.get('name'), bet.get('name'))
+                for v in bet.get('values', []):
+                    # /odds/live separa a linha: {'value': 'Over', 'handicap': '2.5'}
+                    value = f"{v['value']} {v['handicap']}" if v.get('handicap') else str(v.get('value'))
+                    col = ODDS_COLUMNS.get((name, value))
+                    if col and col not in row:
+                        row[col] = float(v['odd'])
+            rows.append(row)
+        except Exception:
+            continue
+    return pd.DataFrame(rows, columns=['fixture_id', *dict.fromkeys(ODDS_COLUMNS.values())])
+
+def _fixtures_url(league_id=None):
+    url = f'{API_BASE}/fixtures?live=all'
+    if league_id:
+        url += f'&league={league_id}'
+    return url
+
+def _dated_url(date, statuses):
+    return f"{API_BASE}/fixtures?date={date}&status={'-'.join(statuses)}"
+
+def _fetch_dated(offsets, statuses, ttl):
+    """Fixtures dos dias `today + offset` (UTC) com os status dados; `ttl(offset)` = validade do cache."""
+    headers = {'x-apisports-key': API_FOOTBALL_KEY}
+    today = datetime.now(timezone.utc).date()
+    frames = []
+    for offset in offsets:
+        url = _dated_url((today + timedelta(days=offset)).isoformat(), statuses)
+        df = _fixtures_from_response(url, get_client().get_json(url, headers=headers, ttl=ttl(offset)))
+        if df is not None and len(df):
+            frames.append(df)
+    return pd.concat(frames, ignore_index=True) if frames else None
+
+@traced('analyzer.fetch_results_from_api', io='network')
+def fetch_results_from_api(days=API_FOOTBALL_RESULTS_DAYS):
+    """Partidas encerradas de hoje e dos `days - 1` dias anteriores (UTC), com placar.
+    O feed ao vivo quase nunca traz o placar final, então é daqui que os ratings aprendem.
+    Dias anteriores ficam em cache por 24h; hoje, por 15 min."""
+    if not API_FOOTBALL_KEY:
+        return None
+    df = _fetch_dated([-back for back in range(max(1, days))], FINISHED_STATUSES,
+                      lambda offset: RESULTS_TTL_TODAY if offset == 0 else RESULTS_TTL_PAST)
+    set_attributes(days=days, results=0 if df is None else len(df))
+    return df
+
+@traced('analyzer.fetch_upcoming_from_api', io='network')
+def fetch_upcoming_from_api(days=API_FOOTBALL_UPCOMING_DAYS):
+    """Partidas ainda não iniciadas de hoje e dos `days - 1` dias seguintes (UTC).
+    O feed ao vivo só traz jogos já começados; é daqui que o calendário adaptativo tira os inícios."""
+    if not API_FOOTBALL_KEY:
+        return None
+    df = _fetch_dated(range(max(1, days)), UPCOMING_STATUSES, lambda offset: UPCOMING_TTL)
+    set_attributes(days=days, upcoming=0 if df is None else len(df))
+    return df
+
+def _fixtures_from_response(url, resp):
+    """Monta o DataFrame de uma resposta; 304 reaproveita o DataFrame anterior da mesma URL."""
+    if resp.data is None:
+        return None
+    memo = _FIXTURES_MEMO.get(url)
+    if resp.not_modified and memo is not None:
+        return memo.copy()
+    df = parse_fixtures(resp.data.get('response', []))
+    _FIXTURES_MEMO[url] = df
+    return df.copy()
+
+@traced('analyzer.fetch_fixtures_from_api', io='network')
+def fetch_fixtures_from_api(league_id=None):
+    """Exemplo de fetch usando API-Football (precisa de chave).
+    Usa o cliente compartilhado (pool + cache condicional); respostas 304 reaproveitam o DataFrame anterior.
+    Uma lista de ligas é buscada em paralelo (ver fetch_fixtures_many)."""
+    if not API_FOOTBALL_KEY:
+        return None
+    if isinstance(league_id, (list, tuple, set)):
+        return fetch_fixtures_many(league_id)
+    headers = {'x-apisports-key': API_FOOTBALL_KEY}
+    url = _fixtures_url(league_id)
+    resp = get_client().get_json(url, headers=headers)
+    set_attributes(status=resp.status, cache=resp.outcome)
+    return _fixtures_from_response(url, resp)
+
+@traced('analyzer.fetch_fixtures_async', io='network')
+async def fetch_fixtures_async(league_ids, with_odds=True, concurrency=API_FOOTBALL_CONCURRENCY):
+    """Busca fixtures (e odds ao vivo) de várias ligas ao mesmo tempo e junta num único DataFrame.
+    `concurrency` limita requisições simultâneas; a cota por minuto fica no token bucket do cliente."""
+    client = get_client()
+    headers = {'x-apisports-key': API_FOOTBALL_KEY}
+    sem = asyncio.Semaphore(concurrency)
+
+    async def get(url):
+        async with sem:
+            # requests é síncrono: cada chamada roda numa thread, reaproveitando o pool da sessão
+            return await asyncio.to_thread(client.get_json, url, headers)
+
+    fixture_urls = [_fixtures_url(lid) for lid in league_ids]
+    odds_urls = [f'{API_BASE}/odds/live?league={lid}' for lid in league_ids] if with_odds else []
+    responses = await asyncio.gather(*(get(u) for u in fixture_urls + odds_urls))
+    set_attributes(requests=len(responses), leagues=len(league_ids),
+                   network=sum(r.outcome in ('miss', 'revalidated', 'error') for r in responses))
+
+    frames = [_fixtures_from_response(u, r) for u, r in zip(fixture_urls, responses)]
+    frames = [f for f in frames if f is not None and len(f)]
+    if not frames:
+        return None if all(r.data is None for r in responses[:len(fixture_urls)]) else parse_fixtures([])
+    df = pd.concat(frames, ignore_index=True)
+    odds = [parse_odds(r.data.get('response', [])) for r in responses[len(fixture_urls):] if r.data]
+    odds = [o for o in odds if len(o)]
+    if odds:
+        odds = pd.concat(odds, ignore_index=True).drop_duplicates('fixture_id', keep='last')
+        df = df.drop(columns=['home_odds', 'draw_odds', 'away_odds']).merge(odds, on='fixture_id', how='left')
+    return df
+
+def fetch_fixtures_many(league_ids, **kwargs):
+    """Versão síncrona de fetch_fixtures_async."""
+    if not API_FOOTBALL_KEY:
+        return None
+    return asyncio.run(fetch_fixtures_async(list(league_ids), **kwargs))
+
+@traced('analyzer.load_fixtures_local', io='disk')
 def load_fixtures_local():
-    return pd.read_csv(DATA_CSV, parse_dates=['date'])
-
-def estimate_probs_poisson(home_mean=1.3, away_mean=1.0):
-    """Retorna probabilidades simplificadas para 1X2 com modelo Poisson (aprox)."""
-    # Para velocidade, calcular heurístico simples
-    # Prob home win approx = sigmoid(home_mean - away_mean)
-    def sigmoid(x): return 1/(1+np.exp(-x))
-    p_home = sigmoid((home_mean - away_mean))
-    p_away = 1 - p_home - 0.08  # reserva para empate
-    p_draw = 0.08
-    return max(0.01, p_home), max(0.01, p_draw), max(0.01, p_away)
-
-def enrich_with_probs(df: pd.DataFrame):
-    df = df.copy()
-    probs = []
-    for _idx, row in df.iterrows():
-        # estimativas de média de gols podem vir de estatísticas reais; aqui usamos heurísticas
-        hm = np.random.uniform(0.8, 1.8)
-        am = np.random.uniform(0.6, 1.4)
-        p_home, p_draw, p_away = estimate_probs_poisson(hm, am)
-        probs.append({'p_home': p_home, 'p_draw': p_draw, 'p_away': p_away})
-    probs_df = pd.DataFrame(probs)
-    return pd.concat([df.reset_index(drop=True), probs_df], axis=1)
+    """Carrega o CSV local pelo cache colunar (mmap); cai para read_csv se o cache falhar."""
+    try:
+        return load_fixtures_columnar(DATA_CSV)
+    except (OSError, ValueError, KeyError):
+        return pd.read_csv(DATA_CSV, parse_dates=['date'])
+
+def estimate_probs_poisson_batch(home_mean, away_mean, rho=DIXON_COLES_RHO):
+    """Versão vetorizada de estimate_probs_poisson: recebe arrays de médias e
+    retorna (p_home, p_draw, p_away) como arrays NumPy do mesmo tamanho."""
+    probs = poisson_markets(home_mean, away_mean, rho)
+    return probs[:, 0], probs[:, 1], probs[:, 2]
+
+def estimate_probs_poisson(home_mean=1.3, away_mean=1.0, rho=DIXON_COLES_RHO):
+    """Retorna probabilidades 1X2 pelo modelo Poisson de placares (ver poisson.py)."""
+    p_home, p_draw, p_away = estimate_probs_poisson_batch(home_mean, away_mean, rho)
+    return float(p_home[0]), float(p_draw[0]), float(p_away[0])
+
+class Columns(dict):
+    """Partidas em colunas NumPy (nome -> array, linha i = partida i), sem índice nem cópias.
+    Atende ao pouco de DataFrame que os estágios usam (`in`, `[]`, len() em linhas e index) sem o
+    custo fixo do pandas a cada rodada; o replay pré-divide o histórico nesse formato."""
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls((c, df[c].to_numpy()) for c in df.columns)
+
+    def __len__(self):
+        return len(next(iter(self.values()))) if dict.__len__(self) else 0
+
+    @property
+    def index(self):
+        return np.arange(len(self))
+
+    def to_frame(self):
+        return pd.DataFrame(dict(self))
+
+FIXTURE_KEY_COLUMNS = ('fixture_id', 'date', 'home_team', 'away_team', 'home_odds', 'draw_odds', 'away_odds')
+
+def fixture_keys(df: pd.DataFrame):
+    """Hash uint64 estável por linha (id, data, times e odds): muda quando a partida muda."""
+    cols = [c for c in FIXTURE_KEY_COLUMNS if c in df]
+    if not cols:
+        return pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return pd.util.hash_pandas_object(df[cols], index=False).to_numpy()
+
+class EnrichmentCache:
+    """Cache de probabilidades por fixture entre rodadas.
+    Só linhas novas ou alteradas são recalculadas; o cache inteiro é invalidado quando a
+    assinatura do modelo (rho, versão dos ratings, parâmetros do Poisson) muda."""
+
+    def __init__(self):
+        self._keys = np.empty(0, dtype=np.uint64)
+        self._vals = np.empty((0, len(MARKETS)), dtype=np.float64)
+        self._signature = None
+        self.last_stats = {'rows': 0, 'hits': 0, 'recomputed': 0, 'invalidated': False}
+        self.totals = {'rows': 0, 'hits': 0, 'recomputed': 0, 'invalidations': 0}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def clear(self):
+        self._keys = self._keys[:0]
+        self._vals = self._vals[:0]
+        self._signature = None
+
+    def probs_for(self, df, signature, compute):
+        """Retorna (n, len(MARKETS)); `compute(mask)` calcula as linhas ausentes do cache."""
+        invalidated = signature != self._signature
+        if invalidated and self._signature is not None:
+            self.totals['invalidations'] += 1
+        if invalidated:
+            self.clear()
+            self._signature = signature
+        keys = fixture_keys(df)
+        n = len(keys)
+        if len(self._keys):
+            pos = np.minimum(np.searchsorted(self._keys, keys), len(self._keys) - 1)
+            hit = self._keys[pos] == keys
+        else:
+            pos = np.zeros(n, dtype=np.int64)
+            hit = np.zeros(n, dtype=bool)
+        probs = np.empty((n, len(MARKETS)), dtype=np.float64)
+        probs[hit] = self._vals[pos[hit]]
+        miss = ~hit
+        if miss.any():
+            probs[miss] = compute(miss)
+        # mantém só as fixtures da rodada atual: partidas encerradas saem sozinhas do cache
+        order = np.argsort(keys, kind='stable')
+        self._keys, self._vals = keys[order], probs[order]
+        n_hit = int(hit.sum())
+        self.last_stats = {'rows': n, 'hits': n_hit, 'recomputed': n - n_hit, 'invalidated': invalidated}
+        self.totals['rows'] += n
+        self.totals['hits'] += n_hit
+        self.totals['recomputed'] += n - n_hit
+        return probs
+
+_ENRICH_CACHE = EnrichmentCache()
+
+def get_enrichment_cache():
+    """Cache de enriquecimento compartilhado entre rodadas."""
+    return _ENRICH_CACHE
+
+@traced('analyzer.enrich_with_probs')
+def enrich_with_probs(df: pd.DataFrame, rho=DIXON_COLES_RHO, ratings=None, cache=None):
+    """Adiciona colunas de probabilidade (poisson.MARKETS) calculadas para todas as linhas de uma vez.
+    As médias de gols vêm dos ratings de ataque/defesa (ratings.get_ratings() por padrão).
+    Com `cache` (EnrichmentCache) só fixtures novas ou alteradas são recalculadas.
+    `df` em Columns devolve Columns (sem cache: o hash de linhas é do pandas)."""
+    if ratings is None:
+        ratings = get_ratings()
+    if isinstance(df, Columns):
+        hm, am = ratings.goal_means(df['home_team'], df['away_team'])
+        out = Columns(df)
+        out.update(zip(MARKETS, poisson_markets(hm, am, rho).T))
+        set_attributes(rows=len(out))
+        return out
+    out = df.reset_index(drop=True)
+    home = out['home_team'] if 'home_team' in out else pd.Series([None] * len(out))
+    away = out['away_team'] if 'away_team' in out else pd.Series([None] * len(out))
+
+    def compute(mask=None):
+        h, a = (home, away) if mask is None else (home[mask], away[mask])
+        hm, am = ratings.goal_means(h, a)
+        return poisson_markets(hm, am, rho)
+
+    if cache is None:
+        probs = compute()
+        set_attributes(rows=len(out))
+    else:
+        signature = (rho, id(ratings), ratings.version, MAX_GOALS, GRID_STEP)
+        probs = cache.probs_for(out, signature, compute)
+        set_attributes(rows=len(out), cache_hits=cache.last_stats['hits'])
+    # um único bloco novo em vez de inserir coluna por coluna
+    probs_df = pd.DataFrame(probs, columns=list(MARKETS))
+    return pd.concat([out.drop(columns=[c for c in MARKETS if c in out]), probs_df], axis=1)
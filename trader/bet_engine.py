@@ -1,8 +1,10 @@
 # bet_engine.py - lógica para gerar múltiplas 'humanas' e selecionar value bets
-import random, itertools
+import bisect, heapq, random
 import numpy as np
+import pandas as pd
 from analyzer import enrich_with_probs
-import sys; sys.path.insert(0, ".."); from config import MIN_STAKE_PERCENT, MAX_STAKE_PERCENT, BANKROLL_INITIAL
+from tracing import traced, set_attributes
+import sys; sys.path.insert(0, ".."); from config import ACCUMULATOR_MAX_CANDIDATES
 
 random.seed()
 
@@ -12,35 +14,211 @@ def implied_prob(odd):
     except Exception:
         return 0.0
 
-def select_value_selections(df, conf_threshold=0.65):
-    """Seleciona seleções com probabilidade estimada > conf_threshold e odds indicando value."""
-    picks = []
-    for idx, row in df.iterrows():
-        # Ex.: teste para vitória do time da casa
-        if 'home_odds' in row and row.get('home_odds') and row['p_home'] > conf_threshold:
-            ip = implied_prob(row['home_odds'])
-            # value bet se prob estimada > implied_prob + margem
-            if row['p_home'] > ip + 0.05:
-                picks.append({'idx': idx, 'market': '1', 'odd': row['home_odds'], 'conf': row['p_home']})
-        # draw / away selection (pode adicionar outros mercados)
-    return picks
+# mercado -> (coluna de probabilidade, coluna de odd); só entram os que existirem no DataFrame
+MARKET_COLUMNS = {
+    '1': ('p_home', 'home_odds'),
+    'X': ('p_draw', 'draw_odds'),
+    '2': ('p_away', 'away_odds'),
+    'O2.5': ('p_over25', 'over25_odds'),
+    'U2.5': ('p_under25', 'under25_odds'),
+    'BTTS': ('p_btts', 'btts_odds'),
+}
 
-def make_accumulators(df, max_selections=4, target_total_odd_min=5.0, target_total_odd_max=12.0):
-    """Gera 1-3 múltiplas por rodada misturando mercados e adicionando 'erro humano' leve."""
-    dfp = enrich_with_probs(df)
-    candidates = select_value_selections(dfp, conf_threshold=0.60)
-    random.shuffle(candidates)
+def _numeric(col):
+    """Odds como float64: colunas já numéricas (ou arrays de analyzer.Columns) sem pd.to_numeric."""
+    arr = np.asarray(col)
+    if arr.dtype.kind in 'fiu':
+        return arr.astype(np.float64, copy=False)
+    return pd.to_numeric(pd.Series(arr), errors='coerce').to_numpy(dtype=np.float64)
+
+def _scan(df, conf_threshold, min_edge, markets):
+    """Núcleo de scan_value_bets: arrays (idx, market, odd, conf, implied, edge) ou None."""
+    markets = [m for m in (markets or MARKET_COLUMNS)
+               if MARKET_COLUMNS[m][0] in df and MARKET_COLUMNS[m][1] in df]
+    if not markets or len(df) == 0:
+        return None
+    probs = np.column_stack([np.asarray(df[MARKET_COLUMNS[m][0]], dtype=np.float64) for m in markets])
+    odds = np.column_stack([_numeric(df[MARKET_COLUMNS[m][1]]) for m in markets])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        implied = np.where(odds > 0, 1.0 / odds, np.nan)
+    edge = probs - implied
+    # value bet se prob estimada > conf_threshold e > implied_prob + margem (odds ausentes ficam de fora)
+    mask = (probs > conf_threshold) & (edge > min_edge)
+    rows, cols = np.nonzero(mask)
+    return (np.asarray(df.index)[rows], np.asarray(markets, dtype=object)[cols], odds[rows, cols],
+            probs[rows, cols], implied[rows, cols], edge[rows, cols])
+
+def scan_value_bets(df, conf_threshold=0.65, min_edge=0.05, markets=None):
+    """Varre todos os mercados de uma vez com máscaras booleanas.
+    Retorna DataFrame (idx, market, odd, conf, implied, edge) na ordem linha -> mercado."""
+    found = _scan(df, conf_threshold, min_edge, markets)
+    if found is None:
+        return pd.DataFrame({'idx': pd.Series(dtype=df.index.dtype), 'market': pd.Series(dtype=object),
+                             'odd': pd.Series(dtype=float), 'conf': pd.Series(dtype=float),
+                             'implied': pd.Series(dtype=float), 'edge': pd.Series(dtype=float)})
+    return pd.DataFrame(dict(zip(('idx', 'market', 'odd', 'conf', 'implied', 'edge'), found)))
+
+@traced('bet_engine.select_value_selections')
+def select_value_selections(df, conf_threshold=0.65, min_edge=0.05, markets=None):
+    """Seleciona seleções com probabilidade estimada > conf_threshold e odds indicando value.
+    Lista de dicts (idx, market, odd, conf) montada direto dos arrays de scan_value_bets."""
+    found = _scan(df, conf_threshold, min_edge, markets)
+    if found is None:
+        return []
+    idx, market, odd, conf = (a.tolist() for a in found[:4])
+    set_attributes(rows=len(df), selections=len(idx))
+    return [{'idx': i, 'market': m, 'odd': o, 'conf': c} for i, m, o, c in zip(idx, market, odd, conf)]
+
+def _top_candidates(items, k, max_legs, bins=8):
+    """As `k` melhores seleções (items já ordenados por v desc) distribuídas por faixas de odd.
+    Cortar só pelo v ficaria com as odds mais altas, que raramente cabem na janela da múltipla;
+    em cada faixa de log(odd) o v é quase log(conf) + constante, então a faixa guarda as mais
+    confiáveis. Faixas com sobra de vaga cedem para as melhores seleções restantes."""
+    w = np.log([c['odd'] for c in items])
+    edges = np.linspace(w.min(), w.max(), bins + 1)[1:-1]
+    band = np.searchsorted(edges, w, side='right')
+    cap = max(max_legs, k // bins)
+    taken = [False] * len(items)
+    counts = [0] * bins
+    kept = 0
+    for i, b in enumerate(band.tolist()):
+        if counts[b] < cap and kept < k:
+            taken[i] = True
+            counts[b] += 1
+            kept += 1
+    for i in range(len(items)):
+        if kept >= k:
+            break
+        if not taken[i]:
+            taken[i] = True
+            kept += 1
+    return [c for c, t in zip(items, taken) if t]
+
+@traced('bet_engine.optimize_accumulators')
+def optimize_accumulators(candidates, top_n=3, min_legs=3, max_legs=4,
+                          target_total_odd_min=5.0, target_total_odd_max=12.0,
+                          max_candidates=ACCUMULATOR_MAX_CANDIDATES):
+    """Busca determinística das top-N múltiplas por valor esperado dentro da janela de odds.
+
+    Trabalha em espaço log: valor da seleção v = log(conf * odd) e peso w = log(odd), então
+    EV da múltipla = exp(soma v) - 1 e a janela vira lo <= soma w <= hi. As seleções são
+    ordenadas por v e um branch-and-bound poda ramos cujo melhor valor possível não supera a
+    N-ésima melhor múltipla já encontrada ou que não conseguem mais cair na janela.
+    No máximo uma seleção por partida (idx). A busca cresce ~cubicamente com o número de
+    seleções, então só as `max_candidates` de maior v entram (None = todas, busca exata)."""
+    items = [c for c in candidates if c.get('odd') and c['odd'] > 1.0 and c.get('conf', 0) > 0]
+    items.sort(key=lambda c: -np.log(c['conf'] * c['odd']))
+    if max_candidates is not None and len(items) > max_candidates:
+        items = _top_candidates(items, max_candidates, max_legs)
+    n = len(items)
+    if n < min_legs:
+        return []
+    v = np.log([c['conf'] * c['odd'] for c in items]).tolist()
+    w = np.log([c['odd'] for c in items]).tolist()
+    lo, hi = np.log(target_total_odd_min), np.log(target_total_odd_max)
+
+    # v ordenado desc: o melhor ganho com r seleções a partir de i são as r seguintes
+    vpre = np.concatenate([[0.0], np.cumsum(v)]).tolist()
+    # menores/maiores somas de r pesos no sufixo i (viabilidade da janela)
+    wmin = [[0.0] * (n + 1) for _ in range(max_legs + 1)]
+    wmax = [[0.0] * (n + 1) for _ in range(max_legs + 1)]
+    for r in range(1, max_legs + 1):
+        wmin[r][n] = wmax[r][n] = float('inf')
+    suffix = []
+    for i in range(n - 1, -1, -1):
+        bisect.insort(suffix, w[i])
+        for r in range(1, max_legs + 1):
+            if r <= len(suffix):
+                wmin[r][i] = sum(suffix[:r])
+                wmax[r][i] = sum(suffix[-r:])
+            else:
+                wmin[r][i] = float('inf')
+                wmax[r][i] = float('-inf')
+
+    # v = w + log(conf) e soma w <= hi, logo soma v <= cur_v + (hi - cur_w) + soma dos log(conf)
+    # das seleções que ainda faltam: lcmax[r][i] = maior soma de r log(conf) no sufixo i
+    lc = np.log([c['conf'] for c in items]).tolist()
+    lcmax = [[0.0] * (n + 1) for _ in range(min_legs + 1)]
+    for r in range(1, min_legs + 1):
+        lcmax[r][n] = float('-inf')
+    suffix = []
+    for i in range(n - 1, -1, -1):
+        bisect.insort(suffix, lc[i])
+        for r in range(1, min_legs + 1):
+            lcmax[r][i] = sum(suffix[-r:]) if r <= len(suffix) else float('-inf')
+
+    heap = []  # (valor, legs) das top_n
+    chosen = []
+    used = set()
+
+    def best_gain(i, depth):
+        # maior ganho possível de v a partir de i com até max_legs - depth seleções
+        r = min(max_legs - depth, n - i)
+        return max(vpre[i + k] - vpre[i] for k in range(r + 1))
+
+    def reachable(i, depth, cur_w):
+        for r in range(max(0, min_legs - depth), max_legs - depth + 1):
+            if r == 0:
+                if lo <= cur_w <= hi:
+                    return True
+            elif cur_w + wmin[r][i] <= hi and cur_w + wmax[r][i] >= lo:
+                return True
+        return False
+
+    def dfs(i, depth, cur_v, cur_w):
+        if depth >= min_legs and lo <= cur_w <= hi:
+            entry = (cur_v, tuple(chosen))
+            if len(heap) < top_n:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+        if depth == max_legs:
+            return
+        for j in range(i, n):
+            if len(heap) == top_n and cur_v + best_gain(j, depth) <= heap[0][0]:
+                break  # v ordenado: nenhum j seguinte melhora
+            if not reachable(j, depth, cur_w):
+                continue
+            key = items[j].get('idx')
+            if key in used or cur_w + w[j] > hi:
+                continue
+            if len(heap) == top_n:
+                need = max(0, min_legs - depth - 1)
+                if cur_v + v[j] + (hi - cur_w - w[j]) + lcmax[need][j + 1] <= heap[0][0]:
+                    continue
+            used.add(key)
+            chosen.append(j)
+            dfs(j + 1, depth + 1, cur_v + v[j], cur_w + w[j])
+            chosen.pop()
+            used.discard(key)
+
+    dfs(0, 0, 0.0, 0.0)
     accs = []
-    # Tentar formar acumuladores com 3-4 seleções
-    for r in range(3):
-        k = random.randint(3, min(max_selections, max(3, len(candidates))))
-        comb = random.sample(candidates, k) if len(candidates) >= k else candidates
-        total_odd = np.prod([c['odd'] for c in comb]) if comb else 0
-        # introduzir pequena chance de erro humano: trocar uma seleção por outra sub-ótima
-        if random.random() < 0.12 and len(comb) >= 1:
-            # simular erro trocando uma odd por odd * (1 +/- 0.1)
+    for value, legs in sorted(heap, reverse=True):
+        comb = [dict(items[j]) for j in legs]
+        total_odd = float(np.exp(sum(w[j] for j in legs)))
+        prob = float(np.prod([c['conf'] for c in comb]))
+        accs.append({'selections': comb, 'total_odd': total_odd, 'prob': prob, 'ev': float(np.exp(value) - 1.0)})
+    return accs
+
+@traced('bet_engine.build_accumulators')
+def build_accumulators(candidates, max_selections=4, target_total_odd_min=5.0, target_total_odd_max=12.0,
+                       top_n=3, human_error_rate=0.0):
+    """Monta até `top_n` múltiplas (3..max_selections seleções) com optimize_accumulators.
+    `human_error_rate` > 0 reativa o 'erro humano' leve: altera a odd de uma seleção ao acaso."""
+    accs = optimize_accumulators(candidates, top_n, 3, max_selections, target_total_odd_min, target_total_odd_max)
+    set_attributes(candidates=len(candidates), accumulators=len(accs))
+    for acc in accs:
+        # simular erro trocando uma odd por odd * (1 +/- 0.1)
+        if random.random() < human_error_rate:
+            comb = acc['selections']
             i = random.randrange(len(comb))
             comb[i]['odd'] = comb[i]['odd'] * (1 + random.uniform(-0.08, 0.12))
-        if total_odd >= target_total_odd_min and total_odd <= target_total_odd_max:
-            accs.append({'selections': comb, 'total_odd': float(total_odd)})
     return accs
+
+def make_accumulators(df, max_selections=4, target_total_odd_min=5.0, target_total_odd_max=12.0):
+    """Gera até 3 múltiplas por rodada misturando mercados (ver optimize_accumulators).
+    Só enriquece `df` se ainda não tiver as colunas de probabilidade."""
+    dfp = df if 'p_home' in df else enrich_with_probs(df)
+    candidates = select_value_selections(dfp, conf_threshold=0.60)
+    return build_accumulators(candidates, max_selections, target_total_odd_min, target_total_odd_max)
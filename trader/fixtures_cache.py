@@ -0,0 +1,110 @@
+# fixtures_cache.py - cache colunar (um .npy por coluna) para CSVs de fixtures
+# O CSV é convertido uma única vez; as cargas seguintes abrem as colunas com mmap e só
+# reconstroem o cache quando tamanho/mtime (e, se mudarem, o hash) do CSV forem diferentes.
+import hashlib, json, os, shutil
+import numpy as np
+import pandas as pd
+
+CACHE_VERSION = 1
+FLOAT_COLUMNS = ('home_odds', 'draw_odds', 'away_odds', 'home_goals', 'away_goals')
+
+
+def cache_dir_for(csv_path):
+    """Diretório do cache ao lado do CSV: data/.fixtures_sample.cols/"""
+    head, name = os.path.split(csv_path)
+    return os.path.join(head, f'.{os.path.splitext(name)[0]}.cols')
+
+
+def _file_hash(path, chunk=1 << 20):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _read_manifest(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, 'manifest.json'), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _is_valid(manifest, csv_path):
+    if not manifest or manifest.get('version') != CACHE_VERSION:
+        return False
+    st = os.stat(csv_path)
+    if manifest['size'] == st.st_size and manifest['mtime_ns'] == st.st_mtime_ns:
+        return True
+    # mtime mudou (cópia, checkout...): só reconstrói se o conteúdo mudou de fato
+    return manifest['size'] == st.st_size and manifest['sha1'] == _file_hash(csv_path)
+
+
+def _write_manifest(cache_dir, manifest):
+    with open(os.path.join(cache_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+
+
+def build_cache(csv_path, cache_dir=None, date_columns=('date',)):
+    """Converte o CSV em colunas .npy com dtypes fixos; times viram categóricas (códigos int32)."""
+    cache_dir = cache_dir or cache_dir_for(csv_path)
+    df = pd.read_csv(csv_path, parse_dates=[c for c in date_columns if c])
+    tmp = cache_dir + '.tmp'
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    columns = []
+    for col in df.columns:
+        s = df[col]
+        fname = f'{len(columns)}.npy'
+        if col in date_columns:
+            kind = 'datetime'
+            arr = s.to_numpy(dtype='datetime64[ns]')
+        elif col in FLOAT_COLUMNS or pd.api.types.is_float_dtype(s):
+            kind = 'float'
+            arr = pd.to_numeric(s, errors='coerce').to_numpy(dtype=np.float64)
+        elif pd.api.types.is_integer_dtype(s) or pd.api.types.is_bool_dtype(s):
+            kind = 'int'
+            arr = s.to_numpy(dtype=np.int64)
+        else:
+            kind = 'category'
+            cat = s.astype('category')
+            arr = cat.cat.codes.to_numpy(dtype=np.int32)
+            with open(os.path.join(tmp, f'{len(columns)}.cats.json'), 'w', encoding='utf-8') as f:
+                json.dump([str(c) for c in cat.cat.categories], f, ensure_ascii=False)
+        np.save(os.path.join(tmp, fname), arr)
+        columns.append({'name': col, 'kind': kind, 'file': fname})
+    st = os.stat(csv_path)
+    manifest = {'version': CACHE_VERSION, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns,
+                'sha1': _file_hash(csv_path), 'rows': len(df), 'columns': columns}
+    _write_manifest(tmp, manifest)
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    os.replace(tmp, cache_dir)
+    return manifest
+
+
+def load_cache(cache_dir, manifest):
+    """Abre as colunas com mmap (sem cópia) e monta o DataFrame."""
+    data = {}
+    for i, col in enumerate(manifest['columns']):
+        arr = np.load(os.path.join(cache_dir, col['file']), mmap_mode='r')
+        if col['kind'] == 'category':
+            with open(os.path.join(cache_dir, f'{i}.cats.json'), 'r', encoding='utf-8') as f:
+                cats = json.load(f)
+            data[col['name']] = pd.Categorical.from_codes(arr, categories=cats)
+        else:
+            data[col['name']] = arr
+    return pd.DataFrame(data, copy=False)
+
+
+def load_fixtures_columnar(csv_path, cache_dir=None):
+    """Carrega o CSV pelo cache colunar, reconstruindo-o quando o CSV mudou."""
+    cache_dir = cache_dir or cache_dir_for(csv_path)
+    manifest = _read_manifest(cache_dir)
+    if not _is_valid(manifest, csv_path):
+        manifest = build_cache(csv_path, cache_dir)
+    elif manifest['mtime_ns'] != os.stat(csv_path).st_mtime_ns:
+        # conteúdo igual com mtime novo: grava o mtime para não recalcular o hash toda vez
+        manifest['mtime_ns'] = os.stat(csv_path).st_mtime_ns
+        _write_manifest(cache_dir, manifest)
+    return load_cache(cache_dir, manifest)
@@ -0,0 +1,235 @@
+# http_client.py - cliente HTTP compartilhado para as APIs externas
+# Sessão única com pool de conexões keep-alive, retry com backoff, revalidação condicional
+# (ETag / If-Modified-Since) e cache em disco com TTL e limite de tamanho.
+import asyncio, hashlib, json, os, threading, time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import sys; sys.path.insert(0, ".."); from config import RESULTS_DIR, API_FOOTBALL_RATE_PER_MIN, API_FOOTBALL_CONCURRENCY
+
+CACHE_DIR = os.path.join(RESULTS_DIR, 'http_cache')
+CACHE_TTL = 60                     # segundos em que a resposta é servida sem ir à rede
+CACHE_MAX_BYTES = 50 * 1024 * 1024  # limite do cache em disco (evicção LRU por mtime)
+MEMORY_ENTRIES = 64                # respostas já parseadas mantidas em memória
+POOL_SIZE = 10
+RETRIES = 3
+BACKOFF = 0.5
+TIMEOUT = 15
+
+
+@dataclass
+class CachedResponse:
+    status: int
+    data: object
+    outcome: str          # 'fresh' (sem rede), 'revalidated' (304), 'miss' (200) ou 'error'
+    elapsed: float        # segundos
+
+    @property
+    def not_modified(self):
+        """True quando o conteúdo é o mesmo da última resposta armazenada."""
+        return self.outcome in ('fresh', 'revalidated')
+
+
+class HttpClient:
+    """Cliente JSON com pool de conexões e cache condicional em disco."""
+
+    def __init__(self, cache_dir=CACHE_DIR, ttl=CACHE_TTL, max_bytes=CACHE_MAX_BYTES,
+                 pool_size=POOL_SIZE, retries=RETRIES, backoff=BACKOFF, timeout=TIMEOUT,
+                 rate_per_min=None, burst=None):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        os.makedirs(cache_dir, exist_ok=True)
+        retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=('GET',), respect_retry_after_header=True)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.counts = {'fresh': 0, 'revalidated': 0, 'miss': 0, 'error': 0}
+        self.log = deque(maxlen=1000)  # (url, status, outcome, ms) por requisição
+        # cota da API: toda requisição que vai à rede (200 ou 304) consome uma ficha; None = sem limite
+        self.limiter = TokenBucket(rate_per_min / 60.0, capacity=burst) if rate_per_min else None
+
+    # ---- cache -------------------------------------------------------------------------
+
+    def _path(self, url):
+        return os.path.join(self.cache_dir, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.json')
+
+    def _load(self, url):
+        entry = self._memory.get(url)
+        if entry is not None:
+            self._memory.move_to_end(url)
+            return entry
+        path = self._path(url)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        self._remember(url, entry)
+        return entry
+
+    def _remember(self, url, entry):
+        self._memory[url] = entry
+        self._memory.move_to_end(url)
+        while len(self._memory) > MEMORY_ENTRIES:
+            self._memory.popitem(last=False)
+
+    def _store(self, url, entry):
+        self._remember(url, entry)
+        path = self._path(url)
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp, path)
+        self._evict()
+
+    def _touch(self, url, entry):
+        """304: o conteúdo continua válido; grava o novo stored_at para o TTL valer também
+        depois de reiniciar (e o mtime novo mantém a entrada fora da evicção LRU)."""
+        entry['stored_at'] = time.time()
+        self._store(url, entry)
+
+    def _evict(self):
+        files = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.json'):
+                continue
+            st = os.stat(os.path.join(self.cache_dir, name))
+            files.append((st.st_mtime, st.st_size, name))
+            total += st.st_size
+        for _mtime, size, name in sorted(files):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.cache_dir, name))
+            total -= size
+
+    def clear(self):
+        self._memory.clear()
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.json'):
+                os.remove(os.path.join(self.cache_dir, name))
+
+    # ---- requisições -------------------------------------------------------------------
+
+    def is_fresh(self, url, ttl=None):
+        """True se `url` seria servida do cache sem ir à rede (não consome cota da API)."""
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            entry = self._load(url)
+        return entry is not None and time.time() - entry['stored_at'] < ttl
+
+    def get_json(self, url, headers=None, ttl=None):
+        """GET com cache: dentro do TTL não vai à rede; depois revalida com ETag/Last-Modified.
+        Indo à rede, espera uma ficha de `limiter` (bloqueia a thread chamadora)."""
+        ttl = self.ttl if ttl is None else ttl
+        t0 = time.perf_counter()
+        with self._lock:
+            entry = self._load(url)
+        if entry is not None and time.time() - entry['stored_at'] < ttl:
+            return self._finish(url, 200, entry['data'], 'fresh', t0)
+
+        req_headers = dict(headers or {})
+        if entry is not None:
+            if entry.get('etag'):
+                req_headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                req_headers['If-Modified-Since'] = entry['last_modified']
+        if self.limiter is not None:
+            self.limiter.wait()
+        try:
+            r = self.session.get(url, headers=req_headers, timeout=self.timeout)
+        except requests.RequestException:
+            return self._finish(url, 0, None, 'error', t0)
+
+        if r.status_code == 304 and entry is not None:
+            with self._lock:
+                self._touch(url, entry)
+            return self._finish(url, 304, entry['data'], 'revalidated', t0)
+        if r.status_code != 200:
+            return self._finish(url, r.status_code, None, 'error', t0)
+        try:
+            data = r.json()
+        except ValueError:
+            return self._finish(url, r.status_code, None, 'error', t0)
+        with self._lock:
+            self._store(url, {'url': url, 'etag': r.headers.get('ETag'),
+                              'last_modified': r.headers.get('Last-Modified'),
+                              'stored_at': time.time(), 'data': data})
+        return self._finish(url, 200, data, 'miss', t0)
+
+    def _finish(self, url, status, data, outcome, t0):
+        elapsed = time.perf_counter() - t0
+        with self._lock:
+            self.counts[outcome] += 1
+            self.log.append((url, status, outcome, round(elapsed * 1000, 3)))
+        return CachedResponse(status, data, outcome, elapsed)
+
+    def stats(self):
+        """Contadores, taxa de acerto (fresh + 304) e latência média por resultado (ms)."""
+        total = sum(self.counts.values())
+        hits = self.counts['fresh'] + self.counts['revalidated']
+        latency = {}
+        for outcome in self.counts:
+            ms = [row[3] for row in self.log if row[2] == outcome]
+            if ms:
+                latency[outcome] = round(sum(ms) / len(ms), 3)
+        return {**self.counts, 'requests': total,
+                'hit_rate': round(hits / total, 4) if total else 0.0, 'latency_ms': latency}
+
+
+class TokenBucket:
+    """Rate limiter (acquire() assíncrono, wait() bloqueante): `rate` fichas por segundo, rajadas de até `capacity`.
+    A trava é de threading (não asyncio.Lock) porque o bucket sobrevive a vários event loops:
+    cada rodada roda num asyncio.run novo."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, rate))
+        self.tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self):
+        """Consome uma ficha; retorna 0 ou os segundos até a próxima ficha."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self._last) * self.rate)
+            self._last = now
+            if self.tokens >= 1.0:
+                self.tokens -= 1.0
+                return 0.0
+            return (1.0 - self.tokens) / self.rate
+
+    def wait(self):
+        """Versão bloqueante de acquire() (para chamadas síncronas ou em threads)."""
+        while True:
+            wait = self._take()
+            if not wait:
+                return
+            time.sleep(wait)
+
+    async def acquire(self):
+        while True:
+            wait = self._take()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+
+_CLIENT = None
+
+
+def get_client():
+    """Cliente compartilhado por todo o processo (mantém o pool de conexões e a cota da API)."""
+    global _CLIENT
+    if _CLIENT is None:
+        _CLIENT = HttpClient(rate_per_min=API_FOOTBALL_RATE_PER_MIN, burst=API_FOOTBALL_CONCURRENCY)
+    return _CLIENT
@@ -0,0 +1,133 @@
+# kelly.py - Kelly simultâneo (multi-resultado) para todas as apostas de uma rodada
+# Maximiza E[log(1 + Σ f_i r_i)] sobre o espaço conjunto de resultados: cada padrão de
+# ganha/perde das apostas é um cenário com sua probabilidade. Solver de Newton projetado
+# (caixa 0 <= f_i <= 1), totalmente vetorizado sobre os cenários.
+from functools import lru_cache
+import numpy as np
+from simulator import prepare_legs, sample_wins
+
+MAX_EXACT_BETS = 12      # até 2^12 cenários enumerados exatamente (apostas independentes)
+MAX_EXACT_CELLS = 4096   # pernas compartilhadas: enumera as células da grade de uniformes até este total
+N_SCENARIOS = 50_000     # amostras quando há pernas compartilhadas/correlação
+
+
+@lru_cache(maxsize=MAX_EXACT_BETS + 1)
+def _all_patterns(n):
+    """Os 2^n padrões de ganha/perde de n apostas (montados uma vez por n, só leitura)."""
+    patterns = ((np.arange(2 ** n)[:, None] >> np.arange(n)) & 1).astype(bool)
+    patterns.flags.writeable = False
+    return patterns
+
+
+def _pack_patterns(won, weights=None):
+    """Agrupa cenários iguais: cada padrão vira um inteiro (bit i = aposta i ganhou) e o unique
+    é 1-D em vez de ordenar linhas."""
+    n = won.shape[1]
+    if n > 62:
+        patterns, inv = np.unique(won, axis=0, return_inverse=True)
+    else:
+        codes = won.astype(np.int64) @ (np.int64(1) << np.arange(n, dtype=np.int64))
+        codes, inv = np.unique(codes, return_inverse=True)
+        patterns = ((codes[:, None] >> np.arange(n)) & 1).astype(bool)
+    w = np.bincount(inv.ravel(), weights=weights, minlength=len(patterns))
+    return patterns, w / w.sum()
+
+
+def _exact_shared(prepared, legs):
+    """Enumeração exata com pernas compartilhadas (rho=0): em cada coluna (partida, grupo) o
+    uniforme só importa pela célula entre os limites das pernas; o produto das células de
+    todas as colunas cobre o espaço de resultados. None se passar de MAX_EXACT_CELLS."""
+    n_groups, col, lo, hi, _ = prepared
+    cuts = [{0.0, 1.0} for _ in range(n_groups)]
+    for acc_legs in legs:
+        for c, a, b in acc_legs:
+            cuts[c].update((min(max(a, 0.0), 1.0), min(max(b, 0.0), 1.0)))
+    cells = [np.array(sorted(c)) for c in cuts]
+    total = int(np.prod([len(c) - 1 for c in cells], dtype=np.float64))
+    if total > MAX_EXACT_CELLS:
+        return None
+    mids = [(c[:-1] + c[1:]) / 2 for c in cells]
+    widths = [np.diff(c) for c in cells]
+    grid = np.stack(np.meshgrid(*mids, indexing='ij'), axis=-1).reshape(-1, n_groups)
+    weights = np.prod(np.stack(np.meshgrid(*widths, indexing='ij'), axis=-1).reshape(-1, n_groups), axis=1)
+    lu = grid[:, col]
+    won = ((lu >= lo) & (lu < hi)).all(axis=2)
+    return _pack_patterns(won, weights)
+
+
+def joint_outcomes(accs, probs_df=None, rho=0.0, n_scenarios=N_SCENARIOS, seed=None):
+    """Espaço conjunto de resultados: (padrões (k, n) bool, probabilidades (k,)).
+    Múltiplas sem partidas em comum e rho=0 são independentes e enumeradas exatamente; com
+    partidas em comum a grade de resultados por partida é enumerada se for pequena. Nos
+    demais casos os padrões vêm de simulação Monte Carlo e são agrupados com pesos."""
+    prepared = prepare_legs(accs, probs_df)
+    n_groups, col, _lo, _hi, legs = prepared
+    n = len(accs)
+    probs = np.array([np.prod([b - a for _c, a, b in l]) for l in legs])
+    shared = len({c for l in legs for c, _a, _b in l}) < sum(len(l) for l in legs)
+    if not rho and not shared and n <= MAX_EXACT_BETS:
+        patterns = _all_patterns(n)
+        weights = np.where(patterns, probs, 1.0 - probs).prod(axis=1)
+        return patterns, weights
+    if not rho:
+        exact = _exact_shared(prepared, legs)
+        if exact is not None:
+            return exact
+    return _pack_patterns(sample_wins(prepared, n_scenarios, np.random.default_rng(seed), rho))
+
+
+def kelly_fractions(odds, patterns, weights, max_iter=50, tol=1e-10):
+    """Frações ótimas de Kelly (completo) para apostas com odds decimais `odds`.
+    patterns: (k, n) bool com os cenários; weights: (k,) probabilidades."""
+    odds = np.asarray(odds, dtype=np.float64)
+    n = len(odds)
+    R = np.where(patterns, odds - 1.0, -1.0)          # retorno por unidade em cada cenário
+    p = np.asarray(weights, dtype=np.float64)
+    f = np.zeros(n)
+
+    def objective(x):
+        w = 1.0 + R @ x
+        return -np.inf if (w <= 0).any() else float(p @ np.log(w))
+
+    obj = 0.0
+    for _ in range(max_iter):
+        w = 1.0 + R @ f
+        grad = R.T @ (p / w)
+        # conjunto ativo: fora dele a caixa [0, 1] não está prendendo a variável
+        free = ~(((f <= 0) & (grad <= 0)) | ((f >= 1) & (grad >= 0)))
+        if not free.any() or np.abs(grad[free]).max() < tol:
+            break
+        Rf = R[:, free]
+        H = (Rf * (p / w ** 2)[:, None]).T @ Rf
+        try:
+            step = np.linalg.solve(H + 1e-12 * np.eye(len(H)), grad[free])
+        except np.linalg.LinAlgError:
+            step = grad[free]
+        direction = np.zeros(n)
+        direction[free] = step
+        t = 1.0
+        while t > 1e-8:
+            cand = np.clip(f + t * direction, 0.0, 1.0)
+            new = objective(cand)
+            if new >= obj:
+                break
+            t *= 0.5
+        else:
+            break
+        gain = new - obj
+        f, obj = cand, new
+        if gain < tol:
+            break
+    return f
+
+
+def round_stakes(balance, accs, probs_df=None, fraction=0.25, min_percent=0.0, max_percent=1.0,
+                 rho=0.0, seed=None):
+    """Stakes (R$) de todas as múltiplas da rodada por Kelly fracionário simultâneo.
+    Apostas com fração ótima zero ficam com stake 0; as demais são limitadas a [min, max] % da banca."""
+    if not accs:
+        return []
+    patterns, weights = joint_outcomes(accs, probs_df, rho=rho, seed=seed)
+    f = kelly_fractions([a['total_odd'] for a in accs], patterns, weights) * fraction
+    f = np.where(f > 1e-6, np.clip(f, min_percent, max_percent), 0.0)
+    return [round(float(balance * x), 2) for x in f]
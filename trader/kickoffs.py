@@ -0,0 +1,79 @@
+# kickoffs.py - calendário de inícios de partida para o agendamento adaptativo de rodadas
+# Fila de prioridade (heap) com os horários de início vindos dos dados do analyzer (com a API,
+# das partidas não iniciadas de fetch_upcoming_from_api — o feed ao vivo só tem jogos já começados):
+# perto de um início as rodadas ficam densas; sem nada iminente o intervalo recua até o máximo.
+import heapq, time
+import numpy as np
+import pandas as pd
+import sys; sys.path.insert(0, ".."); from config import ADAPTIVE_WINDOW_MINUTES, ADAPTIVE_MIN_INTERVAL_MINUTES, ADAPTIVE_IDLE_MINUTES, DEFAULT_KICKOFF_HOUR
+
+
+def kickoff_times(df, default_hour=DEFAULT_KICKOFF_HOUR):
+    """Horários de início (epoch UTC, float) das partidas ainda sem resultado.
+    Usa a coluna 'kickoff' da API; no CSV local, 'date' (só a data recebe `default_hour`)."""
+    if df is None or len(df) == 0:
+        return np.empty(0)
+    pending = df
+    if 'home_goals' in df:
+        pending = df[df['home_goals'].isna()]
+    if 'kickoff' in pending and pending['kickoff'].notna().any():
+        return pending['kickoff'].dropna().to_numpy(dtype=np.float64)
+    if 'date' not in pending:
+        return np.empty(0)
+    dates = pd.to_datetime(pending['date'], errors='coerce', utc=True, format='mixed').dropna()
+    date_only = (dates == dates.dt.normalize()).to_numpy()
+    secs = ((dates - pd.Timestamp(0, tz='UTC')) / pd.Timedelta(seconds=1)).to_numpy(dtype=np.float64)
+    return np.where(date_only, secs + default_hour * 3600.0, secs)
+
+
+class KickoffCalendar:
+    """Heap de inícios futuros (sem repetição) e a política de intervalo entre rodadas."""
+
+    def __init__(self, window_minutes=ADAPTIVE_WINDOW_MINUTES, min_interval_minutes=ADAPTIVE_MIN_INTERVAL_MINUTES,
+                 idle_minutes=ADAPTIVE_IDLE_MINUTES, clock=time.time):
+        self.window = window_minutes * 60.0
+        self.min_interval = min_interval_minutes * 60.0
+        self.idle = idle_minutes * 60.0
+        self.clock = clock
+        self._heap = []
+        self._known = set()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def update(self, times):
+        """Acrescenta horários de início (epoch); retorna quantos eram novos."""
+        now = self.clock()
+        added = 0
+        for t in np.unique(np.asarray(times, dtype=np.float64)):
+            t = float(t)
+            if t > now and t not in self._known:
+                self._known.add(t)
+                heapq.heappush(self._heap, t)
+                added += 1
+        return added
+
+    def update_from_frame(self, df):
+        return self.update(kickoff_times(df))
+
+    def prune(self, now=None):
+        """Remove inícios que já passaram."""
+        now = self.clock() if now is None else now
+        while self._heap and self._heap[0] <= now:
+            self._known.discard(heapq.heappop(self._heap))
+
+    def next_kickoff(self):
+        self.prune()
+        return self._heap[0] if self._heap else None
+
+    def next_delay(self):
+        """Segundos até a próxima rodada: `min_interval` dentro da janela antes de um início;
+        fora dela, dorme até a janela abrir (no máximo `idle`)."""
+        now = self.clock()
+        self.prune(now)
+        if not self._heap:
+            return self.idle
+        until_window = self._heap[0] - self.window - now
+        if until_window <= 0:
+            return self.min_interval
+        return max(self.min_interval, min(self.idle, until_window))
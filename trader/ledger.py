@@ -0,0 +1,483 @@
+# ledger.py - escrita do histórico de apostas em lotes (history.csv, segmentos ou SQLite)
+# As linhas ficam num buffer em memória e vão para o disco quando o buffer enche, quando
+# passa o intervalo máximo ou no fim da rodada. Política de durabilidade explícita:
+#   'none'  - só escreve no buffer do Python/SO (mais rápido, pode perder o último lote)
+#   'flush' - file.flush() a cada lote (sobrevive a crash do processo)
+#   'fsync' - flush + os.fsync a cada lote (sobrevive a queda de energia)
+import atexit, bisect, csv, gzip, json, os, shutil, sqlite3, threading, time
+import pandas as pd
+
+HEADER = ['timestamp', 'type', 'details', 'stake', 'odd', 'result', 'balance']
+DURABILITY = ('none', 'flush', 'fsync')
+
+_encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=str).encode
+
+# ledgers com buffer ou arquivo abertos, fechados (lotes pendentes gravados) no fim do processo.
+# Referência forte até close(): um ledger descartado sem close() ainda grava suas linhas.
+_open_ledgers = set()
+
+
+@atexit.register
+def _close_open_ledgers():
+    for ledger in list(_open_ledgers):
+        ledger.close()
+
+
+class _BufferedLedger:
+    """Base dos ledgers: as linhas ficam num buffer e vão para `_write_rows` em lotes, quando
+    o buffer enche, quando passa `flush_seconds` desde o último lote ou em flush()/close().
+    As subclasses implementam `_write_rows` (e `_close_locked` para liberar recursos)."""
+
+    def __init__(self, buffer_rows=1000, flush_seconds=5.0, durability='flush'):
+        if durability not in DURABILITY:
+            raise ValueError(f"durability deve ser um de {DURABILITY}: {durability!r}")
+        if buffer_rows < 1:
+            raise ValueError(f"buffer_rows deve ser >= 1: {buffer_rows!r}")
+        if flush_seconds < 0:
+            raise ValueError(f"flush_seconds deve ser >= 0: {flush_seconds!r}")
+        self.buffer_rows = buffer_rows
+        self.flush_seconds = flush_seconds
+        self.durability = durability
+        self._rows = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self.rows_written = 0
+        self.flushes = 0
+        _open_ledgers.add(self)
+
+    def append(self, ts, type_, details, stake, odd, result, balance):
+        """Enfileira uma linha; `details` só é serializado na hora do flush."""
+        with self._lock:
+            if not self._rows:
+                _open_ledgers.add(self)  # de novo, se já tinha sido fechado
+            self._rows.append((ts, type_, details, stake, odd, result, balance))
+            due = (len(self._rows) >= self.buffer_rows
+                   or time.monotonic() - self._last_flush >= self.flush_seconds)
+            if due:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        self._last_flush = time.monotonic()
+        if not self._rows:
+            return
+        self._write_rows(self._rows)
+        self.rows_written += len(self._rows)
+        self.flushes += 1
+        self._rows.clear()
+
+    def _write_rows(self, rows):
+        raise NotImplementedError
+
+    def close(self):
+        with self._lock:
+            self._flush_locked()
+            self._close_locked()
+            _open_ledgers.discard(self)
+
+    def _close_locked(self):
+        pass
+
+    @property
+    def pending(self):
+        return len(self._rows)
+
+
+class CsvLedger(_BufferedLedger):
+    """Writer bufferizado do history.csv; o arquivo fica aberto entre os lotes."""
+
+    def __init__(self, path, buffer_rows=1000, flush_seconds=5.0, durability='flush'):
+        self.path = path
+        self._file = None
+        self._writer = None
+        super().__init__(buffer_rows, flush_seconds, durability)
+        if not os.path.exists(path):
+            with open(path, 'w', newline='', encoding='utf-8') as f:
+                csv.writer(f).writerow(HEADER)
+
+    def _open(self):
+        if self._file is None:
+            self._file = open(self.path, 'a', newline='', encoding='utf-8')
+            self._writer = csv.writer(self._file)
+
+    def _write_rows(self, rows):
+        self._open()
+        self._writer.writerows((ts, t, _encode(d), s, o, r, b) for ts, t, d, s, o, r, b in rows)
+        if self.durability != 'none':
+            self._file.flush()
+            if self.durability == 'fsync':
+                os.fsync(self._file.fileno())
+
+    def _close_locked(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._writer = None
+
+    def tail(self, n):
+        """Últimas `n` apostas (arquivo único: lê o histórico inteiro)."""
+        self.flush()
+        return pd.read_csv(self.path, dtype={'details': str}).tail(n).reset_index(drop=True)
+
+    def since(self, ts, until=None):
+        self.flush()
+        df = pd.read_csv(self.path, dtype={'details': str})
+        mask = df['timestamp'] >= str(ts)
+        if until is not None:
+            mask &= df['timestamp'] <= str(until)
+        return df[mask].reset_index(drop=True)
+
+
+SEGMENT_INDEX = 'index.json'
+ROLL_POLICIES = ('daily', 'size')
+
+
+class HistoryArchive:
+    """Leitura do histórico segmentado: diretório com segmentos CSV (os frios em .csv.gz) e um
+    index.json com, por segmento, nome, primeiro/último timestamp, linhas e bytes.
+    "Últimas N apostas" e "apostas desde T" só abrem os segmentos necessários."""
+
+    def __init__(self, path):
+        self.path = path
+        self.index_path = os.path.join(path, SEGMENT_INDEX)
+        self.segments = []
+        if os.path.exists(self.index_path):
+            with open(self.index_path, encoding='utf-8') as f:
+                self.segments = json.load(f)['segments']
+
+    def flush(self):
+        pass
+
+    def __len__(self):
+        return sum(seg['rows'] for seg in self.segments)
+
+    def read_segment(self, seg):
+        # compressão inferida pela extensão (.csv.gz)
+        return pd.read_csv(os.path.join(self.path, seg['name']), dtype={'details': str})
+
+    def _read(self, segments):
+        frames = [self.read_segment(seg) for seg in segments if seg['rows']]
+        if not frames:
+            return pd.DataFrame(columns=HEADER)
+        return pd.concat(frames, ignore_index=True)
+
+    def tail(self, n):
+        """Últimas `n` apostas, lendo só os segmentos finais que as contêm."""
+        self.flush()
+        needed, count = [], 0
+        for seg in reversed(self.segments):
+            if count >= n:
+                break
+            needed.append(seg)
+            count += seg['rows']
+        return self._read(reversed(needed)).tail(n).reset_index(drop=True)
+
+    def since(self, ts, until=None):
+        """Apostas com timestamp em [ts, until]; busca binária no índice pelo primeiro segmento."""
+        self.flush()
+        ends = [seg['end'] for seg in self.segments]
+        first = bisect.bisect_left(ends, str(ts))
+        segs = self.segments[first:]
+        if until is not None:
+            segs = [seg for seg in segs if seg['start'] <= str(until)]
+        df = self._read(segs)
+        mask = df['timestamp'] >= str(ts)
+        if until is not None:
+            mask &= df['timestamp'] <= str(until)
+        return df[mask].reset_index(drop=True)
+
+    def read_all(self):
+        self.flush()
+        return self._read(self.segments)
+
+
+class SegmentedLedger(_BufferedLedger, HistoryArchive):
+    """Ledger em segmentos: o segmento quente recebe os lotes (mesma interface do CsvLedger) e
+    vira um novo a cada dia ('daily') ou ao passar de `max_bytes`; o anterior é comprimido."""
+
+    def __init__(self, path, buffer_rows=1000, flush_seconds=5.0, durability='flush',
+                 roll='daily', max_bytes=8 * 1024 * 1024, legacy_csv=None):
+        if roll not in ROLL_POLICIES:
+            raise ValueError(f"roll deve ser um de {ROLL_POLICIES}: {roll!r}")
+        self.roll = roll
+        self.max_bytes = max_bytes
+        self._file = None
+        self._writer = None
+        self.segments = []
+        _BufferedLedger.__init__(self, buffer_rows, flush_seconds, durability)
+        os.makedirs(path, exist_ok=True)
+        HistoryArchive.__init__(self, path)
+        if legacy_csv and not self.segments and os.path.exists(legacy_csv):
+            self._adopt(legacy_csv)
+        self._reconcile()
+
+    # ---- índice e segmentos ------------------------------------------------------------
+
+    def _save_index(self):
+        tmp = self.index_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'segments': self.segments}, f, indent=1)
+        os.replace(tmp, self.index_path)
+
+    def _hot(self):
+        if self.segments and not self.segments[-1]['compressed']:
+            return self.segments[-1]
+        return None
+
+    def _scan(self, seg):
+        """Recalcula linhas, intervalo e tamanho de um segmento lendo o arquivo."""
+        df = self.read_segment(seg)
+        seg['rows'] = len(df)
+        if len(df):
+            seg['start'], seg['end'] = str(df['timestamp'].iloc[0]), str(df['timestamp'].iloc[-1])
+        seg['bytes'] = os.path.getsize(os.path.join(self.path, seg['name']))
+
+    def _adopt(self, legacy_csv):
+        """Move um history.csv antigo para o arquivo como primeiro segmento (comprimido)."""
+        seg = {'name': 'history-legacy.csv', 'start': '', 'end': '', 'rows': 0, 'bytes': 0, 'compressed': False}
+        shutil.move(legacy_csv, os.path.join(self.path, seg['name']))
+        self._scan(seg)
+        self.segments.append(seg)
+        self._compress(seg)
+
+    def _reconcile(self):
+        """Depois de um crash o segmento quente pode ter linhas que o índice ainda não conhece."""
+        seg = self._hot()
+        if seg is not None and os.path.getsize(os.path.join(self.path, seg['name'])) != seg['bytes']:
+            self._scan(seg)
+            self._save_index()
+
+    def _compress(self, seg):
+        src = os.path.join(self.path, seg['name'])
+        with open(src, 'rb') as fin, gzip.open(src + '.gz', 'wb') as fout:
+            shutil.copyfileobj(fin, fout)
+        seg['name'] += '.gz'
+        seg['compressed'] = True
+        seg['bytes'] = os.path.getsize(src + '.gz')
+        self._save_index()
+        os.remove(src)
+
+    def _new_segment(self, ts):
+        name = f"history-{ts[:10].replace('-', '')}-{len(self.segments):05d}.csv"
+        with open(os.path.join(self.path, name), 'w', newline='', encoding='utf-8') as f:
+            csv.writer(f).writerow(HEADER)
+        seg = {'name': name, 'start': ts, 'end': ts, 'rows': 0,
+               'bytes': os.path.getsize(os.path.join(self.path, name)), 'compressed': False}
+        self.segments.append(seg)
+        return seg
+
+    def _needs_roll(self, seg, ts):
+        if seg['bytes'] >= self.max_bytes:
+            return True
+        return self.roll == 'daily' and seg['rows'] > 0 and ts[:10] != seg['start'][:10]
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._writer = None
+
+    # ---- escrita -----------------------------------------------------------------------
+
+    def _sync(self, seg):
+        if self.durability != 'none':
+            self._file.flush()
+            if self.durability == 'fsync':
+                os.fsync(self._file.fileno())
+        seg['bytes'] = self._file.tell()
+
+    def _write_rows(self, rows):
+        seg = self._hot()
+        for ts, t, d, s, o, r, b in rows:
+            ts = str(ts)
+            if seg is None or self._needs_roll(seg, ts):
+                if seg is not None:
+                    if self._file is not None:
+                        self._sync(seg)
+                    self._close_file()
+                    self._compress(seg)
+                seg = self._new_segment(ts)
+            if self._file is None:
+                self._file = open(os.path.join(self.path, seg['name']), 'a', newline='', encoding='utf-8')
+                self._writer = csv.writer(self._file)
+            self._writer.writerow((ts, t, _encode(d), s, o, r, b))
+            seg['rows'] += 1
+            seg['end'] = ts
+            if seg['rows'] % 1024 == 0:
+                seg['bytes'] = self._file.tell()
+        self._sync(seg)
+        self._save_index()
+
+    def _close_locked(self):
+        self._close_file()
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bets (
+    id INTEGER PRIMARY KEY,
+    ts TEXT NOT NULL,
+    type TEXT NOT NULL,
+    stake REAL NOT NULL,
+    odd REAL NOT NULL,
+    result TEXT NOT NULL,
+    pnl REAL NOT NULL,
+    balance REAL NOT NULL,
+    total_odd REAL,
+    details TEXT
+);
+CREATE TABLE IF NOT EXISTS selections (
+    bet_id INTEGER NOT NULL REFERENCES bets(id),
+    fixture TEXT,
+    market TEXT,
+    odd REAL,
+    conf REAL
+);
+CREATE INDEX IF NOT EXISTS ix_bets_ts ON bets(ts);
+CREATE INDEX IF NOT EXISTS ix_bets_type ON bets(type);
+CREATE INDEX IF NOT EXISTS ix_bets_result ON bets(result);
+CREATE INDEX IF NOT EXISTS ix_sel_fixture ON selections(fixture);
+CREATE INDEX IF NOT EXISTS ix_sel_market ON selections(market);
+CREATE INDEX IF NOT EXISTS ix_sel_bet ON selections(bet_id);
+"""
+_SYNCHRONOUS = {'none': 'OFF', 'flush': 'NORMAL', 'fsync': 'FULL'}
+SETTLED_RESULTS = ('win', 'lose')
+
+
+def bet_pnl(stake, odd, result):
+    """Lucro/prejuízo de uma aposta liquidada (mesma regra de BankrollManager.record)."""
+    if result == 'win':
+        return round(stake * (odd - 1.0), 2)
+    if result == 'lose':
+        return -stake
+    return 0.0
+
+
+def _fixture_key(sel):
+    key = sel.get('fixture_id', sel.get('fixture', sel.get('idx')))
+    return None if key is None else str(key)
+
+
+class SqliteLedger(_BufferedLedger):
+    """Ledger em SQLite (modo WAL) com seleções normalizadas e índices por data/tipo/partida.
+    Mesma interface de escrita do CsvLedger (append/flush/close) mais uma API de consultas."""
+
+    def __init__(self, path, buffer_rows=1000, flush_seconds=5.0, durability='flush'):
+        super().__init__(buffer_rows, flush_seconds, durability)
+        self.path = path
+        self.conn = None
+        self._connect()
+
+    def _connect(self):
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute(f'PRAGMA synchronous={_SYNCHRONOUS[self.durability]}')
+        self.conn.executescript(SCHEMA)
+
+    # ---- escrita -----------------------------------------------------------------------
+
+    def _write_rows(self, rows):
+        if self.conn is None:  # gravação depois de close(): reabre, como o CsvLedger
+            self._connect()
+        with self.conn:  # uma transação por lote
+            cur = self.conn.cursor()
+            for ts, type_, details, stake, odd, result, balance in rows:
+                details = details if isinstance(details, dict) else {'details': details}
+                cur.execute('INSERT INTO bets (ts, type, stake, odd, result, pnl, balance, total_odd, details) '
+                            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                            (ts, type_, stake, odd, result, bet_pnl(stake, odd, result), balance,
+                             details.get('total_odd'), _encode(details)))
+                bet_id = cur.lastrowid
+                sels = details.get('selections') or []
+                cur.executemany('INSERT INTO selections (bet_id, fixture, market, odd, conf) VALUES (?, ?, ?, ?, ?)',
+                                [(bet_id, _fixture_key(s), s.get('market'), s.get('odd'), s.get('conf'))
+                                 for s in sels if isinstance(s, dict)])
+
+    def _close_locked(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    # ---- consultas ---------------------------------------------------------------------
+
+    def query(self, sql, params=()):
+        self.flush()
+        return pd.read_sql_query(sql, self.conn, params=params)
+
+    def tail(self, n):
+        """Últimas `n` apostas no formato do history.csv."""
+        df = self.query('SELECT ts AS timestamp, type, details, stake, odd, result, balance FROM bets '
+                        'ORDER BY id DESC LIMIT ?', (int(n),))
+        return df.iloc[::-1].reset_index(drop=True)
+
+    def since(self, ts, until=None):
+        return self.query('SELECT ts AS timestamp, type, details, stake, odd, result, balance FROM bets '
+                          'WHERE ts >= ? AND ts <= ? ORDER BY id', (str(ts), str(until or '9999')))
+
+    def equity_curve(self, since=None, until=None):
+        """Saldo após cada aposta (ts, balance, pnl) no intervalo [since, until]."""
+        return self.query('SELECT ts, balance, pnl FROM bets WHERE ts >= ? AND ts <= ? ORDER BY id',
+                          (since or '', until or '9999'))
+
+    def balance_at(self, ts):
+        """Saldo registrado na última aposta até `ts` (None se não houver)."""
+        df = self.query('SELECT balance FROM bets WHERE ts <= ? ORDER BY ts DESC, id DESC LIMIT 1', (ts,))
+        return None if df.empty else float(df['balance'].iloc[0])
+
+    def pnl_by_type(self):
+        return self.query('SELECT type, COUNT(*) AS bets, SUM(stake) AS turnover, SUM(pnl) AS pnl '
+                          'FROM bets GROUP BY type ORDER BY type')
+
+    def pnl_by_market(self):
+        """P&L das apostas por mercado das seleções (uma múltipla mista conta em cada mercado)."""
+        return self.query('SELECT s.market, COUNT(DISTINCT b.id) AS bets, SUM(b.stake) AS turnover, '
+                          'SUM(b.pnl) AS pnl FROM (SELECT DISTINCT bet_id, market FROM selections) s '
+                          'JOIN bets b ON b.id = s.bet_id GROUP BY s.market ORDER BY s.market')
+
+    def open_bets(self):
+        """Apostas ainda não liquidadas (resultado diferente de win/lose)."""
+        marks = ', '.join('?' * len(SETTLED_RESULTS))
+        return self.query('SELECT id, ts, type, stake, odd, result, details FROM bets '
+                          f'WHERE result NOT IN ({marks}) ORDER BY id', SETTLED_RESULTS)
+
+    def bets_for_fixture(self, fixture):
+        return self.query('SELECT b.id, b.ts, b.type, b.stake, b.odd, b.result, b.pnl, s.market, s.odd AS leg_odd '
+                          'FROM selections s JOIN bets b ON b.id = s.bet_id WHERE s.fixture = ? ORDER BY b.id',
+                          (str(fixture),))
+
+    def import_csv(self, csv_path, chunksize=50_000):
+        """Importa um history.csv (ou o diretório segmentado); retorna o número de apostas importadas."""
+        total = 0
+        if os.path.isdir(csv_path):  # histórico segmentado: um segmento por vez
+            archive = HistoryArchive(csv_path)
+            chunks = (archive.read_segment(seg) for seg in archive.segments)
+        else:
+            chunks = pd.read_csv(csv_path, chunksize=chunksize, dtype={'details': str})
+        for chunk in chunks:
+            rows = []
+            for row in chunk.itertuples(index=False):
+                try:
+                    details = json.loads(row.details) if isinstance(row.details, str) else {}
+                except ValueError:
+                    details = {'raw': row.details}
+                rows.append((row.timestamp, row.type, details, float(row.stake), float(row.odd),
+                             row.result, float(row.balance)))
+            with self._lock:  # o buffer é compartilhado com append() de outras threads
+                self._rows.extend(rows)
+                self._flush_locked()
+            total += len(chunk)
+        return total
+
+
+def open_ledger(backend, results_dir, roll='daily', segment_bytes=8 * 1024 * 1024, **kwargs):
+    """Ledger configurado: 'segments' (results/history/), 'csv' (history.csv) ou 'sqlite' (ledger.db)."""
+    if backend == 'segments':
+        return SegmentedLedger(os.path.join(results_dir, 'history'), roll=roll, max_bytes=segment_bytes,
+                               legacy_csv=os.path.join(results_dir, 'history.csv'), **kwargs)
+    if backend == 'sqlite':
+        return SqliteLedger(os.path.join(results_dir, 'ledger.db'), **kwargs)
+    if backend == 'csv':
+        return CsvLedger(os.path.join(results_dir, 'history.csv'), **kwargs)
+    raise ValueError(f"backend de ledger desconhecido: {backend!r}")
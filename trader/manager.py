@@ -1,24 +1,181 @@
 # manager.py - gestão de bankroll, stakes e histórico
-import csv, os, json
+# Seguro para várias threads: saldo, reservas, agregados e ledger mudam sob o mesmo lock, então
+# workers concorrentes nunca perdem atualizações. Uma aposta reserva a stake (reserve), fica
+# pendente e depois é liquidada (settle) ou cancelada (release) de forma atômica.
+import itertools, threading
+from multiprocessing.managers import BaseManager
 from datetime import datetime
-import sys; sys.path.insert(0, ".."); from config import BANKROLL_INITIAL, MIN_STAKE_PERCENT, MAX_STAKE_PERCENT, RESULTS_DIR, DRY_RUN
+import sys; sys.path.insert(0, ".."); from config import BANKROLL_INITIAL, MIN_STAKE_PERCENT, MAX_STAKE_PERCENT, RESULTS_DIR, DRY_RUN, KELLY_FRACTION
+from config import LEDGER_BUFFER_ROWS, LEDGER_FLUSH_SECONDS, LEDGER_DURABILITY, LEDGER_BACKEND
+from config import LEDGER_SEGMENT_ROLL, LEDGER_SEGMENT_BYTES
+from kelly import round_stakes
+from ledger import open_ledger, bet_pnl
+from tracing import traced
+
+
+class RunningStats:
+    """Agregados da carteira atualizados em O(1) a cada aposta registrada: pico e drawdown da
+    banca, média/variância do retorno por aposta (Welford), giro, lucro e contagens."""
+
+    def __init__(self, balance):
+        self.peak = float(balance)
+        self.max_drawdown = 0.0          # fração do pico
+        self.max_drawdown_value = 0.0    # em R$
+        self.n_returns = 0               # apostas liquidadas (win/lose)
+        self.mean_return = 0.0           # retorno por unidade apostada
+        self._m2 = 0.0
+        self.turnover = 0.0
+        self.profit = 0.0
+        self.by_result = {}
+        self.by_type = {}
+        self.day = ''
+        self.day_turnover = 0.0
+        self.day_profit = 0.0
+        self.day_bets = 0
+
+    def update(self, type_, stake, odd, result, balance, ts):
+        pnl = bet_pnl(stake, odd, result)
+        self.by_result[result] = self.by_result.get(result, 0) + 1
+        self.by_type[type_] = self.by_type.get(type_, 0) + 1
+        self.turnover += stake
+        self.profit += pnl
+        day = ts[:10]
+        if day != self.day:
+            self.day, self.day_turnover, self.day_profit, self.day_bets = day, 0.0, 0.0, 0
+        self.day_turnover += stake
+        self.day_profit += pnl
+        self.day_bets += 1
+        if result in ('win', 'lose') and stake > 0:
+            self.n_returns += 1
+            r = pnl / stake
+            delta = r - self.mean_return
+            self.mean_return += delta / self.n_returns
+            self._m2 += delta * (r - self.mean_return)
+        if balance > self.peak:
+            self.peak = float(balance)
+        dd = self.peak - balance
+        if dd > self.max_drawdown_value:
+            self.max_drawdown_value = float(dd)
+        if self.peak > 0 and dd / self.peak > self.max_drawdown:
+            self.max_drawdown = float(dd / self.peak)
+
+    @property
+    def var_return(self):
+        return self._m2 / (self.n_returns - 1) if self.n_returns > 1 else 0.0
+
+    def summary(self, balance):
+        """Métricas derivadas (ROI, taxa de acerto, drawdown atual) mais os agregados crus."""
+        wins, losses = self.by_result.get('win', 0), self.by_result.get('lose', 0)
+        return {
+            'peak': self.peak,
+            'drawdown': (self.peak - balance) / self.peak if self.peak > 0 else 0.0,
+            'max_drawdown': self.max_drawdown,
+            'max_drawdown_value': self.max_drawdown_value,
+            'bets': sum(self.by_result.values()),
+            'turnover': round(self.turnover, 2),
+            'profit': round(self.profit, 2),
+            'roi': self.profit / self.turnover if self.turnover else 0.0,
+            'win_rate': wins / (wins + losses) if wins + losses else 0.0,
+            'mean_return': self.mean_return,
+            'std_return': self.var_return ** 0.5,
+            'n_returns': self.n_returns,
+            'm2_return': self._m2,
+            'by_result': dict(self.by_result),
+            'by_type': dict(self.by_type),
+            'today': {'date': self.day, 'bets': self.day_bets,
+                      'turnover': round(self.day_turnover, 2), 'profit': round(self.day_profit, 2)},
+        }
+
+    @classmethod
+    def from_dict(cls, data, balance):
+        """Reconstrói os agregados a partir de summary() salvo no state.json."""
+        obj = cls(balance)
+        obj.peak = float(data.get('peak', balance))
+        obj.max_drawdown = float(data.get('max_drawdown', 0.0))
+        obj.max_drawdown_value = float(data.get('max_drawdown_value', 0.0))
+        obj.n_returns = int(data.get('n_returns', 0))
+        obj.mean_return = float(data.get('mean_return', 0.0))
+        obj._m2 = float(data.get('m2_return', 0.0))
+        obj.turnover = float(data.get('turnover', 0.0))
+        obj.profit = float(data.get('profit', 0.0))
+        obj.by_result = dict(data.get('by_result', {}))
+        obj.by_type = dict(data.get('by_type', {}))
+        today = data.get('today', {})
+        obj.day = today.get('date', '')
+        obj.day_bets = int(today.get('bets', 0))
+        obj.day_turnover = float(today.get('turnover', 0.0))
+        obj.day_profit = float(today.get('profit', 0.0))
+        return obj
+
 
 class BankrollManager:
-    def __init__(self, initial=None):
+    def __init__(self, initial=None, ledger=None, clock=None):
         self.initial = initial or BANKROLL_INITIAL
         self.balance = float(self.initial)
-        self.history_file = os.path.join(RESULTS_DIR, 'history.csv')
-        if not os.path.exists(self.history_file):
-            with open(self.history_file, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(['timestamp','type','details','stake','odd','result','balance'])
+        self.clock = clock or datetime.utcnow  # relógio dos timestamps (virtual no replay)
+        if ledger is None:
+            ledger = open_ledger(LEDGER_BACKEND, RESULTS_DIR, buffer_rows=LEDGER_BUFFER_ROWS,
+                                 flush_seconds=LEDGER_FLUSH_SECONDS, durability=LEDGER_DURABILITY,
+                                 roll=LEDGER_SEGMENT_ROLL, segment_bytes=LEDGER_SEGMENT_BYTES)
+        self.ledger = ledger
+        self.history_file = self.ledger.path
+        self.stats = RunningStats(self.balance)
+        self._lock = threading.RLock()
+        self._reservations = {}          # id -> stake reservada
+        self._next_id = itertools.count(1)
+
+    @property
+    def reserved(self):
+        with self._lock:
+            return sum(self._reservations.values())
+
+    @property
+    def available(self):
+        """Saldo livre: balance menos as stakes reservadas e ainda não liquidadas."""
+        with self._lock:
+            return self.balance - self.reserved
 
     def stake_for(self, percent=None):
         p = percent or MIN_STAKE_PERCENT
         p = max(MIN_STAKE_PERCENT, min(MAX_STAKE_PERCENT, p))
-        return round(self.balance * p, 2)
+        return round(self.available * p, 2)
+
+    @traced('manager.stakes_for_round')
+    def stakes_for_round(self, accs, probs_df=None, fraction=KELLY_FRACTION, corr=0.0):
+        """Stakes de todas as múltiplas da rodada de uma vez (Kelly fracionário simultâneo),
+        respeitando MIN/MAX_STAKE_PERCENT; apostas sem vantagem recebem stake 0."""
+        return round_stakes(self.available, accs, probs_df, fraction=fraction,
+                            min_percent=MIN_STAKE_PERCENT, max_percent=MAX_STAKE_PERCENT, rho=corr)
+
+    def reserve(self, stake):
+        """Reserva `stake` do saldo livre; retorna o id da reserva ou None se não houver saldo."""
+        if stake <= 0:
+            return None
+        with self._lock:
+            if stake > self.balance - self.reserved + 1e-9:
+                return None
+            rid = next(self._next_id)
+            self._reservations[rid] = float(stake)
+            return rid
+
+    def release(self, rid):
+        """Cancela uma reserva sem registrar aposta; retorna a stake liberada."""
+        with self._lock:
+            return self._reservations.pop(rid, 0.0)
+
+    @traced('manager.settle')
+    def settle(self, rid, type_, details, odd, result):
+        """Liquida uma reserva: registra a aposta com a stake reservada e libera a reserva."""
+        with self._lock:
+            stake = self._reservations.pop(rid)
+            self._record_locked(type_, details, stake, odd, result)
+            return stake
 
     def record(self, type_, details, stake, odd, result):
+        with self._lock:
+            self._record_locked(type_, details, stake, odd, result)
+
+    def _record_locked(self, type_, details, stake, odd, result):
         # result: 'win' or 'lose' or 'void'
         if result == 'win':
             profit = round(stake * (odd - 1.0), 2)
@@ -26,10 +183,50 @@ class BankrollManager:
         elif result == 'lose':
             self.balance -= stake
         # void -> no change
-        ts = datetime.utcnow().isoformat(sep=' ', timespec='seconds')
-        with open(self.history_file, 'a', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow([ts, type_, json.dumps(details, ensure_ascii=False), stake, odd, result, self.balance])
+        ts = self.clock().isoformat(sep=' ', timespec='seconds')
+        self.stats.update(type_, stake, odd, result, self.balance, ts)
+        self.ledger.append(ts, type_, details, stake, odd, result, self.balance)
+
+    def history(self, last=None, since=None):
+        """Histórico de apostas (DataFrame no formato do history.csv): as últimas `last` ou as
+        registradas desde `since`; no backend segmentado só os segmentos necessários são lidos."""
+        if since is None and last is not None:
+            return self.ledger.tail(last)
+        df = self.ledger.since(since or '')
+        return df if last is None else df.tail(last).reset_index(drop=True)
+
+    @traced('manager.flush', io='disk')
+    def flush(self):
+        """Grava no disco as linhas pendentes do histórico (chamado no fim de cada rodada)."""
+        self.ledger.flush()
+
+    def close(self):
+        self.ledger.close()
 
     def snapshot(self):
-        return {'initial': self.initial, 'balance': self.balance}
+        with self._lock:
+            return {'initial': self.initial, 'balance': self.balance, 'reserved': self.reserved,
+                    'stats': self.stats.summary(self.balance)}
+
+    def restore(self, state):
+        """Recarrega saldo e agregados de um snapshot() salvo (state.json)."""
+        with self._lock:
+            self.balance = float(state['balance'])
+            self.stats = RunningStats.from_dict(state.get('stats') or {}, self.balance)
+
+
+class BankrollServer(BaseManager):
+    """Servidor de bankroll para workers em outros processos (proxies chamam os métodos sob o lock)."""
+
+
+BankrollServer.register('BankrollManager', BankrollManager,
+                        exposed=('reserve', 'release', 'settle', 'record', 'stake_for', 'stakes_for_round',
+                                 'snapshot', 'flush', 'close'))
+
+
+def serve_bankroll(initial=None):
+    """Inicia o servidor e retorna (server, proxy); passe o proxy aos processos e chame
+    server.shutdown() no fim."""
+    server = BankrollServer()
+    server.start()
+    return server, server.BankrollManager(initial)
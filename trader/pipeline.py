@@ -0,0 +1,177 @@
+# pipeline.py - rodada em estágios: fetch -> enrich -> select -> build -> stake -> simulate -> record
+# Cada estágio roda uma única vez por rodada, recebe o resultado tipado do anterior e tem seu
+# tempo medido em RoundResult.timings (segundos).
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+import pandas as pd
+from analyzer import load_fixtures_local, fetch_fixtures_from_api, fetch_results_from_api, fetch_upcoming_from_api
+from analyzer import enrich_with_probs
+from analyzer import get_enrichment_cache
+from bet_engine import select_value_selections, build_accumulators
+from ratings import get_ratings
+from simulator import simulate_accumulators, SimulationReport
+import sys; sys.path.insert(0, ".."); from config import DRY_RUN, API_FOOTBALL_LEAGUES, PREFETCH_WAIT_SECONDS
+
+try:
+    from logger import logger
+except ImportError:
+    import logging
+    logger = logging.getLogger(__name__)
+
+STAGES = ('fetch', 'enrich', 'select', 'build', 'stake', 'simulate', 'record')
+
+
+@dataclass
+class RoundResult:
+    """Saídas de cada estágio de uma rodada."""
+    fixtures: Optional[pd.DataFrame] = None
+    source: str = ''                        # 'api' ou 'local'
+    enriched: Optional[pd.DataFrame] = None
+    candidates: List[dict] = field(default_factory=list)
+    accumulators: List[dict] = field(default_factory=list)
+    stakes: List[float] = field(default_factory=list)
+    simulation: Optional[SimulationReport] = None
+    recorded: int = 0
+    new_results: int = 0                    # resultados ingeridos pelos ratings
+    cache_stats: dict = field(default_factory=dict)
+    timings: dict = field(default_factory=dict)
+
+    @property
+    def total_time(self):
+        return sum(self.timings.values())
+
+
+class RoundPipeline:
+    """Executa uma rodada completa; os estágios podem ser sobrescritos individualmente."""
+
+    def __init__(self, bank, dry_run=DRY_RUN, leagues=None, cache=None, notify=None, conf_threshold=0.60,
+                 n_sims=20_000, corr=0.0, ratings=None, use_cache=True, prefetcher=None):
+        self.bank = bank
+        self.prefetcher = prefetcher  # prefetch.Prefetcher com os dados da próxima rodada
+        self.ratings = ratings  # None = store compartilhado (persistido em RATINGS_FILE)
+        self.dry_run = dry_run
+        self.leagues = API_FOOTBALL_LEAGUES if leagues is None else leagues
+        # sem cache quando os ratings mudam a cada rodada (replay): a assinatura invalidaria tudo
+        self.cache = None if not use_cache else get_enrichment_cache() if cache is None else cache
+        self.notify = notify
+        self.conf_threshold = conf_threshold
+        self.n_sims = n_sims    # 0 desliga a simulação Monte Carlo
+        self.corr = corr        # correlação entre partidas na simulação
+
+    # ---- estágios ----------------------------------------------------------------------
+
+    def fetch(self):
+        """Fixtures da busca antecipada, se ainda frescas; senão busca agora."""
+        if self.prefetcher is not None:
+            data = self.prefetcher.get(wait=PREFETCH_WAIT_SECONDS)
+            if data is not None:
+                return data
+        return self.fetch_now()
+
+    def fetch_now(self):
+        """Fixtures ao vivo via API; senão CSV local."""
+        df = fetch_fixtures_from_api(self.leagues or None)
+        if df is None:
+            logger.warning("API indisponível, usando dados locais")
+            return load_fixtures_local(), 'local'
+        return df, 'api'
+
+    def fetch_results(self):
+        """Partidas encerradas recentes (com placar) para os ratings; None sem API."""
+        return fetch_results_from_api()
+
+    def fetch_upcoming(self):
+        """Partidas ainda não iniciadas (inícios para o calendário adaptativo); None sem API."""
+        return fetch_upcoming_from_api()
+
+    def learn(self, df):
+        """Ingere os resultados novos de `df` nos ratings (salvos quando são os compartilhados)."""
+        ratings = get_ratings() if self.ratings is None else self.ratings
+        new_results = ratings.update_from_frame(df)
+        if new_results and self.ratings is None:
+            ratings.save()
+        return new_results
+
+    def enrich(self, df):
+        """Atualiza ratings com resultados novos e adiciona as probabilidades."""
+        new_results = self.learn(df)
+        ratings = get_ratings() if self.ratings is None else self.ratings
+        return enrich_with_probs(df, ratings=ratings, cache=self.cache), new_results
+
+    def select(self, dfp):
+        return select_value_selections(dfp, conf_threshold=self.conf_threshold)
+
+    def build(self, candidates):
+        return build_accumulators(candidates)
+
+    def stake(self, accs, dfp):
+        """Kelly simultâneo sobre o espaço conjunto de resultados da rodada."""
+        return self.bank.stakes_for_round(accs, dfp, corr=self.corr)
+
+    def simulate(self, accs, dfp, stakes):
+        """EV, variância e distribuição de P&L das múltiplas da rodada (Monte Carlo)."""
+        if not accs or not self.n_sims:
+            return None
+        return simulate_accumulators(accs, dfp, stakes, n_sims=self.n_sims, rho=self.corr)
+
+    def record(self, accs, stakes):
+        count = 0
+        for i, (acc, stake) in enumerate(zip(accs, stakes), 1):
+            if stake <= 0:
+                continue  # Kelly sem vantagem: não aposta
+            rid = self.bank.reserve(stake)
+            if rid is None:
+                logger.warning(f"Saldo livre insuficiente para a aposta {i} (R$ {stake:.2f})")
+                continue
+            details = {'selections': acc['selections'], 'total_odd': acc['total_odd']}
+            if self.dry_run:
+                logger.info(f"[DRY_RUN] Aposta {i}: R$ {stake:.2f} @ {acc['total_odd']:.2f}")
+                msg = f"[DRY_RUN] Apostaria R$ {stake} em múltipla odd {acc['total_odd']:.2f}"
+            else:
+                logger.warning(f"[SIMULAÇÃO] Aposta {i}: R$ {stake:.2f} @ {acc['total_odd']:.2f}")
+                msg = f"[SIM] Apostado R$ {stake} em múltipla odd {acc['total_odd']:.2f}"
+            if self.notify:
+                self.notify(msg)
+            self.bank.settle(rid, 'multiple', details, acc['total_odd'], 'void')
+            count += 1
+        return count
+
+    # ---- execução ----------------------------------------------------------------------
+
+    def run(self, fixtures=None):
+        """Roda todos os estágios em ordem; `fixtures` pula o fetch (ex.: replay)."""
+        res = RoundResult()
+        t = time.perf_counter()
+
+        def lap(stage):
+            nonlocal t
+            now = time.perf_counter()
+            res.timings[stage] = now - t
+            t = now
+
+        learned = 0
+        if fixtures is None:
+            res.fixtures, res.source = self.fetch()
+            if res.source == 'api':
+                # o feed ao vivo não traz placares finais: os ratings treinam com os encerrados
+                learned = self.learn(self.fetch_results())
+        else:
+            res.fixtures, res.source = fixtures, 'given'
+        lap('fetch')
+        res.enriched, res.new_results = self.enrich(res.fixtures)
+        res.new_results += learned
+        res.cache_stats = dict(self.cache.last_stats) if self.cache is not None else {}
+        lap('enrich')
+        res.candidates = self.select(res.enriched)
+        lap('select')
+        res.accumulators = self.build(res.candidates)
+        lap('build')
+        res.stakes = self.stake(res.accumulators, res.enriched)
+        lap('stake')
+        res.simulation = self.simulate(res.accumulators, res.enriched, res.stakes)
+        lap('simulate')
+        res.recorded = self.record(res.accumulators, res.stakes)
+        self.bank.flush()  # fim da rodada: histórico pendente vai para o disco
+        lap('record')
+        return res
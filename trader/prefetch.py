@@ -0,0 +1,98 @@
+# prefetch.py - busca antecipada dos dados da próxima rodada
+# Uma thread em segundo plano busca fixtures/odds pouco antes da próxima rodada (ou já, se
+# pedida sem atraso) e entrega o resultado por uma fila limitada. Dados mais velhos que
+# `max_age` nunca são usados: a rodada descarta e faz a busca normal.
+import queue, threading, time
+import sys; sys.path.insert(0, ".."); from config import PREFETCH_MAX_AGE_SECONDS, PREFETCH_LEAD_SECONDS
+
+try:
+    from logger import logger
+except ImportError:
+    import logging
+    logger = logging.getLogger(__name__)
+
+
+class Prefetcher:
+    """Busca `fetch()` em segundo plano; `get()` devolve o resultado mais recente se ainda fresco."""
+
+    def __init__(self, fetch, max_age=PREFETCH_MAX_AGE_SECONDS, lead=PREFETCH_LEAD_SECONDS, maxsize=1,
+                 clock=time.monotonic):
+        self.fetch = fetch
+        self.max_age = max_age
+        self.lead = lead
+        self.clock = clock
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._cond = threading.Condition()
+        self._due = None            # instante (clock) da próxima busca agendada
+        self._in_flight = False
+        self._closed = False
+        self.stats = {'fetched': 0, 'used': 0, 'stale': 0, 'missed': 0, 'errors': 0}
+        self._thread = threading.Thread(target=self._worker, name='prefetch', daemon=True)
+        self._thread.start()  # por último: o worker já usa stats e o resto do estado
+
+    def schedule(self, delay=0.0):
+        """Agenda a busca para `lead` segundos antes de uma rodada que começa em `delay` segundos
+        (substitui um agendamento pendente)."""
+        with self._cond:
+            self._due = self.clock() + max(0.0, delay - self.lead)
+            self._cond.notify()
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._closed and (self._due is None or self._due > self.clock()):
+                    self._cond.wait(None if self._due is None else self._due - self.clock())
+                if self._closed:
+                    return
+                self._due = None
+                self._in_flight = True
+            try:
+                item = (self.clock(), self.fetch())
+                self.stats['fetched'] += 1
+                self._put(item)
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.warning(f"Prefetch falhou: {e}")
+            with self._cond:
+                self._in_flight = False
+                self._cond.notify_all()
+
+    def _put(self, item):
+        # fila limitada: o item mais novo substitui o mais antigo
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def get(self, wait=0.0):
+        """Resultado fresco de fetch() ou None. Se uma busca estiver em andamento espera até
+        `wait` segundos por ela (sobreposição com a rodada que está começando)."""
+        if wait:
+            with self._cond:
+                self._cond.wait_for(lambda: not self._in_flight or self._closed, timeout=wait)
+        item = None
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+        if item is None:
+            self.stats['missed'] += 1
+            return None
+        fetched_at, data = item
+        if self.clock() - fetched_at > self.max_age:
+            self.stats['stale'] += 1
+            return None
+        self.stats['used'] += 1
+        return data
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout=1.0)
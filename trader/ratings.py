@@ -0,0 +1,246 @@
+# ratings.py - ratings de ataque/defesa por time, atualizados a cada resultado
+# Armazenamento compacto em arrays NumPy + mapa nome -> índice. Cada resultado novo faz um
+# passo de gradiente na log-verossimilhança Poisson (sem reajustar todo o histórico) e as
+# médias de gols de um lote inteiro de partidas saem de uma única busca vetorizada.
+import json, os
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+import sys; sys.path.insert(0, ".."); from config import RESULTS_DIR, RATINGS_SEEN_DAYS
+
+RATINGS_FILE = os.path.join(RESULTS_DIR, 'ratings.npz')
+BASE_GOALS = 1.25       # média de gols do visitante em campo neutro (escala inicial)
+HOME_ADVANTAGE = 1.15   # multiplicador inicial da média do mandante
+LEARNING_RATE = 0.05    # passo por resultado nos ratings de time
+GLOBAL_RATE = 0.005     # passo por resultado na base e na vantagem de mando
+
+
+def _as_float(values):
+    """Coluna numérica como float64; textos inválidos viram NaN (como pd.to_numeric)."""
+    arr = np.asarray(values)
+    if arr.dtype.kind in 'fiub':
+        return arr.astype(np.float64, copy=False)
+    return pd.to_numeric(pd.Series(arr), errors='coerce').to_numpy(dtype=np.float64)
+
+
+class TeamRatings:
+    """Ratings log-lineares: média casa = exp(base + mando + ataque[casa] - defesa[fora])."""
+
+    def __init__(self, capacity=64, lr=LEARNING_RATE, global_lr=GLOBAL_RATE, seen_days=RATINGS_SEEN_DAYS):
+        self.lr = lr
+        self.global_lr = global_lr
+        self.seen_days = seen_days  # janela de partidas lembradas (None = todas)
+        self.base = float(np.log(BASE_GOALS))
+        self.home_adv = float(np.log(HOME_ADVANTAGE))
+        self.index = {}
+        self.names = []
+        self._attack = np.zeros(capacity, dtype=np.float64)
+        self._defence = np.zeros(capacity, dtype=np.float64)
+        self._games = np.zeros(capacity, dtype=np.int32)
+        self._seen = {}        # data 'AAAA-MM-DD' -> {'casa|fora'} já ingeridos, só na janela
+        self._seen_since = ''  # início da janela: resultados anteriores são ignorados
+        self.version = 0  # incrementa a cada atualização (útil para invalidar caches)
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def attack(self):
+        return self._attack[:len(self.names)]
+
+    @property
+    def defence(self):
+        return self._defence[:len(self.names)]
+
+    @property
+    def games(self):
+        return self._games[:len(self.names)]
+
+    def team_id(self, name):
+        """Índice do time, registrando-o (rating 0) se ainda não existir."""
+        idx = self.index.get(name)
+        if idx is None:
+            idx = len(self.names)
+            if idx == len(self._attack):
+                self._grow()
+            self.index[name] = idx
+            self.names.append(name)
+        return idx
+
+    def _grow(self):
+        cap = 2 * len(self._attack)
+        for attr in ('_attack', '_defence', '_games'):
+            arr = getattr(self, attr)
+            new = np.zeros(cap, dtype=arr.dtype)
+            new[:len(arr)] = arr
+            setattr(self, attr, new)
+
+    def lookup(self, names):
+        """Índices vetorizados; times desconhecidos recebem -1 (sem registrar)."""
+        if isinstance(names, np.ndarray) and names.dtype == object:
+            # arrays (replay) dispensam montar uma Series
+            codes, uniq = pd.factorize(names)
+        elif isinstance(getattr(names, 'dtype', None), pd.CategoricalDtype):
+            # colunas categóricas (cache colunar) já trazem os códigos prontos
+            s = pd.Series(names)
+            codes, uniq = s.cat.codes.to_numpy(), s.cat.categories
+        else:
+            codes, uniq = pd.factorize(pd.Series(names).astype(object))
+        # posição extra no fim: códigos -1 (NaN) viram -1 (desconhecido)
+        mapped = np.array([self.index.get(t, -1) for t in uniq] + [-1], dtype=np.int64)
+        return mapped[codes]
+
+    def goal_means(self, home_teams, away_teams):
+        """Retorna (média casa, média fora) para lotes de partidas numa única busca."""
+        n = len(self.names)
+        # posição extra no fim com rating 0 para times desconhecidos (índice -1)
+        att = np.append(self._attack[:n], 0.0)
+        dfn = np.append(self._defence[:n], 0.0)
+        h = self.lookup(home_teams)
+        a = self.lookup(away_teams)
+        hm = np.exp(self.base + self.home_adv + att[h] - dfn[a])
+        am = np.exp(self.base + att[a] - dfn[h])
+        return hm, am
+
+    def update(self, home, away, home_goals, away_goals):
+        """Atualização incremental com um resultado (um passo de gradiente)."""
+        h, a = self.team_id(home), self.team_id(away)
+        lam = np.exp(self.base + self.home_adv + self._attack[h] - self._defence[a])
+        mu = np.exp(self.base + self._attack[a] - self._defence[h])
+        eh, ea = home_goals - lam, away_goals - mu
+        self._attack[h] += self.lr * eh
+        self._defence[a] -= self.lr * eh
+        self._attack[a] += self.lr * ea
+        self._defence[h] -= self.lr * ea
+        self.base += self.global_lr * (eh + ea) / 2
+        self.home_adv += self.global_lr * eh
+        self._games[h] += 1
+        self._games[a] += 1
+        self.version += 1
+
+    def update_from_frame(self, df):
+        """Ingere resultados de um DataFrame (colunas home_goals/away_goals), em ordem de data.
+        Partidas já vistas são ignoradas, então o mesmo arquivo pode ser relido a cada rodada; só os
+        últimos `seen_days` dias ficam lembrados e resultados mais antigos que isso não entram.
+        Aceita também colunas NumPy (analyzer.Columns): lê só arrays, sem indexar o DataFrame."""
+        if df is None or 'home_goals' not in df or 'away_goals' not in df:
+            return 0
+        hg_all = _as_float(df['home_goals'])
+        ag_all = _as_float(df['away_goals'])
+        keep = ~(np.isnan(hg_all) | np.isnan(ag_all))
+        if not keep.any():
+            return 0
+        homes, aways = np.asarray(df['home_team'], dtype=object), np.asarray(df['away_team'], dtype=object)
+        if 'date' in df:
+            raw = np.asarray(df['date'])
+            dates = np.datetime_as_string(raw, unit='D') if raw.dtype.kind == 'M' else \
+                np.array([str(d)[:10] for d in raw], dtype=object)
+        else:
+            raw, dates = None, np.full(len(keep), '', dtype=object)
+        order = np.flatnonzero(keep)
+        if raw is not None and len(order) > 1:
+            kept = raw[order]
+            try:
+                ordered = bool((kept[1:] >= kept[:-1]).all())
+            except TypeError:
+                ordered = False
+            if not ordered:
+                order = order[pd.Series(kept).sort_values(kind='stable').index.to_numpy()]
+        count = 0
+        since = self._seen_since
+        for day, home, away, hg, ag in zip(dates[order].tolist(), homes[order].tolist(), aways[order].tolist(),
+                                           hg_all[order].tolist(), ag_all[order].tolist()):
+            if since and day[:1].isdigit() and day < since:
+                continue
+            pair = f"{home}|{away}"
+            seen = self._seen.get(day)
+            if seen is None:
+                seen = self._seen[day] = set()
+            elif pair in seen:
+                continue
+            seen.add(pair)
+            self.update(home, away, hg, ag)
+            count += 1
+        if count:
+            self._prune_seen()
+        return count
+
+    def _prune_seen(self):
+        """Esquece os dias anteriores a `seen_days` antes do resultado mais recente."""
+        days = [d for d in self._seen if d[:1].isdigit()]
+        if not days or not self.seen_days:
+            return
+        try:
+            since = (date.fromisoformat(max(days)) - timedelta(days=self.seen_days)).isoformat()
+        except ValueError:
+            return
+        for d in days:
+            if d < since:
+                del self._seen[d]
+        self._seen_since = max(self._seen_since, since)
+
+    def frozen(self):
+        """Cópia só com os parâmetros do modelo (sem as partidas já vistas): leve para enviar a
+        outros processos, que só precisam de goal_means."""
+        n = len(self.names)
+        obj = TeamRatings(capacity=max(1, n), lr=self.lr, global_lr=self.global_lr)
+        obj._attack[:n] = self._attack[:n]
+        obj._defence[:n] = self._defence[:n]
+        obj._games[:n] = self._games[:n]
+        obj.base, obj.home_adv = self.base, self.home_adv
+        obj.names = list(self.names)
+        obj.index = dict(self.index)
+        obj.version = self.version
+        return obj
+
+    def to_frame(self):
+        return pd.DataFrame({'team': self.names, 'attack': self.attack,
+                             'defence': self.defence, 'games': self.games})
+
+    def save(self, path=RATINGS_FILE):
+        seen = {d: sorted(pairs) for d, pairs in sorted(self._seen.items())}
+        np.savez(path, attack=self.attack, defence=self.defence, games=self.games,
+                 globals=np.array([self.base, self.home_adv]),
+                 meta=np.array(json.dumps({'names': self.names, 'seen': seen, 'seen_since': self._seen_since,
+                                           'version': self.version})))
+
+    @classmethod
+    def load(cls, path=RATINGS_FILE):
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            n = len(meta['names'])
+            obj = cls(capacity=max(64, n))
+            obj._attack[:n] = data['attack']
+            obj._defence[:n] = data['defence']
+            obj._games[:n] = data['games']
+            obj.base, obj.home_adv = (float(x) for x in data['globals'])
+        obj.names = list(meta['names'])
+        obj.index = {name: i for i, name in enumerate(obj.names)}
+        seen = meta['seen']
+        if isinstance(seen, list):
+            # formato antigo: lista de 'data|casa|fora'
+            pairs = {}
+            for key in seen:
+                day, _, pair = key.partition('|')
+                pairs.setdefault(day, set()).add(pair)
+            obj._seen = pairs
+        else:
+            obj._seen = {d: set(p) for d, p in seen.items()}
+        obj._seen_since = meta.get('seen_since', '')
+        obj.version = int(meta.get('version', 0))
+        obj._prune_seen()
+        return obj
+
+
+_RATINGS = None
+
+
+def get_ratings():
+    """Store compartilhado, carregado de RATINGS_FILE na primeira chamada."""
+    global _RATINGS
+    if _RATINGS is None:
+        try:
+            _RATINGS = TeamRatings.load() if os.path.exists(RATINGS_FILE) else TeamRatings()
+        except Exception:
+            _RATINGS = TeamRatings()
+    return _RATINGS
@@ -0,0 +1,140 @@
+# replay.py - backtest rápido: rodadas sobre um histórico de partidas com relógio virtual
+# Cada data do dataset vira uma rodada. O pipeline de produção (analyzer, bet_engine, manager)
+# recebe as partidas do dia sem os placares, as apostas são liquidadas contra os resultados
+# conhecidos e só então os ratings aprendem com o dia (sem olhar o futuro).
+# O histórico é dividido por dia uma única vez em colunas NumPy (analyzer.Columns): as rodadas
+# passam pelas mesmas funções de produção sem montar DataFrames a cada dia.
+import os, time
+from dataclasses import dataclass
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from analyzer import Columns
+from ledger import CsvLedger
+from manager import BankrollManager
+from pipeline import RoundPipeline
+from ratings import TeamRatings
+
+GOAL_COLUMNS = ('home_goals', 'away_goals')
+
+# mercado -> vencedor dado (gols casa, gols fora)
+MARKET_OUTCOMES = {
+    '1': lambda hg, ag: hg > ag,
+    'X': lambda hg, ag: hg == ag,
+    '2': lambda hg, ag: hg < ag,
+    'O2.5': lambda hg, ag: hg + ag > 2.5,
+    'U2.5': lambda hg, ag: hg + ag < 2.5,
+    'BTTS': lambda hg, ag: (hg > 0) & (ag > 0),
+}
+
+
+def settle_accumulator(acc, goals):
+    """'win' se todas as seleções acertaram, 'lose' se alguma errou e 'void' se falta placar.
+    goals: array (n, 2) com os gols das partidas da rodada, na ordem do DataFrame enriquecido."""
+    for sel in acc['selections']:
+        hg, ag = goals[sel['idx']]
+        if np.isnan(hg) or np.isnan(ag):
+            return 'void'
+        if not MARKET_OUTCOMES[sel['market']](hg, ag):
+            return 'lose'
+    return 'win'
+
+
+class ReplayPipeline(RoundPipeline):
+    """RoundPipeline que liquida as apostas com os placares do dia e depois treina os ratings."""
+
+    def __init__(self, bank, ratings=None, **kwargs):
+        kwargs.setdefault('n_sims', 0)  # o resultado real substitui a simulação
+        super().__init__(bank, ratings=TeamRatings() if ratings is None else ratings, use_cache=False,
+                         **kwargs)
+        self.goals = None
+
+    def record(self, accs, stakes):
+        count = 0
+        for acc, stake in zip(accs, stakes):
+            if stake <= 0:
+                continue
+            rid = self.bank.reserve(stake)
+            if rid is None:
+                continue
+            details = {'selections': acc['selections'], 'total_odd': acc['total_odd']}
+            self.bank.settle(rid, 'multiple', details, acc['total_odd'], settle_accumulator(acc, self.goals))
+            count += 1
+        return count
+
+    def run(self, fixtures=None):
+        """Roda a rodada com os placares escondidos e ingere os resultados ao final.
+        `fixtures`: Columns do dia (iter_rounds) ou um DataFrame, convertido aqui."""
+        if not isinstance(fixtures, Columns):
+            fixtures = Columns.from_frame(fixtures)
+        self.goals = np.column_stack([np.asarray(fixtures[c], dtype=np.float64) for c in GOAL_COLUMNS])
+        res = super().run(Columns((c, v) for c, v in fixtures.items() if c not in GOAL_COLUMNS))
+        self.ratings.update_from_frame(fixtures)
+        return res
+
+
+@dataclass
+class ReplayReport:
+    rounds: int
+    fixtures: int
+    bets: int
+    elapsed: float
+    initial: float
+    final_balance: float
+    max_drawdown: float
+    roi: float
+    win_rate: float
+
+    @property
+    def rounds_per_sec(self):
+        return self.rounds / self.elapsed if self.elapsed else 0.0
+
+
+def load_replay_dataset(path):
+    """Histórico com date, home_team, away_team, odds e home_goals/away_goals."""
+    df = pd.read_csv(path, parse_dates=['date'])
+    missing = {'date', 'home_team', 'away_team', 'home_goals', 'away_goals'} - set(df.columns)
+    if missing:
+        raise ValueError(f"dataset de replay sem as colunas: {', '.join(sorted(missing))}")
+    return df.sort_values('date', kind='stable').reset_index(drop=True)
+
+
+def iter_rounds(df):
+    """(data, Columns com as partidas do dia) em ordem cronológica.
+    As colunas são convertidas uma única vez; cada dia é só uma fatia (view) dos arrays."""
+    days = df['date'].dt.normalize()
+    cols = Columns.from_frame(df)
+    for c in GOAL_COLUMNS:
+        cols[c] = pd.to_numeric(df[c], errors='coerce').to_numpy(dtype=np.float64)
+    values = days.to_numpy()
+    bounds = np.flatnonzero(np.r_[True, values[1:] != values[:-1], True])
+    for a, b in zip(bounds[:-1], bounds[1:]):
+        yield days.iat[a].to_pydatetime(), Columns((c, v[a:b]) for c, v in cols.items())
+
+
+def replay(df, run_round, initial=None, results_dir=None, max_rounds=None, **pipeline_kwargs):
+    """Executa `run_round(bank, pipeline=..., fixtures=...)` para cada dia do histórico.
+    O relógio do bankroll é o dia da rodada e o histórico vai para results_dir/replay_history.csv."""
+    results_dir = results_dir or 'results'
+    history = os.path.join(results_dir, 'replay_history.csv')
+    if os.path.exists(history):
+        os.remove(history)
+    clock = {'now': datetime(1970, 1, 1)}
+    bank = BankrollManager(initial, ledger=CsvLedger(history, flush_seconds=float('inf')),
+                           clock=lambda: clock['now'])
+    pipeline = ReplayPipeline(bank, **pipeline_kwargs)
+    rounds = fixtures = 0
+    t0 = time.perf_counter()
+    for day, day_df in iter_rounds(df):
+        if max_rounds is not None and rounds >= max_rounds:
+            break
+        clock['now'] = day
+        run_round(bank, pipeline=pipeline, fixtures=day_df)
+        rounds += 1
+        fixtures += len(day_df)
+    bank.close()
+    elapsed = time.perf_counter() - t0
+    stats = bank.snapshot()['stats']
+    return ReplayReport(rounds=rounds, fixtures=fixtures, bets=stats['bets'], elapsed=elapsed,
+                        initial=float(bank.initial), final_balance=bank.balance,
+                        max_drawdown=stats['max_drawdown'], roi=stats['roi'], win_rate=stats['win_rate'])
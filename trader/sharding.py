@@ -0,0 +1,95 @@
+# sharding.py - rodada particionada por liga num ProcessPoolExecutor
+# Cada processo recebe as partidas de um grupo de ligas e faz enriquecimento e seleção de value
+# bets; o processo principal junta as probabilidades e as seleções de todos os shards e monta as
+# múltiplas e as stakes uma única vez, então as apostas são as mesmas do processo único (uma
+# múltipla pode combinar partidas de shards diferentes). Só enrich e select ficam paralelos: o
+# ganho depende de quanto eles pesam na rodada.
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from analyzer import enrich_with_probs
+from bet_engine import select_value_selections
+from pipeline import RoundPipeline
+from poisson import MARKETS
+from ratings import get_ratings
+
+LEAGUE_COLUMNS = ('league_id', 'league')
+
+
+def partition(df, n_shards):
+    """Posições das linhas por shard: ligas inteiras distribuídas pelo tamanho (maior primeiro,
+    sempre no shard mais leve). Sem coluna de liga, divide em blocos contíguos."""
+    n_shards = max(1, min(n_shards, len(df)))
+    col = next((c for c in LEAGUE_COLUMNS if c in df and df[c].notna().any()), None)
+    if col is None:
+        return [a for a in np.array_split(np.arange(len(df)), n_shards) if len(a)]
+    codes, _ = pd.factorize(df[col], use_na_sentinel=False)
+    sizes = np.bincount(codes)
+    load = np.zeros(n_shards, dtype=np.int64)
+    owner = np.empty(len(sizes), dtype=np.int64)
+    for league in np.argsort(-sizes, kind='stable'):
+        owner[league] = shard = int(np.argmin(load))
+        load[shard] += sizes[league]
+    shard_of = owner[codes]
+    return [np.flatnonzero(shard_of == s) for s in range(n_shards) if load[s]]
+
+
+def run_shard(fixtures, positions, ratings, conf_threshold):
+    """Trabalho de um shard (roda no processo filho). Retorna (posições, probabilidades e
+    seleções com idx já nas posições globais da rodada)."""
+    dfp = enrich_with_probs(fixtures, ratings=ratings)
+    candidates = select_value_selections(dfp, conf_threshold=conf_threshold)
+    for c in candidates:
+        c['idx'] = int(positions[c['idx']])
+    return positions, dfp[list(MARKETS)].to_numpy(), candidates
+
+
+class ShardedRoundPipeline(RoundPipeline):
+    """RoundPipeline com enrich/select distribuídos por liga em `workers` processos.
+    O tempo dos shards aparece todo no estágio 'enrich'; build, stake, simulate e record
+    continuam no processo principal sobre as seleções combinadas."""
+
+    def __init__(self, bank, workers=None, executor=None, **kwargs):
+        # os shards enriquecem do zero nos processos filhos: o EnrichmentCache do processo
+        # principal não participa (e cache_stats da rodada fica vazio em vez de obsoleto)
+        kwargs.pop('cache', None)
+        kwargs.pop('use_cache', None)
+        super().__init__(bank, use_cache=False, **kwargs)
+        self.workers = workers or os.cpu_count() or 1
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._candidates = []
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.workers)
+        return self._executor
+
+    def close(self):
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def enrich(self, df):
+        new_results = self.learn(df)
+        ratings = get_ratings() if self.ratings is None else self.ratings
+        out = df.reset_index(drop=True)
+        frozen = ratings.frozen()
+        futures = [self.executor.submit(run_shard, out.iloc[pos], pos, frozen, self.conf_threshold)
+                   for pos in partition(out, self.workers)]
+        probs = np.empty((len(out), len(MARKETS)))
+        self._candidates = []
+        for fut in futures:
+            pos, shard_probs, candidates = fut.result()
+            probs[pos] = shard_probs
+            self._candidates.extend(candidates)
+        # ordem estável por partida: a mesma (linha -> mercado) da seleção em processo único
+        self._candidates.sort(key=lambda c: c['idx'])
+        probs_df = pd.DataFrame(probs, columns=list(MARKETS))
+        return pd.concat([out.drop(columns=[c for c in MARKETS if c in out]), probs_df], axis=1), new_results
+
+    def select(self, dfp):
+        """Seleções já feitas nos shards (enrich), juntas e com idx global."""
+        return self._candidates
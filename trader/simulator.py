@@ -0,0 +1,182 @@
+# simulator.py - simulação Monte Carlo da liquidação das múltiplas de uma rodada
+# Cada simulação sorteia o resultado de cada partida uma única vez (1X2, over/under e ambas
+# marcam), então seleções repetidas entre múltiplas e mercados da mesma partida ficam
+# consistentes. Correlação entre partidas via cópula gaussiana equicorrelacionada (rho).
+import time
+from dataclasses import dataclass, field
+import numpy as np
+import pandas as pd
+from bet_engine import MARKET_COLUMNS
+
+CHUNK_SIMS = 200_000
+QUANTILES = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+
+# mercado -> (grupo de resultado sorteado junto, posição no grupo)
+# dentro de um grupo os mercados são mutuamente exclusivos e dividem o mesmo uniforme
+MARKET_GROUPS = {
+    '1': ('result', 0), 'X': ('result', 1), '2': ('result', 2),
+    'O2.5': ('goals', 0), 'U2.5': ('goals', 1),
+    'BTTS': ('btts', 0),
+}
+GROUP_MARKETS = {'result': ('1', 'X', '2'), 'goals': ('O2.5', 'U2.5'), 'btts': ('BTTS',)}
+
+
+def _norm_cdf(z):
+    """Φ(z) vetorizado (erf de Abramowitz-Stegun 7.1.26, erro < 1.5e-7)."""
+    x = np.abs(z) / np.sqrt(2.0)
+    t = 1.0 / (1.0 + 0.3275911 * x)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    erf = 1.0 - poly * np.exp(-x * x)
+    return 0.5 * (1.0 + np.sign(z) * erf)
+
+
+@dataclass
+class SimulationReport:
+    """Métricas por múltipla e da rodada (P&L em R$ com as stakes informadas)."""
+    n_sims: int
+    accumulators: list = field(default_factory=list)  # dicts com ev, var, std, hit_rate, prob, quantiles
+    round: dict = field(default_factory=dict)         # ev, var, std, p_loss, quantiles, histogram
+    elapsed: float = 0.0
+
+    @property
+    def sims_per_sec(self):
+        return self.n_sims / self.elapsed if self.elapsed else 0.0
+
+
+def _row_positions(probs_df, accs):
+    """idx das seleções -> posição da linha em `probs_df` (só os idx presentes no índice)."""
+    index = probs_df.index
+    wanted = {sel.get('idx') for acc in accs for sel in acc['selections']}
+    if isinstance(index, np.ndarray) or isinstance(index, pd.RangeIndex) and index.start == 0 and index.step == 1:
+        # índice posicional (analyzer.Columns ou saída de enrich_with_probs): idx já é a linha
+        n = len(index)
+        return {i: i for i in wanted if isinstance(i, (int, np.integer)) and 0 <= i < n}
+    return {i: index.get_loc(i) for i in wanted if i in index}
+
+
+def _leg_table(accs, probs_df=None):
+    """Colunas únicas de (partida, grupo) e, por seleção, (coluna, a, b): a perna ganha quando o
+    uniforme da coluna cai em [a, b). Mercados do mesmo grupo ocupam faixas disjuntas."""
+    # probabilidades de cada mercado do grupo: do DataFrame enriquecido ou do 'conf' das seleções
+    group_probs = {}
+    rows = _row_positions(probs_df, accs) if probs_df is not None else {}
+    arrays = {}  # coluna de probabilidade -> array, lido uma vez por chamada
+    for acc in accs:
+        for sel in acc['selections']:
+            group, pos = MARKET_GROUPS[sel['market']]
+            key = (sel.get('idx'), group)
+            if key not in group_probs:
+                probs = [np.nan] * len(GROUP_MARKETS[group])
+                row = rows.get(key[0])
+                if row is not None:
+                    for k, m in enumerate(GROUP_MARKETS[group]):
+                        name = MARKET_COLUMNS[m][0]
+                        if name in probs_df:
+                            if name not in arrays:
+                                arrays[name] = np.asarray(probs_df[name], dtype=np.float64)
+                            probs[k] = float(arrays[name][row])
+                group_probs[key] = probs
+            if np.isnan(group_probs[key][pos]):
+                group_probs[key][pos] = float(sel['conf'])
+    columns = {key: i for i, key in enumerate(group_probs)}
+    legs = []
+    for acc in accs:
+        acc_legs = []
+        for sel in acc['selections']:
+            group, pos = MARKET_GROUPS[sel['market']]
+            key = (sel.get('idx'), group)
+            probs = [0.0 if np.isnan(p) else p for p in group_probs[key]]
+            a = float(sum(probs[:pos]))
+            acc_legs.append((columns[key], a, a + float(probs[pos])))
+        legs.append(acc_legs)
+    return len(columns), legs
+
+
+def prepare_legs(accs, probs_df=None):
+    """Pré-processa as múltiplas: (n_colunas, col, lo, hi, legs) com matrizes (n_acc, n_legs)."""
+    n_groups, legs = _leg_table(accs, probs_df)
+    n_acc = len(accs)
+    n_legs = max(len(l) for l in legs)
+    # coluna do uniforme e limites por perna; pernas vazias sempre ganham
+    col = np.zeros((n_acc, n_legs), dtype=np.int64)
+    lo = np.zeros((n_acc, n_legs))
+    hi = np.full((n_acc, n_legs), 2.0)
+    for i, acc_legs in enumerate(legs):
+        for j, (c, a, b) in enumerate(acc_legs):
+            col[i, j], lo[i, j], hi[i, j] = c, a, b
+    return n_groups, col, lo, hi, legs
+
+
+def sample_wins(prepared, m, rng, rho=0.0):
+    """Sorteia `m` cenários e retorna matriz booleana (m, n_acc): múltipla i ganhou no cenário s."""
+    n_groups, col, lo, hi, _legs = prepared
+    if rho:
+        # cópula gaussiana: fator comum + idiossincrático, uniformes correlacionados
+        common = rng.standard_normal((m, 1))
+        z = np.sqrt(rho) * common + np.sqrt(1.0 - rho) * rng.standard_normal((m, n_groups))
+        u = _norm_cdf(z)
+    else:
+        u = rng.random((m, n_groups))
+    lu = u[:, col]                                    # (m, n_acc, n_legs)
+    return ((lu >= lo) & (lu < hi)).all(axis=2)
+
+
+def simulate_accumulators(accs, probs_df=None, stakes=None, n_sims=1_000_000, rho=0.0, seed=None,
+                          bins=50):
+    """Liquida `n_sims` cenários de uma vez (em blocos) e resume EV, variância, taxa de acerto e
+    distribuição de P&L por múltipla e da rodada.
+
+    accs: saída de make_accumulators / build_accumulators
+    probs_df: DataFrame enriquecido (p_home, p_draw, ...); sem ele usa o 'conf' de cada seleção
+    stakes: stake de cada múltipla (padrão 1.0, ou seja P&L por unidade)
+    rho: correlação entre partidas (0 = independentes)"""
+    t0 = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    n_acc = len(accs)
+    stakes = np.ones(n_acc) if stakes is None else np.asarray(stakes, dtype=np.float64)
+    odds = np.array([a['total_odd'] for a in accs], dtype=np.float64)
+    if n_acc == 0:
+        return SimulationReport(n_sims=n_sims, elapsed=time.perf_counter() - t0)
+    prepared = prepare_legs(accs, probs_df)
+    legs = prepared[-1]
+
+    wins = np.zeros(n_acc, dtype=np.int64)
+    pnl_sum = np.zeros(n_acc)
+    pnl_sq = np.zeros(n_acc)
+    round_pnl = np.empty(n_sims)
+    acc_samples = []
+    sample_size = min(n_sims, 100_000)   # amostra para quantis por múltipla
+    done = 0
+    while done < n_sims:
+        m = min(CHUNK_SIMS, n_sims - done)
+        won = sample_wins(prepared, m, rng, rho)
+        pnl = np.where(won, stakes * (odds - 1.0), -stakes)
+        wins += won.sum(axis=0)
+        pnl_sum += pnl.sum(axis=0)
+        pnl_sq += (pnl * pnl).sum(axis=0)
+        round_pnl[done:done + m] = pnl.sum(axis=1)
+        if done < sample_size:
+            acc_samples.append(pnl[:sample_size - done])
+        done += m
+
+    samples = np.concatenate(acc_samples)
+    mean = pnl_sum / n_sims
+    var = pnl_sq / n_sims - mean ** 2
+    per_acc = []
+    for i in range(n_acc):
+        prob = float(np.prod([b - a for _c, a, b in legs[i]]))
+        per_acc.append({
+            'total_odd': float(odds[i]), 'stake': float(stakes[i]),
+            'prob': prob, 'hit_rate': float(wins[i] / n_sims),
+            'ev': float(mean[i]), 'ev_analytic': float(stakes[i] * (prob * odds[i] - 1.0)),
+            'var': float(var[i]), 'std': float(np.sqrt(max(var[i], 0.0))),
+            'quantiles': dict(zip(QUANTILES, np.quantile(samples[:, i], QUANTILES).tolist())),
+        })
+    hist, edges = np.histogram(round_pnl, bins=bins)
+    report = {
+        'ev': float(round_pnl.mean()), 'var': float(round_pnl.var()), 'std': float(round_pnl.std()),
+        'p_loss': float((round_pnl < 0).mean()), 'p_any_win': float((round_pnl > -stakes.sum()).mean()),
+        'quantiles': dict(zip(QUANTILES, np.quantile(round_pnl, QUANTILES).tolist())),
+        'histogram': {'counts': hist.tolist(), 'edges': edges.tolist()},
+    }
+    return SimulationReport(n_sims=n_sims, accumulators=per_acc, round=report, elapsed=time.perf_counter() - t0)